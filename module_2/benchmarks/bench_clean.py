@@ -0,0 +1,156 @@
+"""
+Benchmark clean-step throughput (rows/sec) against the original, unoptimized cleaning loop.
+
+Raw rows in the same shape _parse_rows produces are generated from the fixture server's
+synthetic survey entries. They are cleaned once with a copy of the original implementation
+(inline re.search patterns, uncached strptime, a fresh dict comprehension per row) and once with
+clean.iter_clean_rows. The outputs must be identical. With --workers, clean.clean_rows is also
+timed on a process pool of each size and compared with the serial rows/sec. Worker processes
+only help with at least that many idle cores, so check the speedup on the target machine before
+raising clean_workers.
+
+Usage (from module_2/):
+    python -m benchmarks.bench_clean --rows 100000
+    python -m benchmarks.bench_clean --rows 1000000 --workers 2 4 8 --chunk-bytes 2000000
+"""
+
+import argparse
+import datetime
+import re
+import time
+
+import clean
+from benchmarks.fixture_server import make_survey_entries
+
+URL = "https://www.thegradcafe.com/survey/"
+
+def make_raw_rows(n_rows:int, rows_per_page:int=20) -> list[list[str]]:
+    """Generate n_rows raw survey rows laid out like _parse_rows output."""
+    rows = []
+    page_number = 1
+    while len(rows) < n_rows:
+        for entry in make_survey_entries(page_number, rows_per_page):
+            row = [entry["university"], f"{entry['program']}\n\n{entry['degree']}", entry["added_on"],
+                   entry["decision"], entry["href"], entry["decision"], entry["semester"],
+                   entry["nationality"], *entry["scores"]]
+            if entry["comment"]:
+                row.append(entry["comment"])
+            rows.append(row)
+        page_number += 1
+
+    return rows[:n_rows]
+
+# Original cleaning implementation, kept as the baseline for comparison
+
+def _reference_separate_program_name_from_level(program_name_and_level:str) -> tuple[str, str]:
+    if "\n" in program_name_and_level:
+        parts = program_name_and_level.split("\n")
+        return (parts[0], parts[-1])
+    regex = r"(PhD|Masters|MFA|MBA|JD|EdD|Other|PsyD)"
+    match = re.search(regex, program_name_and_level, flags=re.IGNORECASE)
+    if match:
+        return (program_name_and_level[:match.start()].strip(), match.group(0))
+    return (program_name_and_level, "")
+
+def _reference_clean_secondary_rows(row_data:list[str]) -> dict:
+    update_dict = {}
+    try:
+        for datum in row_data:
+            if datum[:3] == "GRE":
+                if "AW" in datum:
+                    update_dict["gre_aw_score"] = float(re.search(r"\d+.\d+", datum).group(0))
+                elif "V" in datum:
+                    update_dict["gre_v_score"] = int(re.search(r"\d+", datum).group(0))
+                else:
+                    update_dict["gre_score"] = int(re.search(r"\d+", datum).group(0))
+            elif datum[:3] == "GPA":
+                update_dict["gpa"] = float(re.search(r"\d+.\d+", datum).group(0))
+            else:
+                update_dict["comments"] = datum
+    except AttributeError:
+        pass
+    return update_dict
+
+def _reference_convert_date_to_iso(date_str:str) -> tuple[str, int]:
+    try:
+        date_obj = datetime.datetime.strptime(date_str, "%b %d, %Y")
+        return (date_obj.strftime("%Y-%m-%d"), date_obj.year)
+    except ValueError:
+        return (date_str, datetime.date.today().year)
+
+def _reference_clean_applicant_status(full_status_str:str, year:int) -> tuple[str, str]:
+    full_status_str = full_status_str.lower()
+    if "accept" in full_status_str:
+        status = "Accepted"
+    elif "reject" in full_status_str:
+        status = "Rejected"
+    elif "wait" in full_status_str:
+        status = "Waitlisted"
+    elif "interview" in full_status_str:
+        status = "Interviewed"
+    else:
+        status = "Other"
+    day_month_of_decision = re.search(r"\d{1,2} \w{3}", full_status_str).group(0) + f" {str(year)}"
+    datetime_of_decision = datetime.datetime.strptime(day_month_of_decision, "%d %b %Y")
+    return (status, datetime_of_decision.strftime("%Y-%m-%d"))
+
+def reference_clean_rows(results:list[list[str]], url:str) -> list[dict]:
+    """The original clean_data loop."""
+    cleaned_results = []
+    for result in results:
+        try:
+            result_dict = {k:None for k in clean._categories}
+            result_dict["university"] = result[0]
+            result_dict["program_name"], result_dict["program_level"] = \
+                _reference_separate_program_name_from_level(result[1])
+            result_dict["date_of_information_added"], year = _reference_convert_date_to_iso(result[2])
+            result_dict["applicant_status"] = _reference_clean_applicant_status(result[3], year)
+            result_dict["url_link"] = f"{url}{result[4][1:]}"
+            result_dict["program_start_semester"] = result[6]
+            result_dict["nationality"] = result[7]
+            if len(result) > 8:
+                result_dict.update(_reference_clean_secondary_rows(result[8:]))
+            cleaned_results.append(result_dict)
+        except IndexError:
+            continue
+    return cleaned_results
+
+def best_time(func, repeat:int) -> tuple[float, list]:
+    """Run func repeat times, returning the best elapsed seconds and the last result."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    arg_parser.add_argument("--rows", type=int, default=100_000, help="Raw rows to clean")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="Timed runs per implementation")
+    arg_parser.add_argument("--workers", type=int, nargs="*", default=[],
+                            help="Process pool sizes to time clean_rows with")
+    arg_parser.add_argument("--chunk-bytes", type=int, default=1_000_000,
+                            help="Raw text per cleaning chunk")
+    args = arg_parser.parse_args()
+
+    raw_rows = make_raw_rows(args.rows)
+
+    before, reference = best_time(lambda: reference_clean_rows(raw_rows, URL), args.repeat)
+    after, optimized = best_time(lambda: list(clean.iter_clean_rows(raw_rows, URL)), args.repeat)
+
+    print(f"{len(raw_rows)} rows, best of {args.repeat} runs")
+    print(f"before {len(raw_rows) / before:>12.0f} rows/sec  ({before:.2f} s)")
+    print(f"after  {len(raw_rows) / after:>12.0f} rows/sec  ({after:.2f} s)")
+    identical = optimized == reference
+    print(f"speedup {before / after:.2f}x, output identical: {identical}")
+
+    for workers in args.workers:
+        elapsed, (parallel, _) = best_time(
+            lambda: clean.clean_rows(raw_rows, URL, workers=workers, chunk_bytes=args.chunk_bytes),
+            args.repeat
+        )
+        identical = parallel == reference
+        print(f"{workers:>2} workers {len(raw_rows) / elapsed:>10.0f} rows/sec  ({elapsed:.2f} s), "
+              f"{after / elapsed:.2f}x serial, output identical: {identical}")
@@ -0,0 +1,72 @@
+"""
+Benchmark the memory held by the cleaned dataset as dictionaries vs. ApplicantRecords.
+
+Raw rows are generated with bench_clean.make_raw_rows and saved as cleaned JSON. The file is
+then loaded with clean.load_data both ways, and the rows are cleaned both ways with
+clean.clean_rows. tracemalloc reports the memory still allocated once each dataset is built,
+and its peak while building it. Both representations must produce the same dictionaries.
+
+Usage (from module_2/):
+    python -m benchmarks.bench_memory --rows 200000
+"""
+
+import argparse
+import gc
+import json
+import os
+import tempfile
+import tracemalloc
+
+import clean
+from benchmarks.bench_clean import URL, make_raw_rows
+from records import ApplicantRecord
+
+def measure(build) -> tuple[int, int, list]:
+    """Build a dataset under tracemalloc. Returns the bytes held by the result, the peak bytes
+    allocated while building it, and the result."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return held, peak, result
+
+def as_json(data:list) -> str:
+    """Serialize a dataset of dictionaries or records the same way, for comparison."""
+    return json.dumps([applicant.to_dict() if isinstance(applicant, ApplicantRecord) else applicant
+                       for applicant in data], sort_keys=True)
+
+def report(label:str, n_rows:int, held:int, peak:int) -> None:
+    print(f"{label:<18} {held / 2**20:>8.1f} MiB held  {held / n_rows:>7.0f} B/row  "
+          f"peak {peak / 2**20:>8.1f} MiB")
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    arg_parser.add_argument("--rows", type=int, default=200_000, help="Cleaned results to hold")
+    args = arg_parser.parse_args()
+
+    raw_rows = make_raw_rows(args.rows)
+    cleaned, _ = clean.clean_rows(raw_rows, URL)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filename = os.path.join(tmp_dir, "applicant_data.json")
+        clean.save_data(cleaned, filename)
+        del cleaned
+
+        print(f"{args.rows} cleaned results")
+        results = {}
+        for label, build in (
+            ("load_data dicts", lambda: clean.load_data(filename)),
+            ("load_data records", lambda: clean.load_data(filename, as_records=True)),
+            ("clean_rows dicts", lambda: clean.clean_rows(raw_rows, URL)[0]),
+            ("clean_rows records", lambda: clean.clean_rows(raw_rows, URL, as_records=True)[0]),
+        ):
+            held, peak, data = measure(build)
+            report(label, args.rows, held, peak)
+            results[label] = as_json(data)
+            del data
+
+    identical = (results["load_data dicts"] == results["load_data records"]
+                 and results["clean_rows dicts"] == results["clean_rows records"])
+    print(f"output identical: {identical}")
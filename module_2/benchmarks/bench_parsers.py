@@ -0,0 +1,103 @@
+"""
+Benchmark the scraper's HTML parser backends on saved survey pages.
+
+Each backend in scraper._PARSER_BACKENDS parses every saved page with _parse_column_titles and
+_parse_rows. Throughput is reported in pages/sec, and each backend's output is checked against
+the reference "html.parser" backend. Without a directory, synthetic pages from the fixture
+server are used.
+
+Usage (from module_2/):
+    python -m benchmarks.bench_parsers --download https://www.thegradcafe.com/survey/ --n-pages 20
+    python -m benchmarks.bench_parsers pages/ --download https://www.thegradcafe.com/survey/ --n-pages 20
+    python -m benchmarks.bench_parsers pages/ --repeat 5
+    python -m benchmarks.bench_parsers --n-pages 50
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import urllib3
+
+# Run as a script (python benchmarks/bench_parsers.py), module_2 is not on the path yet
+if not __package__:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scraper
+from benchmarks.fixture_server import make_survey_page
+
+def download_pages(url:str, directory:str, n_pages:int, starting_page:int=1) -> None:
+    """Save n_pages raw survey pages to directory as page_<N>.html for offline benchmarking."""
+    os.makedirs(directory, exist_ok=True)
+    http = urllib3.PoolManager()
+    for page_number in range(starting_page, starting_page + n_pages):
+        response = http.request('GET', f"{url}?page={page_number}")
+        with open(os.path.join(directory, f"page_{page_number}.html"), 'wb') as f:
+            f.write(response.data)
+
+    return None
+
+def load_pages(directory:str) -> list[bytes]:
+    """Load every saved .html page from directory, in file name order."""
+    pages = []
+    for filename in sorted(os.listdir(directory)):
+        if filename.endswith(".html"):
+            with open(os.path.join(directory, filename), 'rb') as f:
+                pages.append(f.read())
+
+    return pages
+
+def parse_pages(pages:list[bytes], backend:str) -> list[tuple[list[str], list[list[str]]]]:
+    """Parse column titles and rows from every page with the given backend."""
+    parsed = []
+    for page_data in pages:
+        soup = scraper._make_soup(page_data, backend)
+        parsed.append((scraper._parse_column_titles(soup), scraper._parse_rows(soup)))
+
+    return parsed
+
+def benchmark_backends(pages:list[bytes], repeat:int=3) -> dict[str, float]:
+    """Time each parser backend over all pages, keeping the best of repeat runs. Returns a
+    dictionary mapping backend name to pages/sec."""
+    reference = parse_pages(pages, "html.parser")
+    pages_per_sec = {}
+
+    for backend in scraper._PARSER_BACKENDS:
+        if parse_pages(pages, backend) != reference:
+            print(f"WARNING: {backend} output differs from the html.parser reference")
+
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            parse_pages(pages, backend)
+            best = min(best, time.perf_counter() - start)
+
+        pages_per_sec[backend] = len(pages) / best
+
+    return pages_per_sec
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    arg_parser.add_argument("directory", nargs="?",
+                            help="Directory of saved survey pages (*.html), synthetic pages if omitted")
+    arg_parser.add_argument("--download", metavar="URL",
+                            help="Survey URL to save pages from first, into pages/ if no directory is given")
+    arg_parser.add_argument("--n-pages", type=int, default=20, help="Pages to download or generate")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="Timed runs per backend")
+    args = arg_parser.parse_args()
+
+    if args.download:
+        args.directory = args.directory or "pages"
+        download_pages(args.download, args.directory, args.n_pages)
+
+    if args.directory:
+        saved_pages = load_pages(args.directory)
+    else:
+        saved_pages = [make_survey_page(n) for n in range(1, args.n_pages + 1)]
+    results = benchmark_backends(saved_pages, repeat=args.repeat)
+
+    baseline = results["html.parser"]
+    print(f"{len(saved_pages)} pages, best of {args.repeat} runs")
+    for name, rate in results.items():
+        print(f"{name:<20} {rate:>10.1f} pages/sec   {rate / baseline:>5.2f}x")
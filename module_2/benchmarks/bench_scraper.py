@@ -0,0 +1,102 @@
+"""
+Benchmark scraper and cleaner throughput against the local GradCafe fixture server.
+
+For each max_workers setting the full crawl (scrape_data) is timed and reported as pages/sec
+and rows/sec. The same pages are then fetched and parsed separately to split crawl time into
+fetch and parse time, and the scraped rows are cleaned to report clean rows/sec.
+
+Usage (from module_2/):
+    python -m benchmarks.bench_scraper --pages 200 --latency 0.05 --workers 1 4 16
+    python -m benchmarks.bench_scraper --pages 200 --workers 16 --parse-workers 4
+"""
+
+import argparse
+import io
+import time
+from contextlib import redirect_stdout
+
+import scraper
+from crawl_session import CrawlSession
+from benchmarks.fixture_server import SurveyFixtureServer
+from clean import iter_clean_rows
+
+def time_crawl(url:str, n_pages:int, max_workers:int, parser:str,
+               parse_workers:int=0) -> tuple[float, list[list[str]]]:
+    """Crawl n_pages from url with scrape_data. Returns elapsed seconds and the rows."""
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):  # Silence crawl progress messages
+        _, results = scraper.scrape_data(
+            agent="benchmark",
+            url=url,
+            paths=["/", "/survey/"],
+            min_results=n_pages * 1000,
+            max_pages_to_crawl=n_pages,
+            max_workers=max_workers,
+            parser=parser,
+            parse_workers=parse_workers
+        )
+    return time.perf_counter() - start, results
+
+def time_fetch(url:str, n_pages:int) -> tuple[float, list[bytes]]:
+    """Fetch n_pages one at a time with no parsing. Returns elapsed seconds and page bodies."""
+    pages = []
+    with CrawlSession("benchmark") as session:
+        start = time.perf_counter()
+        for page_number in range(1, n_pages + 1):
+            pages.append(scraper._fetch_page(session, f"{url}?page={page_number}"))
+        elapsed = time.perf_counter() - start
+    return elapsed, pages
+
+def time_parse(pages:list[bytes], parser:str) -> float:
+    """Parse column titles and rows from already-fetched pages. Returns elapsed seconds."""
+    start = time.perf_counter()
+    for page_data in pages:
+        soup = scraper._make_soup(page_data, parser)
+        scraper._parse_column_titles(soup)
+        scraper._parse_rows(soup)
+    return time.perf_counter() - start
+
+def time_clean(results:list[list[str]], url:str) -> tuple[float, int]:
+    """Clean scraped rows. Returns elapsed seconds and the number of cleaned rows."""
+    start = time.perf_counter()
+    n_cleaned = sum(1 for _ in iter_clean_rows(results, url))
+    return time.perf_counter() - start, n_cleaned
+
+def run_benchmarks(n_pages:int, rows_per_page:int, latency:float, workers:list[int],
+                   parser:str="html.parser", parse_workers:int=0) -> None:
+    """Run every benchmark against a fresh fixture server and print a report."""
+    with SurveyFixtureServer(n_pages, rows_per_page, latency) as server:
+        print(f"Fixture: {n_pages} pages x {rows_per_page} rows, {latency * 1000:.0f} ms latency, "
+              f"parser={parser}, parse_workers={parse_workers}\n")
+
+        print(f"{'max_workers':>11} {'seconds':>9} {'pages/sec':>10} {'rows/sec':>10}")
+        results = []
+        for max_workers in workers:
+            elapsed, results = time_crawl(server.url, n_pages, max_workers, parser, parse_workers)
+            print(f"{max_workers:>11} {elapsed:>9.2f} {n_pages / elapsed:>10.1f} "
+                  f"{len(results) / elapsed:>10.1f}")
+
+        fetch_time, pages = time_fetch(server.url, n_pages)
+        parse_time = time_parse(pages, parser)
+        clean_time, n_cleaned = time_clean(results, server.url)
+
+    total = fetch_time + parse_time
+    print(f"\nSerial breakdown over {n_pages} pages:")
+    print(f"  fetch {fetch_time:>8.2f} s  ({fetch_time / total:>4.0%})  {n_pages / fetch_time:>9.1f} pages/sec")
+    print(f"  parse {parse_time:>8.2f} s  ({parse_time / total:>4.0%})  {n_pages / parse_time:>9.1f} pages/sec")
+    print(f"  clean {clean_time:>8.2f} s          {n_cleaned / clean_time:>9.1f} rows/sec")
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    arg_parser.add_argument("--pages", type=int, default=100, help="Pages to crawl")
+    arg_parser.add_argument("--rows-per-page", type=int, default=20)
+    arg_parser.add_argument("--latency", type=float, default=0.05, help="Seconds of delay per page")
+    arg_parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16],
+                            help="max_workers settings to compare")
+    arg_parser.add_argument("--parser", default="html.parser", choices=list(scraper._PARSER_BACKENDS))
+    arg_parser.add_argument("--parse-workers", type=int, default=0,
+                            help="Parse on a process pool of this size (0 parses inline)")
+    args = arg_parser.parse_args()
+
+    run_benchmarks(args.pages, args.rows_per_page, args.latency, args.workers, args.parser,
+                   args.parse_workers)
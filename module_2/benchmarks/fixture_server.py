@@ -0,0 +1,250 @@
+"""
+Local stand-in for TheGradCafe survey pages, used to benchmark the scraper offline.
+
+The server answers robots.txt and /survey/?page=N requests. Survey pages either come from a
+directory of recorded pages (page_<N>.html, as saved by bench_parsers --download) or are
+generated with the same thead and three-row tbody layout as the live site. Response latency,
+page count, rows per page and the robots.txt Crawl-delay are configurable. Pages past n_pages
+have an empty table body.
+
+Usage (from module_2/):
+    python -m benchmarks.fixture_server --port 8000 --pages 500 --latency 0.2
+"""
+
+import argparse
+import html
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+_UNIVERSITIES = ["Johns Hopkins University", "Stanford University", "University of Michigan",
+                 "Carnegie Mellon University", "Georgia Institute of Technology",
+                 "University of Toronto", "Massachusetts Institute of Technology (MIT)"]
+_PROGRAMS = ["Computer Science", "Electrical Engineering", "Applied Mathematics", "Economics",
+             "Biomedical Engineering", "Chemistry", "Statistics"]
+_DEGREES = ["PhD", "Masters", "MFA", "MBA", "PsyD", "Other"]
+_DECISIONS = ["Accepted", "Rejected", "Wait listed", "Interview"]
+_MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+_SEMESTERS = ["Fall 2024", "Spring 2025", "Fall 2025", "Fall 2026"]
+_NATIONALITIES = ["American", "International", "Other"]
+
+_ROBOTS_TXT = "User-agent: *\nAllow: /\n"
+
+_PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head><title>GradCafe Survey Results - Page {page_number}</title></head>
+<body>
+<nav><a href="/">Home</a> <a href="/survey/">Results</a></nav>
+<table class="tw-min-w-full">
+<thead><tr>
+<th scope="col">School</th>
+<th scope="col">Program</th>
+<th scope="col">Added On</th>
+<th scope="col">Decision</th>
+<th scope="col"><span class="tw-sr-only">Sort</span></th>
+</tr></thead>
+<tbody>
+{rows}
+</tbody>
+</table>
+<footer><p>Page {page_number}</p></footer>
+</body>
+</html>
+"""
+
+def make_survey_entries(page_number:int, rows_per_page:int=20) -> list[dict]:
+    """Generate deterministic synthetic survey entries for a page. Each entry holds the values
+    that are rendered into the survey table."""
+    rng = random.Random(page_number)
+    entries = []
+
+    for row_i in range(rows_per_page):
+        survey_id = 1_000_000 - (page_number * rows_per_page + row_i)
+        day, month = rng.randint(1, 28), rng.choice(_MONTHS)
+        decision = rng.choice(_DECISIONS)
+        entry = {
+            "university": rng.choice(_UNIVERSITIES),
+            "program": rng.choice(_PROGRAMS),
+            "degree": rng.choice(_DEGREES),
+            "added_on": f"{month} {day:02d}, 2025",
+            "decision": f"{decision} on {day} {month}",
+            "href": f"/result/{survey_id}",
+            "semester": rng.choice(_SEMESTERS),
+            "nationality": rng.choice(_NATIONALITIES),
+            "scores": [],
+            "comment": None,
+        }
+
+        # Optional secondary data, as on the live site
+        if rng.random() < 0.4:
+            entry["scores"].append(f"GRE {rng.randint(290, 340)}")
+            entry["scores"].append(f"GRE V {rng.randint(140, 170)}")
+            entry["scores"].append(f"GRE AW {rng.choice(['3.50', '4.00', '4.50', '5.00'])}")
+        if rng.random() < 0.7:
+            entry["scores"].append(f"GPA {rng.uniform(2.8, 4.0):.2f}")
+        if rng.random() < 0.3:
+            entry["comment"] = f"Synthetic comment for survey {survey_id}."
+
+        entries.append(entry)
+
+    return entries
+
+def _render_entry(entry:dict) -> str:
+    """Render one survey entry as the three table rows used by TheGradCafe."""
+    esc = html.escape
+    first_row = (
+        "<tr>"
+        f"<td><div class=\"tw-font-medium\">{esc(entry['university'])}</div></td>"
+        f"<td><div><span>{esc(entry['program'])}</span>\n"
+        f"<svg viewBox=\"0 0 2 2\"><circle cx=\"1\" cy=\"1\" r=\"1\"></circle></svg>\n"
+        f"<span class=\"tw-text-gray-500\">{esc(entry['degree'])}</span></div></td>"
+        f"<td class=\"tw-whitespace-nowrap\">{esc(entry['added_on'])}</td>"
+        f"<td><div class=\"tw-inline-flex tw-items-center\">{esc(entry['decision'])}</div></td>"
+        f"<td><a href=\"{esc(entry['href'])}\">See More</a></td>"
+        "</tr>"
+    )
+
+    tags = [entry["decision"], entry["semester"], entry["nationality"], *entry["scores"]]
+    second_row = (
+        "<tr class=\"tw-border-none\"><td colspan=\"5\"><div class=\"tw-flex tw-gap-2\">"
+        + "".join(f"<div class=\"tw-inline-flex tw-items-center\">{esc(tag)}</div>" for tag in tags)
+        + "</div></td></tr>"
+    )
+
+    third_row = ""
+    if entry["comment"]:
+        third_row = (
+            "<tr class=\"tw-border-none\"><td colspan=\"5\">"
+            f"<p class=\"tw-text-gray-500\">{esc(entry['comment'])}</p></td></tr>"
+        )
+
+    return "\n".join(row for row in (first_row, second_row, third_row) if row)
+
+def make_survey_page(page_number:int, rows_per_page:int=20) -> bytes:
+    """Render a synthetic survey page with the live site's thead / tbody layout."""
+    entries = make_survey_entries(page_number, rows_per_page)
+    rows = "\n".join(_render_entry(entry) for entry in entries)
+    return _PAGE_TEMPLATE.format(page_number=page_number, rows=rows).encode("utf-8")
+
+class SurveyFixtureServer:
+    """Threaded HTTP server standing in for TheGradCafe. Use as a context manager, or call
+    start() and stop(). The survey URL to crawl is available as .url once started."""
+
+    def __init__(self, n_pages:int=100, rows_per_page:int=20, latency:float=0.0,
+                 pages_dir:str=None, host:str="127.0.0.1", port:int=0, crawl_delay:int=None):
+        self.n_pages = n_pages
+        self.rows_per_page = rows_per_page
+        self.latency = latency
+        self.pages_dir = pages_dir
+        self.crawl_delay = crawl_delay
+        self.requests_served = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        """Survey URL served by the fixture, in the form scrape_data expects."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/survey/"
+
+    def robots_txt(self) -> bytes:
+        """Return the robots.txt body, with a Crawl-delay if one is configured."""
+        robots = _ROBOTS_TXT
+        if self.crawl_delay:
+            robots += f"Crawl-delay: {self.crawl_delay}\n"
+        return robots.encode("utf-8")
+
+    def page_body(self, page_number:int) -> bytes:
+        """Return the body for a survey page, recorded if available, else synthetic."""
+        if page_number < 1 or page_number > self.n_pages:
+            return make_survey_page(page_number, rows_per_page=0)
+
+        if self.pages_dir:
+            recorded = os.path.join(self.pages_dir, f"page_{page_number}.html")
+            if os.path.exists(recorded):
+                with open(recorded, 'rb') as f:
+                    return f.read()
+
+        return make_survey_page(page_number, self.rows_per_page)
+
+    def _make_handler(self):
+        """Build the request handler class bound to this server's settings."""
+        fixture = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the live site
+            disable_nagle_algorithm = True  # headers and body go out in separate writes
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                if parsed.path.endswith("robots.txt"):
+                    body = fixture.robots_txt()
+                    content_type = "text/plain"
+                else:
+                    if fixture.latency:
+                        time.sleep(fixture.latency)
+                    page_number = int(parse_qs(parsed.query).get("page", ["1"])[0])
+                    body = fixture.page_body(page_number)
+                    content_type = "text/html; charset=utf-8"
+
+                with fixture._lock:
+                    fixture.requests_served += 1
+
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Keep benchmark output readable
+
+        return Handler
+
+    def start(self) -> "SurveyFixtureServer":
+        """Serve requests on a background thread."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """Serve requests on the calling thread until interrupted."""
+        self._httpd.serve_forever()
+
+    def stop(self) -> None:
+        """Shut the server down and release its socket."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> "SurveyFixtureServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8000)
+    arg_parser.add_argument("--pages", type=int, default=100, help="Number of non-empty pages")
+    arg_parser.add_argument("--rows-per-page", type=int, default=20)
+    arg_parser.add_argument("--latency", type=float, default=0.0, help="Seconds of delay per page")
+    arg_parser.add_argument("--pages-dir", help="Directory of recorded page_<N>.html files")
+    arg_parser.add_argument("--crawl-delay", type=int,
+                            help="Crawl-delay (seconds) to put in robots.txt")
+    args = arg_parser.parse_args()
+
+    server = SurveyFixtureServer(args.pages, args.rows_per_page, args.latency, args.pages_dir,
+                                 args.host, args.port, args.crawl_delay)
+    print(f"Serving {args.pages} survey pages at {server.url} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
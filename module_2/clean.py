@@ -1,8 +1,22 @@
 import json
+import os
 import re
+import stat
 import datetime
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from functools import lru_cache
+from itertools import repeat
+from operator import itemgetter
+from typing import Container, Iterable, Iterator
 
-from scraper import scrape_data
+from crawl_session import CrawlSession
+from http_cache import ResponseCache
+from instrumentation import RunReport
+from raw_archive import RawArchive
+from records import ApplicantRecord, to_json_default
+from scraper import iter_survey_rows, scrape_data, survey_url
 
 _categories = {
     "university",
@@ -20,6 +34,24 @@ _categories = {
     "comments"
 }
 
+# Template for a cleaned result, copied per row instead of rebuilt from _categories. Keys follow
+# ApplicantRecord's field order, which is fixed across processes (unlike set iteration order)
+_fields = ApplicantRecord.__slots__
+_empty_result = dict.fromkeys(_fields)
+
+# Cleaned results cross the process pool as plain tuples of field values, which pickle
+# in a fraction of the time and space of dictionaries or records
+_field_values = itemgetter(*_fields)
+
+# Patterns are compiled once, and date / status parsing is memoized with bounded caches since
+# the same dates, decisions and programs repeat across thousands of rows
+_degree_regex = re.compile(r"(PhD|Masters|MFA|MBA|JD|EdD|Other|PsyD)", flags=re.IGNORECASE)
+_int_regex = re.compile(r"\d+")
+_float_regex = re.compile(r"\d+.\d+")
+_day_month_regex = re.compile(r"\d{1,2} \w{3}")
+_cache_size = 4096
+
+@lru_cache(maxsize=_cache_size)
 def _separate_program_name_from_level(program_name_and_level:str) -> tuple[str, str]:
     """Separate program level from program name. Expects a string with a newline character
     separating name from level, but can also use regex to find common degrees."""
@@ -28,8 +60,7 @@ def _separate_program_name_from_level(program_name_and_level:str) -> tuple[str,
         parts = program_name_and_level.split("\n")
         return (parts[0], parts[-1])
     else:
-        regex = r"(PhD|Masters|MFA|MBA|JD|EdD|Other|PsyD)"
-        match = re.search(regex, program_name_and_level, flags=re.IGNORECASE)
+        match = _degree_regex.search(program_name_and_level)
         if match:
             name = program_name_and_level[:match.start()].strip()
             degree = match.group(0)
@@ -47,14 +78,14 @@ def _clean_secondary_rows(row_data:list[str]) -> dict:
         for datum in row_data:
             if datum[:3] == "GRE":
                 if "AW" in datum:
-                    update_dict["gre_aw_score"] = float(re.search(r"\d+.\d+", datum).group(0))
+                    update_dict["gre_aw_score"] = float(_float_regex.search(datum).group(0))
                 elif "V" in datum:
-                    update_dict["gre_v_score"] = int(re.search(r"\d+", datum).group(0))
+                    update_dict["gre_v_score"] = int(_int_regex.search(datum).group(0))
                 else:
-                    update_dict["gre_score"] = int(re.search(r"\d+", datum).group(0))
+                    update_dict["gre_score"] = int(_int_regex.search(datum).group(0))
 
             elif datum[:3] == "GPA":
-                update_dict["gpa"] = float(re.search(r"\d+.\d+", datum).group(0))
+                update_dict["gpa"] = float(_float_regex.search(datum).group(0))
 
             else:
                 update_dict["comments"] = datum
@@ -64,6 +95,7 @@ def _clean_secondary_rows(row_data:list[str]) -> dict:
 
     return update_dict
 
+@lru_cache(maxsize=_cache_size)
 def _convert_date_to_iso(date_str:str) -> tuple[str, int]:
     """Convert date string to ISO format (YYYY-MM-DD). Returns a tuple of the date in
     ISO format and the year."""
@@ -73,6 +105,7 @@ def _convert_date_to_iso(date_str:str) -> tuple[str, int]:
     except ValueError:
         return (date_str, datetime.date.today().year)  # Return original string if conversion fails
     
+@lru_cache(maxsize=_cache_size)
 def _clean_applicant_status(full_status_str:str, year:int) -> str:
     """Clean applicant status string to a standardized format."""
     full_status_str = full_status_str.lower()
@@ -87,29 +120,203 @@ def _clean_applicant_status(full_status_str:str, year:int) -> str:
     else:
         status = "Other"
     
-    day_month_of_decision = re.search(r"\d{1,2} \w{3}", full_status_str).group(0) + f" {str(year)}"
+    day_month_of_decision = _day_month_regex.search(full_status_str).group(0) + f" {str(year)}"
     datetime_of_decision = datetime.datetime.strptime(day_month_of_decision, "%d %b %Y")
 
     return (status, datetime_of_decision.strftime("%Y-%m-%d"))
 
-def save_data(data:list[dict], filename:str) -> None:
-    """Save the cleaned data to a JSON file."""
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=4)
+def _file_mode(filename:str) -> int:
+    """Permission bits for a file written to filename: those of the existing file, or what
+    open() would create under the current umask if there is none."""
+    try:
+        return stat.S_IMODE(os.stat(filename).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+def save_data(data:list[dict] | list[ApplicantRecord], filename:str) -> None:
+    """Save the cleaned data to a JSON file. ApplicantRecords are written as dictionaries.
+    The data is written to a temporary file that then replaces filename, so an interrupted
+    save never leaves a truncated file behind. The file keeps the permissions of the one it
+    replaces (temporary files are created private to the owner)."""
+    directory = os.path.dirname(os.path.abspath(filename))
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=directory, suffix=".tmp",
+                                     delete=False) as f:
+        try:
+            json.dump(data, f, indent=4, default=to_json_default)
+            f.flush()
+            os.fsync(f.fileno())
+            os.chmod(f.name, _file_mode(filename))
+        except BaseException:
+            f.close()
+            os.remove(f.name)
+            raise
+    os.replace(f.name, filename)
     
     return None
 
-def load_data(filename:str) -> list[dict]:
-    """Load the cleaned data from a JSON file."""
+def load_data(filename:str, as_records:bool=False) -> list[dict] | list[ApplicantRecord]:
+    """Load the cleaned data from a JSON file. With as_records, each result is loaded as a
+    compact ApplicantRecord instead of a dictionary."""
+    object_hook = ApplicantRecord.from_dict if as_records else None
     with open(filename, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+        data = json.load(f, object_hook=object_hook)
     
     return data
 
+def load_known_urls(filename:str) -> set[str]:
+    """Load the set of survey URLs (url_link) already stored in a cleaned JSON file, for use
+    as scrape_data's known_urls. A missing file means nothing is known yet."""
+    try:
+        data = load_data(filename)
+    except FileNotFoundError:
+        return set()
+
+    return {applicant["url_link"] for applicant in data}
+
+def _clean_result(result:list[str], url:str) -> dict:
+    """Build a dictionary with standardized keys from one scraped result. Raises IndexError
+    if the result is missing columns, and AttributeError if the decision has no date."""
+    result_dict = _empty_result.copy()
+    result_dict["university"] = result[0]
+    result_dict["program_name"], result_dict["program_level"] = _separate_program_name_from_level(result[1])
+    result_dict["date_of_information_added"], year = _convert_date_to_iso(result[2])
+    result_dict["applicant_status"] = _clean_applicant_status(result[3], year)
+    result_dict["url_link"] = survey_url(url, result[4])
+    result_dict["program_start_semester"] = result[6]
+    result_dict["nationality"] = result[7]
+
+    # If GRE, GPA, or comments are present, update dictionary, else keep None
+    if len(result) > 8:
+        result_dict.update(_clean_secondary_rows(result[8:]))
+
+    return result_dict
+
+def _clean_record(result:list[str], url:str) -> ApplicantRecord:
+    """Same as _clean_result, but returns a compact ApplicantRecord."""
+    return ApplicantRecord.from_dict(_clean_result(result, url))
+
+def iter_clean_rows(results:Iterable[list[str]], url:str, as_records:bool=False,
+                    report:RunReport=None) -> Iterator[dict] | Iterator[ApplicantRecord]:
+    """Clean scraped results one at a time, yielding a dictionary (or an ApplicantRecord with
+    as_records) per valid result. Cleaned and dropped results are counted in report if given."""
+    clean_result = _clean_record if as_records else _clean_result
+    for result in results:
+        try:
+            cleaned_result = clean_result(result, url)
+        except IndexError as e:
+            # Improperly formatted row, potentially missing data. Ignore
+            if report:
+                report.count("rows_dropped_index_error")
+        except AttributeError as e:
+            # Decision without a date. Ignore
+            if report:
+                report.count("rows_dropped_attribute_error")
+        else:
+            if report:
+                report.count("rows_cleaned")
+            yield cleaned_result
+
+def _clean_chunk(results:list[list[str]], url:str) -> tuple[list[tuple], int, int]:
+    """Clean one chunk of scraped results in a worker process. Returns each cleaned result as a
+    tuple of field values in _fields order, and the numbers of results skipped for missing
+    columns (IndexError) and for decisions without a date (AttributeError). Kept at module
+    level so it can run in a process pool."""
+    cleaned_values = []
+    n_index_errors = 0
+    n_attribute_errors = 0
+    for result in results:
+        try:
+            cleaned_values.append(_field_values(_clean_result(result, url)))
+        except IndexError as e:
+            n_index_errors += 1
+        except AttributeError as e:
+            n_attribute_errors += 1
+
+    return cleaned_values, n_index_errors, n_attribute_errors
+
+def _chunked(results:Iterable[list[str]], chunk_bytes:int) -> Iterator[list[list[str]]]:
+    """Split results into lists of about chunk_bytes characters of raw text each, so every
+    chunk carries a similar amount of work whatever the length of its comments."""
+    chunk = []
+    n_bytes = 0
+    for result in results:
+        chunk.append(result)
+        n_bytes += sum(map(len, result))
+        if n_bytes >= chunk_bytes:
+            yield chunk
+            chunk = []
+            n_bytes = 0
+    if chunk:
+        yield chunk
+
+def clean_rows(results:Iterable[list[str]], url:str, workers:int=1, chunk_bytes:int=1_000_000,
+               as_records:bool=False, report:RunReport=None) -> tuple[list[dict], int]:
+    """Clean scraped results, optionally in parallel. With workers above 1, results are split
+    into chunks of about chunk_bytes of raw text and cleaned on a pool of that many processes.
+    Only pays off on large batches with that many idle cores, see benchmarks/bench_clean.py.
+    Output order matches input order either way. Returns the cleaned dictionaries
+    (ApplicantRecords with as_records) and the total number of skipped results across all
+    workers. With a report, cleaning is timed as the "clean" stage and cleaned / dropped rows
+    are counted."""
+    cleaned_results = []
+    n_index_errors = 0
+    n_attribute_errors = 0
+    with report.stage("clean") if report else nullcontext():
+        if workers <= 1:
+            clean_result = _clean_record if as_records else _clean_result
+            for result in results:
+                try:
+                    cleaned_results.append(clean_result(result, url))
+                except IndexError as e:
+                    n_index_errors += 1
+                except AttributeError as e:
+                    n_attribute_errors += 1
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for chunk_values, chunk_index_errors, chunk_attribute_errors in executor.map(
+                        _clean_chunk, _chunked(results, chunk_bytes), repeat(url)):
+                    if as_records:
+                        cleaned_results.extend(ApplicantRecord(*values) for values in chunk_values)
+                    else:
+                        cleaned_results.extend(dict(zip(_fields, values))
+                                               for values in chunk_values)
+                    n_index_errors += chunk_index_errors
+                    n_attribute_errors += chunk_attribute_errors
+
+    if report:
+        report.count("rows_cleaned", len(cleaned_results))
+        report.count("rows_dropped_index_error", n_index_errors)
+        report.count("rows_dropped_attribute_error", n_attribute_errors)
+
+    return cleaned_results, n_index_errors + n_attribute_errors
+
+def iter_clean_data(agent:str, url:str, paths:list[str], as_records:bool=False,
+                    report:RunReport=None, **kwargs) -> Iterator[dict]:
+    """Streaming version of clean_data. Yields cleaned dictionaries (or ApplicantRecords with
+    as_records) while the crawl is still running, so memory stays flat however many pages are
+    crawled. Accepts the same keyword arguments as scrape_data."""
+    rows = iter_survey_rows(agent, url, paths, report=report, **kwargs)
+    return iter_clean_rows(rows, url, as_records, report)
+
 def clean_data(agent:str, url:str, paths:list[str], min_results:int=10000, max_pages_to_crawl:int=10000,
-               starting_page:int=1) -> list[dict]:
-    """Clean data scraped from the provided URL and paths, returning a list of dictionaries."""
-    
+               starting_page:int=1, max_workers:int=1, checkpoint_path:str=None,
+               resume:bool=False, parser:str="html.parser", cache:ResponseCache=None,
+               parse_workers:int=0, session:CrawlSession=None,
+               known_urls:Container[str]=None, clean_workers:int=1,
+               chunk_bytes:int=1_000_000, archive:RawArchive=None, as_records:bool=False,
+               report:RunReport=None) -> list[dict] | list[ApplicantRecord]:
+    """Clean data scraped from the provided URL and paths, returning a list of dictionaries.
+    checkpoint_path and resume are passed to scrape_data to make long crawls resumable,
+    parser selects the HTML parser backend, cache serves unchanged pages from disk,
+    parse_workers parses pages on a process pool and session reuses a CrawlSession.
+    known_urls makes the crawl incremental, returning only surveys not already stored.
+    clean_workers and chunk_bytes are passed to clean_rows, and archive stores the raw rows
+    for offline re-cleaning (see reclean.py). With as_records, results are returned as
+    compact ApplicantRecords instead of dictionaries. report collects per-stage timers and
+    counters for the scrape and clean steps."""
+
     # Scrape data, separate into column titles and results
     parsed_data = scrape_data(
         agent=agent,
@@ -117,42 +324,129 @@ def clean_data(agent:str, url:str, paths:list[str], min_results:int=10000, max_p
         paths=paths,
         min_results=min_results,
         max_pages_to_crawl=max_pages_to_crawl,
-        starting_page=starting_page
+        starting_page=starting_page,
+        max_workers=max_workers,
+        checkpoint_path=checkpoint_path,
+        resume=resume,
+        parser=parser,
+        cache=cache,
+        parse_workers=parse_workers,
+        session=session,
+        known_urls=known_urls,
+        archive=archive,
+        report=report
     )
     column_titles, results = parsed_data
 
     # Build a dictionary for each result with standardized keys
-    cleaned_results = []
+    cleaned_results, n_skipped = clean_rows(results, url, workers=clean_workers,
+                                            chunk_bytes=chunk_bytes, as_records=as_records,
+                                            report=report)
+    if n_skipped:
+        print(f"Skipped {n_skipped} improperly formatted results")
+
+    return cleaned_results
+
+def merge_rows(existing:list[dict] | list[ApplicantRecord], results:Iterable[list[str]], url:str,
+               workers:int=1, chunk_bytes:int=1_000_000, as_records:bool=False,
+               report:RunReport=None) -> tuple[list, int, int, int]:
+    """Merge scraped results into previously cleaned data, indexed by url_link. Only surveys
+    that are not in existing are fully cleaned, and they are placed ahead of it in scraped
+    order (newest first, like the site). For stored surveys only the status is derived from the
+    row, and the stored result is re-cleaned if the status changed. An improperly formatted
+    row for a stored survey is skipped and counted like any other, leaving the stored result
+    as it was. Returns the merged list and the numbers of new, updated and skipped results."""
+    index = {applicant["url_link"]: i for i, applicant in enumerate(existing)}
+    new_results = []
+    changed_results = {}
+    seen_urls = set()
     for result in results:
         try:
-            result_dict = {k:None for k in _categories}
-            result_dict["university"] = result[0]
-            result_dict["program_name"], result_dict["program_level"] = _separate_program_name_from_level(result[1])
-            result_dict["date_of_information_added"], year = _convert_date_to_iso(result[2])
-            result_dict["applicant_status"] = _clean_applicant_status(result[3], year)
-            result_dict["url_link"] = f"{url}{result[4][1:]}"  # Remove leading slash
-            result_dict["program_start_semester"] = result[6]
-            result_dict["nationality"] = result[7]
-
-            # If GRE, GPA, or comments are present, update dictionary, else keep None
-            if len(result) > 8:
-                result_dict.update(_clean_secondary_rows(result[8:]))
-            
-            cleaned_results.append(result_dict)
+            result_url = survey_url(url, result[4])
+            position = index.get(result_url)
+            if position is not None:
+                _, year = _convert_date_to_iso(result[2])
+                status = _clean_applicant_status(result[3], year)
+        except (IndexError, AttributeError) as e:
+            # Left for clean_rows to count as improperly formatted
+            new_results.append(result)
+            continue
 
-        except IndexError as e:
-            # Improperly formatted row, potentially missing data. Ignore
+        # Results shift across page boundaries while crawling, so a survey can appear twice
+        if result_url in seen_urls:
             continue
-    
-    return cleaned_results
+        seen_urls.add(result_url)
+
+        if position is None:
+            new_results.append(result)
+        elif tuple(existing[position]["applicant_status"] or ()) != status:
+            changed_results[position] = result
+
+    merged, n_skipped = clean_rows(new_results, url, workers=workers, chunk_bytes=chunk_bytes,
+                                   as_records=as_records, report=report)
+    n_new = len(merged)
+
+    clean_result = _clean_record if as_records else _clean_result
+    n_updated = 0
+    for position, result in changed_results.items():
+        try:
+            existing[position] = clean_result(result, url)
+        except IndexError as e:
+            # Improperly formatted row, keep the stored result
+            n_skipped += 1
+            if report:
+                report.count("rows_dropped_index_error")
+        except AttributeError as e:
+            n_skipped += 1
+            if report:
+                report.count("rows_dropped_attribute_error")
+        else:
+            n_updated += 1
+    if report:
+        report.count("rows_updated", n_updated)
+
+    merged.extend(existing)
+    return merged, n_new, n_updated, n_skipped
+
+def update_data(filename:str, agent:str, url:str, paths:list[str], clean_workers:int=1,
+                chunk_bytes:int=1_000_000, as_records:bool=False, report:RunReport=None,
+                **kwargs) -> list[dict] | list[ApplicantRecord]:
+    """Incremental version of clean_data. Loads the cleaned results already saved in filename
+    (if any), scrapes with scrape_data's keyword arguments, and merges the results with
+    merge_rows, so only new surveys are cleaned. The merged data is saved back to filename
+    and returned. Use max_pages_to_crawl to limit a nightly run to the recent pages."""
+    try:
+        existing = load_data(filename, as_records=as_records)
+    except FileNotFoundError:
+        existing = []
+
+    column_titles, results = scrape_data(agent, url, paths, report=report, **kwargs)
+    merged, n_new, n_updated, n_skipped = merge_rows(existing, results, url, workers=clean_workers,
+                                                     chunk_bytes=chunk_bytes,
+                                                     as_records=as_records, report=report)
+    if n_skipped:
+        print(f"Skipped {n_skipped} improperly formatted results")
+    print(f"{n_new} new and {n_updated} updated results, {len(merged)} in total")
+
+    with report.stage("save") if report else nullcontext():
+        save_data(merged, filename)
+    return merged
 
 if __name__ == "__main__":
-    cleaned_data = clean_data(
-        agent="rob",
-        url="https://www.thegradcafe.com/survey/",
-        paths=["/", "/survey/"],
-        min_results=11000,
-        max_pages_to_crawl=5000
-    )
+    with RawArchive("module_2/raw_archive") as raw_archive, RunReport("clean") as run_report:
+        update_data(
+            "module_2/applicant_data.json",
+            agent="rob",
+            url="https://www.thegradcafe.com/survey/",
+            paths=["/", "/survey/"],
+            min_results=11000,
+            max_pages_to_crawl=5000,
+            max_workers=4,
+            parser="lxml",
+            cache=ResponseCache("module_2/http_cache"),
+            archive=raw_archive,
+            as_records=True,
+            report=run_report
+        )
 
-    save_data(cleaned_data, "module_2/applicant_data.json")
+    run_report.save_json("module_2/run_report.json")
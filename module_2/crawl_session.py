@@ -0,0 +1,111 @@
+import socket
+import threading
+import time
+from urllib import robotparser
+from urllib.parse import urljoin, urlsplit
+
+import urllib3
+from urllib3.connection import HTTPConnection
+
+class CrawlSession:
+    """Reusable crawl state shared across scrape_data / clean_data calls.
+
+    The session owns a single urllib3 connection pool, so TCP/TLS connections stay open
+    between crawls. It also caches each host's robots.txt for robots_ttl seconds and paces
+    requests to a host by that robots.txt's Crawl-delay for the session's user agent.
+    """
+
+    def __init__(self, agent:str, max_connections:int=10, robots_ttl:float=60 * 60,
+                 timeout:float=30.0, retries:int=3):
+        self.agent = agent
+        self.robots_ttl = robots_ttl
+
+        # Keep connections alive at the TCP level too, and retry transient failures with backoff
+        socket_options = HTTPConnection.default_socket_options + [
+            (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        ]
+        self.http = urllib3.PoolManager(
+            num_pools=4,
+            maxsize=max_connections,
+            block=True,  # Wait for a pooled connection rather than opening throwaway ones
+            headers={"User-Agent": agent},
+            timeout=urllib3.Timeout(connect=10.0, read=timeout),
+            retries=urllib3.Retry(total=retries, backoff_factor=0.5,
+                                  status_forcelist=(429, 500, 502, 503, 504)),
+            socket_options=socket_options
+        )
+
+        self._lock = threading.Lock()
+        self._robots = {}  # host -> (RobotFileParser, fetched_at)
+        self._next_request_at = {}  # host -> earliest time.monotonic() for the next request
+
+    def robots(self, url:str) -> robotparser.RobotFileParser:
+        """Return the parsed robots.txt for url's host, fetching it if it is not cached or
+        older than robots_ttl."""
+        host = urlsplit(url).netloc
+        with self._lock:
+            cached = self._robots.get(host)
+        if cached and time.monotonic() - cached[1] < self.robots_ttl:
+            return cached[0]
+
+        robots_url = urljoin(url, "/robots.txt")
+        parser = robotparser.RobotFileParser(robots_url)
+        response = self.http.request('GET', robots_url, retries=False)
+
+        # Same rules as RobotFileParser.read()
+        if response.status in (401, 403):
+            parser.disallow_all = True
+        elif 400 <= response.status < 500:
+            parser.allow_all = True
+        else:
+            parser.parse(response.data.decode("utf-8", errors="replace").splitlines())
+
+        with self._lock:
+            self._robots[host] = (parser, time.monotonic())
+
+        return parser
+
+    def can_fetch(self, url:str, path:str) -> bool:
+        """Check whether robots.txt for url's host allows this session's agent to fetch path."""
+        return self.robots(url).can_fetch(self.agent, path)
+
+    def crawl_delay(self, url:str) -> float:
+        """Return the robots.txt Crawl-delay (or Request-rate interval) for url's host, or 0."""
+        parser = self.robots(url)
+        delay = parser.crawl_delay(self.agent)
+        if delay is None:
+            rate = parser.request_rate(self.agent)
+            delay = rate.seconds / rate.requests if rate else 0
+        return float(delay)
+
+    def wait(self, url:str) -> None:
+        """Block until the next request to url's host is allowed by its crawl delay. Safe to
+        call from several threads; requests are spaced out in the order they arrive."""
+        delay = self.crawl_delay(url)
+        if not delay:
+            return None
+
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            request_at = max(now, self._next_request_at.get(host, now))
+            self._next_request_at[host] = request_at + delay
+
+        time.sleep(request_at - now)
+        return None
+
+    def request(self, method:str, url:str, **kwargs) -> urllib3.BaseHTTPResponse:
+        """Make a paced request through the shared connection pool. Takes the same arguments
+        as urllib3.PoolManager.request."""
+        self.wait(url)
+        return self.http.request(method, url, **kwargs)
+
+    def close(self) -> None:
+        """Close every pooled connection."""
+        self.http.clear()
+
+    def __enter__(self) -> "CrawlSession":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
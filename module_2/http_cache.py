@@ -0,0 +1,143 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+class ResponseCache:
+    """On-disk cache of HTTP response bodies keyed by URL.
+
+    Bodies are stored gzip-compressed next to a small JSON metadata file holding the response's
+    ETag and Last-Modified validators. Later requests for a cached URL send If-None-Match /
+    If-Modified-Since so unchanged pages come back as a bodiless 304. Entries that have not
+    been validated within ttl seconds are expired, and the least recently validated entries are
+    evicted once the cache grows past max_size bytes.
+    """
+
+    def __init__(self, directory:str, ttl:float=7 * 24 * 60 * 60, max_size:int=512 * 1024 * 1024):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, url:str) -> tuple[str, str]:
+        """Return the body and metadata file paths for a URL."""
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.directory, key)
+        return f"{base}.gz", f"{base}.json"
+
+    def _write_atomic(self, path:str, data:bytes) -> None:
+        """Write data to path via a temporary file so readers never see a partial file."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _read_meta(self, url:str) -> dict | None:
+        """Return the metadata for a cached, unexpired URL, or None."""
+        _, meta_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+        if time.time() - meta["validated_at"] > self.ttl:
+            return None
+        return meta
+
+    def conditional_headers(self, url:str) -> dict[str, str]:
+        """Return If-None-Match / If-Modified-Since headers for a cached URL."""
+        meta = self._read_meta(url)
+        headers = {}
+        if meta:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        return headers
+
+    def get(self, url:str) -> bytes | None:
+        """Return the cached body for a URL, or None if it is missing or expired."""
+        if self._read_meta(url) is None:
+            return None
+
+        body_path, _ = self._paths(url)
+        try:
+            with gzip.open(body_path, 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, url:str, body:bytes, headers) -> None:
+        """Store a response body along with its ETag / Last-Modified validators."""
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        # Without a validator the server can never answer 304, so caching would not help
+        if not etag and not last_modified:
+            return None
+
+        body_path, meta_path = self._paths(url)
+        self._write_atomic(body_path, gzip.compress(body))
+        meta = {"url": url, "etag": etag, "last_modified": last_modified, "validated_at": time.time()}
+        self._write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+
+        return None
+
+    def touch(self, url:str) -> None:
+        """Mark a cached URL as freshly validated, e.g. after a 304 response."""
+        _, meta_path = self._paths(url)
+        meta = self._read_meta(url)
+        if meta:
+            meta["validated_at"] = time.time()
+            self._write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+
+        return None
+
+    def evict(self) -> int:
+        """Remove expired entries, then the least recently validated entries until the cache
+        fits in max_size bytes. Returns the number of entries removed."""
+        entries = []
+        now = time.time()
+        n_removed = 0
+
+        for filename in os.listdir(self.directory):
+            if not filename.endswith(".json"):
+                continue
+            meta_path = os.path.join(self.directory, filename)
+            body_path = meta_path[:-len(".json")] + ".gz"
+            try:
+                with open(meta_path, 'r', encoding='utf-8') as f:
+                    validated_at = json.load(f)["validated_at"]
+                size = os.path.getsize(body_path)
+            except (OSError, json.JSONDecodeError, KeyError):
+                validated_at, size = 0, 0
+
+            # Expired (or unreadable) entries go first
+            if now - validated_at > self.ttl:
+                self._remove(body_path, meta_path)
+                n_removed += 1
+            else:
+                entries.append((validated_at, size, body_path, meta_path))
+
+        # Oldest entries go until the cache fits
+        total_size = sum(entry[1] for entry in entries)
+        for _, size, body_path, meta_path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            self._remove(body_path, meta_path)
+            total_size -= size
+            n_removed += 1
+
+        return n_removed
+
+    @staticmethod
+    def _remove(*paths:str) -> None:
+        """Delete files, ignoring any that are already gone."""
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
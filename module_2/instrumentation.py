@@ -0,0 +1,151 @@
+"""
+Per-stage instrumentation for scrape, clean and load runs.
+
+A RunReport is passed to scrape_data, clean_data and friends through their report argument.
+It collects wall-clock timers for coarse stages (scrape, clean), busy time for per-page work
+(fetch, parse), counters (pages fetched, bytes, rows parsed, rows dropped, ...) and, with
+trace_memory, tracemalloc peaks for the run and each stage. The report is saved as JSON, or
+as Prometheus text for a node exporter textfile collector.
+
+Usage:
+    with RunReport("nightly", trace_memory=True) as report:
+        cleaned_data = clean_data(agent, url, paths, report=report)
+    report.save_json("module_2/run_report.json")
+    report.save_prometheus("module_2/run_report.prom")
+"""
+
+import datetime
+import json
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+
+class RunReport:
+    """Timers, counters and peak memory for one pipeline run. Safe to update from the fetch
+    threads."""
+
+    def __init__(self, name:str="pipeline", trace_memory:bool=False):
+        self.name = name
+        self.trace_memory = trace_memory
+        self.started_at = None
+        self.duration = None
+        self.timings = defaultdict(float)
+        self.counters = defaultdict(int)
+        self.peak_memory = None
+        self.stage_peak_memory = {}
+        self._start = None
+        self._owns_tracing = False
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Start the run clock, and tracemalloc if trace_memory is set."""
+        self.started_at = datetime.datetime.now(datetime.timezone.utc)
+        self._start = time.perf_counter()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracing = True
+
+    def finish(self) -> None:
+        """Record the run duration and final memory peak, stopping tracemalloc if it was
+        started by this report."""
+        if self._start is not None:
+            self.duration = time.perf_counter() - self._start
+        self.sample_memory()
+        if self._owns_tracing:
+            tracemalloc.stop()
+            self._owns_tracing = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.finish()
+
+    def count(self, name:str, n:int=1) -> None:
+        """Add n to a counter."""
+        with self._lock:
+            self.counters[name] += n
+
+    def add_time(self, name:str, seconds:float) -> None:
+        """Add seconds to a stage timer. Used for work done a piece at a time (e.g. per page),
+        where the timer sums busy time rather than wall-clock time."""
+        with self._lock:
+            self.timings[name] += seconds
+
+    def sample_memory(self, stage:str=None) -> None:
+        """Fold the current tracemalloc peak into the run peak (and the stage's peak)."""
+        if not tracemalloc.is_tracing():
+            return
+        _, peak = tracemalloc.get_traced_memory()
+        self.peak_memory = max(self.peak_memory or 0, peak)
+        if stage:
+            self.stage_peak_memory[stage] = max(self.stage_peak_memory.get(stage, 0), peak)
+
+    @contextmanager
+    def stage(self, name:str):
+        """Time a block as a stage, and record its memory peak when tracing. Stages should
+        not be nested, since each one resets the tracemalloc peak."""
+        if tracemalloc.is_tracing():
+            self.sample_memory()
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+            self.sample_memory(name)
+
+    def to_dict(self) -> dict:
+        """Return the report as a JSON-serializable dictionary."""
+        stages = {}
+        for name, seconds in self.timings.items():
+            stages[name] = {"seconds": round(seconds, 6)}
+            if name in self.stage_peak_memory:
+                stages[name]["peak_memory_bytes"] = self.stage_peak_memory[name]
+
+        return {
+            "name": self.name,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "duration_seconds": round(self.duration, 6) if self.duration is not None else None,
+            "stages": stages,
+            "counters": dict(self.counters),
+            "peak_memory_bytes": self.peak_memory
+        }
+
+    def save_json(self, filename:str) -> None:
+        """Save the report as a JSON file."""
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=4)
+
+    def to_prometheus(self, prefix:str="gradcafe") -> str:
+        """Return the report in the Prometheus text exposition format, labelled by run name."""
+        run_label = self.name.replace("\\", "\\\\").replace('"', '\\"')
+        lines = []
+
+        def metric(name:str, metric_type:str, samples:list[tuple[str, float]]) -> None:
+            lines.append(f"# TYPE {prefix}_{name} {metric_type}")
+            for labels, value in samples:
+                lines.append(f'{prefix}_{name}{{run="{run_label}"{labels}}} {value}')
+
+        if self.duration is not None:
+            metric("run_duration_seconds", "gauge", [("", round(self.duration, 6))])
+        if self.timings:
+            metric("stage_seconds", "gauge",
+                   [(f',stage="{name}"', round(seconds, 6)) for name, seconds in self.timings.items()])
+        if self.stage_peak_memory:
+            metric("stage_peak_memory_bytes", "gauge",
+                   [(f',stage="{name}"', peak) for name, peak in self.stage_peak_memory.items()])
+        if self.peak_memory is not None:
+            metric("peak_memory_bytes", "gauge", [("", self.peak_memory)])
+        for name, value in sorted(self.counters.items()):
+            metric(f"{name}_total", "counter", [("", value)])
+
+        return "\n".join(lines) + "\n"
+
+    def save_prometheus(self, filename:str, prefix:str="gradcafe") -> None:
+        """Save the report as a Prometheus text file."""
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus(prefix))
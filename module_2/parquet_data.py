@@ -0,0 +1,115 @@
+"""
+Columnar storage for the cleaned applicant dataset.
+
+save_parquet_data writes cleaned results as a Parquet dataset partitioned by
+program_start_semester (one directory per term), with typed numeric columns. The reader
+pushes column projection and row filters down to the files, so a query for one term or a
+couple of columns only reads those parts of the dataset.
+
+Usage:
+    save_parquet_data(cleaned_data, "module_2/applicant_data")
+    fall_2024 = load_parquet_data("module_2/applicant_data", semesters=["Fall 2024"])
+    gpas = load_parquet_data("module_2/applicant_data", columns=["gpa", "applicant_status"])
+"""
+
+import datetime
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+_PARTITION_COLUMN = "program_start_semester"
+
+# applicant_status is split into status and decision_date so both can be filtered on
+_schema = pa.schema([
+    ("university", pa.string()),
+    ("program_name", pa.string()),
+    ("program_level", pa.string()),
+    ("applicant_status", pa.string()),
+    ("decision_date", pa.date32()),
+    ("date_of_information_added", pa.string()),  # Unparseable dates are kept as-is
+    ("url_link", pa.string()),
+    ("program_start_semester", pa.string()),
+    ("nationality", pa.string()),
+    ("gre_score", pa.int16()),
+    ("gre_v_score", pa.int16()),
+    ("gre_aw_score", pa.float64()),
+    ("gpa", pa.float64()),
+    ("comments", pa.string()),
+])
+
+_partitioning = ds.partitioning(pa.schema([(_PARTITION_COLUMN, pa.string())]), flavor="hive")
+
+def _to_table(data:list[dict]) -> pa.Table:
+    """Convert cleaned result dictionaries to an Arrow table with the dataset schema."""
+    columns = {name: [] for name in _schema.names}
+    for applicant in data:
+        status, decision_date = applicant["applicant_status"] or (None, None)
+        for name in _schema.names:
+            if name == "applicant_status":
+                columns[name].append(status)
+            elif name == "decision_date":
+                columns[name].append(datetime.date.fromisoformat(decision_date) if decision_date else None)
+            else:
+                columns[name].append(applicant.get(name))
+
+    return pa.Table.from_pydict(columns, schema=_schema)
+
+def save_parquet_data(data:list[dict], root_path:str) -> None:
+    """Save cleaned data as a Parquet dataset under root_path, one partition per
+    program_start_semester. Partitions present in data replace existing ones."""
+    ds.write_dataset(
+        _to_table(data),
+        root_path,
+        format="parquet",
+        partitioning=_partitioning,
+        existing_data_behavior="delete_matching"
+    )
+
+    return None
+
+def _build_filter(semesters:list[str]=None, filters:dict=None) -> pc.Expression:
+    """Combine a semester list and {column: value or list of values} filters into a single
+    dataset expression, or None if there is nothing to filter on."""
+    expression = None
+    conditions = dict(filters or {})
+    if semesters is not None:
+        conditions[_PARTITION_COLUMN] = list(semesters)
+
+    for column, value in conditions.items():
+        if isinstance(value, (list, tuple, set)):
+            condition = pc.field(column).isin(list(value))
+        else:
+            condition = pc.field(column) == value
+        expression = condition if expression is None else expression & condition
+
+    return expression
+
+def read_parquet_table(root_path:str, columns:list[str]=None, semesters:list[str]=None,
+                       filters:dict=None) -> pa.Table:
+    """Read the dataset as an Arrow table. Only the requested columns are read, semesters
+    prunes partitions, and filters ({column: value or list of values}) are pushed down to
+    the Parquet row groups."""
+    dataset = ds.dataset(root_path, format="parquet", partitioning=_partitioning)
+    return dataset.to_table(columns=columns, filter=_build_filter(semesters, filters))
+
+def load_parquet_data(root_path:str, columns:list[str]=None, semesters:list[str]=None,
+                      filters:dict=None) -> list[dict]:
+    """Load the dataset as cleaned result dictionaries, in the same shape as load_data.
+    applicant_status is rebuilt as [status, decision date] when requested. columns,
+    semesters and filters work as in read_parquet_table."""
+    read_columns = columns
+    if columns is not None and "applicant_status" in columns and "decision_date" not in columns:
+        read_columns = [*columns, "decision_date"]
+
+    table = read_parquet_table(root_path, read_columns, semesters, filters)
+
+    data = []
+    for applicant in table.to_pylist():
+        if "applicant_status" in applicant:
+            decision_date = applicant.pop("decision_date", None)
+            applicant["applicant_status"] = [applicant["applicant_status"],
+                                             decision_date.isoformat() if decision_date else None]
+        data.append(applicant)
+
+    return data
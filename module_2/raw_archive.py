@@ -0,0 +1,78 @@
+import glob
+import gzip
+import json
+import os
+import zlib
+
+class RawArchive:
+    """Append-only archive of raw scraped rows, decoupled from cleaning.
+
+    Every crawled page is written as one JSON line ({"page", "column_titles", "rows"}) to a
+    gzip-compressed segment file. Segment files are never rewritten. Each writer session starts
+    a new segment, and a new one is started every segment_max_pages pages. Pages are flushed as
+    they are written, so a crash loses at most the page in progress. Readers skip a truncated
+    tail.
+    """
+
+    def __init__(self, directory:str, segment_max_pages:int=1000):
+        self.directory = directory
+        self.segment_max_pages = segment_max_pages
+        self._file = None
+        self._pages_in_segment = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def segments(self) -> list[str]:
+        """Return the archive's segment files, oldest first."""
+        return sorted(glob.glob(os.path.join(self.directory, "segment_*.jsonl.gz")))
+
+    def _open_next_segment(self) -> None:
+        """Close the current segment and start writing a new one."""
+        self.close()
+        segments = self.segments()
+        last_index = int(os.path.basename(segments[-1])[len("segment_"):-len(".jsonl.gz")]) if segments else 0
+        path = os.path.join(self.directory, f"segment_{last_index + 1:06d}.jsonl.gz")
+        self._file = gzip.open(path, 'xt', encoding='utf-8')
+        self._pages_in_segment = 0
+
+    def append_page(self, page_number:int, column_titles:list[str], rows:list[list[str]]) -> None:
+        """Append one crawled page's raw rows to the archive."""
+        if self._file is None or self._pages_in_segment >= self.segment_max_pages:
+            self._open_next_segment()
+
+        record = {"page": page_number, "column_titles": column_titles, "rows": rows}
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        self._pages_in_segment += 1
+
+        return None
+
+    def iter_pages(self):
+        """Yield every archived (page_number, column_titles, rows) in the order written."""
+        for segment in self.segments():
+            try:
+                with gzip.open(segment, 'rt', encoding='utf-8') as f:
+                    for line in f:
+                        record = json.loads(line)
+                        yield record["page"], record["column_titles"], record["rows"]
+            except (EOFError, zlib.error, json.JSONDecodeError):
+                # Segment cut off mid-write, everything before the damage has been read
+                continue
+
+    def iter_rows(self):
+        """Yield every archived raw row in the order written."""
+        for _, _, rows in self.iter_pages():
+            yield from rows
+
+    def close(self) -> None:
+        """Finish the segment being written, if any."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+        return None
+
+    def __enter__(self) -> "RawArchive":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
@@ -0,0 +1,65 @@
+"""
+Rebuild cleaned applicant data from the raw archive without touching the network.
+
+Raw rows archived during crawls (see RawArchive) are deduplicated by survey URL, cleaned with
+the current cleaning rules and written out as JSON (like applicant_data.json) or as a Parquet
+dataset. Changing a cleaning rule then only needs a re-clean from disk, not a re-crawl.
+
+Usage (from the repository root):
+    python module_2/reclean.py module_2/raw_archive --output module_2/applicant_data.json
+    python module_2/reclean.py module_2/raw_archive --output module_2/applicant_data --format parquet --workers 4
+"""
+
+import argparse
+
+from clean import clean_rows, save_data
+from parquet_data import save_parquet_data
+from raw_archive import RawArchive
+from scraper import survey_url
+
+def archived_rows(archive:RawArchive, url:str) -> list[list[str]]:
+    """Collect the archive's raw rows, keeping one row per survey URL. A survey crawled more
+    than once keeps its most recently archived row, at the position it was first seen."""
+    rows_by_url = {}
+    unlinked_rows = []
+    for row in archive.iter_rows():
+        if len(row) < 5:
+            unlinked_rows.append(row)  # Can't dedupe without a link, let the cleaner skip it
+        else:
+            rows_by_url[survey_url(url, row[4])] = row
+
+    return list(rows_by_url.values()) + unlinked_rows
+
+def reclean_archive(archive_dir:str, url:str, output:str, output_format:str="json",
+                    workers:int=1, chunk_bytes:int=1_000_000) -> int:
+    """Clean every archived survey and write the result to output as "json" or "parquet".
+    Returns the number of cleaned results written."""
+    with RawArchive(archive_dir) as archive:
+        rows = archived_rows(archive, url)
+
+    cleaned_results, n_skipped = clean_rows(rows, url, workers=workers, chunk_bytes=chunk_bytes,
+                                            as_records=True)
+    print(f"Re-cleaned {len(cleaned_results)} results from {archive_dir} ({n_skipped} skipped)")
+
+    if output_format == "json":
+        save_data(cleaned_results, output)
+    elif output_format == "parquet":
+        save_parquet_data(cleaned_results, output)
+    else:
+        raise ValueError(f"Unknown output format '{output_format}', expected 'json' or 'parquet'")
+
+    return len(cleaned_results)
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    arg_parser.add_argument("archive_dir", help="RawArchive directory to re-clean")
+    arg_parser.add_argument("--url", default="https://www.thegradcafe.com/survey/")
+    arg_parser.add_argument("--output", required=True, help="JSON file or Parquet dataset directory")
+    arg_parser.add_argument("--format", default="json", choices=["json", "parquet"])
+    arg_parser.add_argument("--workers", type=int, default=1, help="Cleaning processes")
+    arg_parser.add_argument("--chunk-bytes", type=int, default=1_000_000,
+                            help="Raw text per cleaning chunk")
+    args = arg_parser.parse_args()
+
+    reclean_archive(args.archive_dir, args.url, args.output, args.format, args.workers,
+                    args.chunk_bytes)
@@ -0,0 +1,102 @@
+"""
+Compact record type for cleaned applicant results.
+
+A cleaned result as a dict carries a 13-key hash table per applicant. ApplicantRecord stores the
+same fields in __slots__ and interns the strings that repeat across applicants (university,
+program, level, nationality and term), so large datasets take a fraction of the memory.
+Records support item access with the dict keys, so code written for the dictionaries keeps
+working, and convert to and from dicts for JSON and other dict-based consumers.
+"""
+
+import sys
+
+# Field order used by to_dict, matching the order the categories are listed in clean.py
+_fields = (
+    "university",
+    "program_name",
+    "program_level",
+    "applicant_status",
+    "date_of_information_added",
+    "url_link",
+    "program_start_semester",
+    "nationality",
+    "gre_score",
+    "gre_v_score",
+    "gre_aw_score",
+    "gpa",
+    "comments"
+)
+
+class ApplicantRecord:
+    """One cleaned applicant result, with the same fields as the cleaned dictionaries."""
+
+    __slots__ = _fields
+
+    def __init__(self, university:str=None, program_name:str=None, program_level:str=None,
+                 applicant_status:tuple[str, str]=None, date_of_information_added:str=None,
+                 url_link:str=None, program_start_semester:str=None, nationality:str=None,
+                 gre_score:int=None, gre_v_score:int=None, gre_aw_score:float=None,
+                 gpa:float=None, comments:str=None):
+        # Low-cardinality strings are shared between applicants via sys.intern
+        self.university = _intern(university)
+        self.program_name = _intern(program_name)
+        self.program_level = _intern(program_level)
+        # JSON loads the status as a list. Stored as a tuple, which is smaller
+        self.applicant_status = tuple(applicant_status) if applicant_status is not None else None
+        self.date_of_information_added = date_of_information_added
+        self.url_link = url_link
+        self.program_start_semester = _intern(program_start_semester)
+        self.nationality = _intern(nationality)
+        self.gre_score = gre_score
+        self.gre_v_score = gre_v_score
+        self.gre_aw_score = gre_aw_score
+        self.gpa = gpa
+        self.comments = comments
+
+    @classmethod
+    def from_dict(cls, applicant:dict) -> "ApplicantRecord":
+        """Build a record from a cleaned result dictionary. Missing keys are left as None and
+        unknown keys are ignored."""
+        return cls(*(applicant.get(name) for name in _fields))
+
+    def to_dict(self) -> dict:
+        """Return the record as a cleaned result dictionary."""
+        return {name: getattr(self, name) for name in _fields}
+
+    def keys(self) -> tuple[str, ...]:
+        """Field names, in the same order as to_dict."""
+        return _fields
+
+    def get(self, name:str, default=None):
+        """Return a field by its dictionary key, or default if there is no such field."""
+        if name in _fields:
+            return getattr(self, name)
+        return default
+
+    def __getitem__(self, name:str):
+        if name not in _fields:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, ApplicantRecord):
+            return all(getattr(self, name) == getattr(other, name) for name in _fields)
+        return NotImplemented
+
+    def __reduce__(self):
+        # Rebuild through __init__ when unpickled (e.g. from a process pool) so strings are
+        # interned in the receiving process too
+        return (ApplicantRecord, tuple(getattr(self, name) for name in _fields))
+
+    def __repr__(self) -> str:
+        return f"ApplicantRecord(url_link={self.url_link!r}, university={self.university!r})"
+
+def _intern(value:str) -> str:
+    """Intern a string value, leaving None and other types unchanged."""
+    return sys.intern(value) if type(value) is str else value
+
+def to_json_default(value):
+    """json.dump default hook that writes ApplicantRecords as dictionaries."""
+    if isinstance(value, ApplicantRecord):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
@@ -1,16 +1,35 @@
-import urllib3
-from urllib.parse import urljoin
-from urllib import robotparser
-from bs4 import BeautifulSoup
-
-def _get_robots_txt(agent:str, url:str, paths:list[str]) -> dict[str, bool]:
-    """Fetches the robots.txt file for the given URL and checks if the provided
-    paths are allowed for the given user agent.
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import closing, nullcontext
+from typing import Container
+from bs4 import BeautifulSoup, SoupStrainer
+
+from crawl_session import CrawlSession
+from http_cache import ResponseCache
+from instrumentation import RunReport
+from raw_archive import RawArchive
+
+# Only the survey table is needed, so the "-table" backends skip building the rest of the page
+_TABLE_ONLY = SoupStrainer(["thead", "tbody"])
+
+# Parser backends: name -> (BeautifulSoup tree builder, parse_only filter).
+# "html.parser" is the reference backend and the default.
+_PARSER_BACKENDS = {
+    "html.parser": ("html.parser", None),
+    "html.parser-table": ("html.parser", _TABLE_ONLY),
+    "lxml": ("lxml", None),
+    "lxml-table": ("lxml", _TABLE_ONLY),
+}
+
+def _get_robots_txt(agent:str, url:str, paths:list[str],
+                    session:CrawlSession) -> dict[str, bool]:
+    """Checks if the provided paths are allowed for the given user agent by the
+    site's robots.txt, as fetched and cached by the session.
     """
-    # Create a robot parser and set the URL to robots.txt file
-    parser = robotparser.RobotFileParser(url)
-    parser.set_url(urljoin(url, "robots.txt"))
-    parser.read()
+    parser = session.robots(url)
 
     allowed_paths = {}
     for path in paths:
@@ -18,6 +37,11 @@ def _get_robots_txt(agent:str, url:str, paths:list[str]) -> dict[str, bool]:
 
     return allowed_paths
 
+def _make_soup(page_data:bytes, parser:str="html.parser") -> BeautifulSoup:
+    """Build a BeautifulSoup tree for a survey page with one of the _PARSER_BACKENDS."""
+    features, parse_only = _PARSER_BACKENDS[parser]
+    return BeautifulSoup(page_data, features, parse_only=parse_only)
+
 def _parse_column_titles(soup:BeautifulSoup) -> list[str]:
     """Extract column titles from the survey page."""
     column_titles = []
@@ -74,46 +98,348 @@ def _parse_rows(soup:BeautifulSoup) -> list[list[str]]:
     
     return results
 
-def scrape_data(agent:str, url:str, paths:list[str], min_results:int=10000, max_pages_to_crawl:int=10000,
-                starting_page:int=1) -> tuple[list, list[list[str]]]:
-    """Scrape survey data from the GradCafe website."""
+def survey_url(url:str, href:str) -> str:
+    """Build the full survey URL stored as url_link from a row's relative result link."""
+    return f"{url}{href[1:]}"  # Remove leading slash
+
+def _drop_known_rows(rows:list[list[str]], url:str, known_urls:Container[str]) -> list[list[str]]:
+    """Remove rows whose survey URL is already in known_urls. Rows too short to have a link
+    are kept so cleaning can decide what to do with them."""
+    return [row for row in rows if len(row) < 5 or survey_url(url, row[4]) not in known_urls]
+
+def _fetch_page(session:CrawlSession, page_url:str, cache:ResponseCache=None,
+                report:RunReport=None) -> bytes:
+    """Fetch a single survey page and return the raw response body. With a cache, the
+    request is made conditional and a 304 Not Modified is served from the cache. Fetch time
+    (including crawl-delay pacing), pages and bytes are added to report if given."""
+    start = time.perf_counter()
+    if cache is None:
+        page_data = session.request('GET', page_url).data
+    else:
+        page_data = _fetch_cached_page(session, page_url, cache, report)
+
+    if report:
+        report.add_time("fetch", time.perf_counter() - start)
+        report.count("pages_fetched")
+        report.count("bytes_fetched", len(page_data))
+
+    return page_data
+
+def _fetch_cached_page(session:CrawlSession, page_url:str, cache:ResponseCache,
+                       report:RunReport=None) -> bytes:
+    """Fetch a page with a conditional request, serving a 304 Not Modified from the cache."""
+    response = session.request('GET', page_url, headers=cache.conditional_headers(page_url))
+    if response.status == 304:
+        cached_body = cache.get(page_url)
+        if cached_body is not None:
+            cache.touch(page_url)
+            if report:
+                report.count("pages_not_modified")
+            return cached_body
+        # Entry vanished between the request and the read, fetch it in full
+        response = session.request('GET', page_url)
+
+    if response.status == 200:
+        cache.put(page_url, response.data, response.headers)
+
+    return response.data
+
+def _parse_page(page_data:bytes, parser:str="html.parser",
+                parse_titles:bool=True) -> tuple[list[str], list[list[str]]]:
+    """Parse the column titles (if parse_titles) and rows from a raw survey page. Kept at
+    module level so it can run in a process pool."""
+    soup = _make_soup(page_data, parser)
+    column_titles = _parse_column_titles(soup) if parse_titles else []
+    return column_titles, _parse_rows(soup)
+
+def _parse_page_timed(page_data:bytes, parser:str="html.parser") -> tuple[tuple, float]:
+    """Run _parse_page and return its result with the seconds it took, for pooled parsing."""
+    start = time.perf_counter()
+    return _parse_page(page_data, parser), time.perf_counter() - start
+
+def _load_checkpoint(checkpoint_path:str) -> tuple[list[str], list[list[str]], int, int]:
+    """Load a crawl checkpoint written by _append_checkpoint. Returns the column titles, the
+    rows parsed so far, the last completed page and the number of pages crawled. A truncated
+    final line (e.g. from a crash mid-write) is cut off so new pages append cleanly."""
+    column_titles = []
+    results = []
+    last_page = None
+    n_pages = 0
+    valid_bytes = 0
+
+    with open(checkpoint_path, 'r+b') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                break
+
+            if record["column_titles"]:
+                column_titles = record["column_titles"]
+            results.extend(record["rows"])
+            last_page = record["page"]
+            n_pages += 1
+            valid_bytes += len(line)
+
+        f.truncate(valid_bytes)
+
+    return column_titles, results, last_page, n_pages
+
+def _append_checkpoint(checkpoint_path:str, page_number:int, rows:list[list[str]],
+                       column_titles:list[str]) -> None:
+    """Append one completed page to the checkpoint file. Each page is a single JSON line,
+    flushed to disk before returning so a crash loses at most the page in progress."""
+    record = {"page": page_number, "column_titles": column_titles, "rows": rows}
+    with open(checkpoint_path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+    return None
+
+def _crawl_pages(session:CrawlSession, url:str, starting_page:int, max_pages_to_crawl:int,
+                 max_workers:int=1, cache:ResponseCache=None, report:RunReport=None):
+    """Fetch survey pages on a thread pool, keeping up to max_workers requests in flight.
+    Yields (page_number, future) tuples in page order; the future holds the page body or
+    the fetch error."""
+    last_page = starting_page + max_pages_to_crawl
+    next_page = starting_page
+    in_flight = deque()
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        while True:
+            # Top up the window of in-flight requests
+            while len(in_flight) < max_workers and next_page < last_page:
+                page_url = f"{url}?page={next_page}"
+                in_flight.append((next_page, executor.submit(_fetch_page, session, page_url, cache,
+                                                              report)))
+                next_page += 1
+
+            if not in_flight:
+                return
+
+            yield in_flight.popleft()
+    finally:
+        # Caller may stop early, don't wait on pages it will never read
+        for _, future in in_flight:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+def _parse_pages_in_pool(pages, parser:str, parse_workers:int, queue_size:int=None):
+    """Second pipeline stage: parse the pages fetched by _crawl_pages on a process pool.
+    Fetched page bytes are queued for parsing as they arrive, with at most queue_size pages
+    queued at once. Yields (page_number, future) tuples in page order; the future holds the
+    ((column_titles, rows), parse seconds) from _parse_page_timed or the fetch/parse error."""
+    queue_size = queue_size or 2 * parse_workers
+    queued = deque()
+
+    pool = ProcessPoolExecutor(max_workers=parse_workers)
+    try:
+        for page_number, fetch_future in pages:
+            try:
+                page_data = fetch_future.result()
+            except Exception as e:
+                # Pass the fetch error down the pipeline and stop fetching
+                failed_future = Future()
+                failed_future.set_exception(e)
+                queued.append((page_number, failed_future))
+                break
+
+            queued.append((page_number, pool.submit(_parse_page_timed, page_data, parser)))
+            if len(queued) >= queue_size:
+                yield queued.popleft()
+
+        while queued:
+            yield queued.popleft()
+    finally:
+        for _, future in queued:
+            future.cancel()
+        pool.shutdown(wait=True)
+
+def iter_survey_pages(agent:str, url:str, paths:list[str], min_results:int=10000,
+                      max_pages_to_crawl:int=10000, starting_page:int=1, max_workers:int=1,
+                      checkpoint_path:str=None, resume:bool=False, parser:str="html.parser",
+                      cache:ResponseCache=None, parse_workers:int=0,
+                      session:CrawlSession=None, known_urls:Container[str]=None,
+                      archive:RawArchive=None, report:RunReport=None,
+                      raise_errors:bool=False):
+    """Crawl survey pages and yield (page_number, column_titles, rows) for each page as soon
+    as it is parsed, in page order. column_titles is only filled in on the first page. Takes
+    the same arguments as scrape_data.
+
+    When resuming from a checkpoint, everything recorded in it is yielded first as a single
+    (last_page, column_titles, rows) tuple."""
+    if parser not in _PARSER_BACKENDS:
+        raise ValueError(f"Unknown parser backend '{parser}', expected one of {list(_PARSER_BACKENDS)}")
+
+    # Without a shared session, use a private one for this crawl
+    owns_session = session is None
+    if owns_session:
+        session = CrawlSession(agent, max_connections=max_workers)
+
     # Fetch robots.txt and check availabilty of paths
-    allowed_paths = _get_robots_txt(agent, url, paths)
+    allowed_paths = _get_robots_txt(agent, url, paths, session)
     for path in allowed_paths:
         if not allowed_paths[path]:
             print(f"Path {path} is not allowed for user agent '{agent}'")
 
-    results = []
-    page_number = starting_page
-    n_pages_crawled = 0
+    column_titles = []
     n_surveys = 0
+    n_pages_crawled = 0
+
+    # Pick up where a previous crawl left off, or start a fresh checkpoint
+    if checkpoint_path and resume and os.path.exists(checkpoint_path):
+        column_titles, checkpoint_rows, last_page, n_pages_crawled = _load_checkpoint(checkpoint_path)
+        n_surveys = len(checkpoint_rows)
+        if last_page is not None:
+            starting_page = last_page + 1
+            yield last_page, column_titles, checkpoint_rows
+        print(f"Resuming from checkpoint: {n_pages_crawled} pages, {n_surveys} results, next page {starting_page}")
+    elif checkpoint_path:
+        open(checkpoint_path, 'w', encoding='utf-8').close()
+
+    # Fetch on a thread pool, and optionally parse on a process pool as a second stage
+    remaining_pages = max_pages_to_crawl - n_pages_crawled
+    fetched_pages = _crawl_pages(session, url, starting_page, remaining_pages, max_workers, cache,
+                                 report)
+    if parse_workers:
+        pages = _parse_pages_in_pool(fetched_pages, parser, parse_workers)
+    else:
+        pages = fetched_pages
 
-    http = urllib3.PoolManager()
+    try:
+        with closing(fetched_pages), closing(pages):
+            for page_number, future in pages:
+                if n_surveys > min_results:
+                    break
 
-    while (n_surveys <= min_results) and (n_pages_crawled < max_pages_to_crawl):
-        # Construct the URL for the current page
-        page_url = f"{url}?page={page_number}"
+                page_url = f"{url}?page={page_number}"
 
-        if page_number % 10 == 0:
-            print(f"{n_surveys} / {min_results} results found, crawling page {page_number} / {max_pages_to_crawl} maximum...")
+                if page_number % 10 == 0:
+                    print(f"{n_surveys} / {min_results} results found, crawling page {page_number} / {max_pages_to_crawl} maximum...")
 
-        # Fetch the page content
-        try:
-            response = http.request('GET', page_url)
-            soup = BeautifulSoup(response.data, "html.parser")
-        except Exception as e:
-            print(f"Failed to fetch {page_url}: {e}")
-            break
+                # Wait for the page content, parsing it here unless the pool already has
+                try:
+                    if parse_workers:
+                        (page_column_titles, rows), parse_seconds = future.result()
+                    else:
+                        page_data = future.result()
+                        parse_start = time.perf_counter()
+                        page_column_titles, rows = _parse_page(page_data, parser,
+                                                               parse_titles=not column_titles)
+                        parse_seconds = time.perf_counter() - parse_start
+                except Exception as e:
+                    print(f"Failed to fetch {page_url}: {e}")
+                    if report:
+                        report.count("fetch_errors")
+                    if raise_errors:
+                        raise
+                    break
+
+                if report:
+                    report.add_time("parse", parse_seconds)
+                    report.count("pages_parsed")
+                    report.count("rows_parsed", len(rows))
+
+                # Column titles are only reported for the first page
+                if column_titles:
+                    page_column_titles = []
+                else:
+                    column_titles = page_column_titles
 
-        # Parse column titles and rows
-        if page_number == starting_page:
-            column_titles = _parse_column_titles(soup)
+                # Archive every parsed row, so cleaning can be redone without re-crawling
+                if archive:
+                    archive.append_page(page_number, column_titles, rows)
 
-        rows = _parse_rows(soup)
-        results.extend(rows)
+                # Incremental crawl: skip stored surveys, stop at the first fully known page
+                if known_urls is not None:
+                    new_rows = _drop_known_rows(rows, url, known_urls)
+                    if report:
+                        report.count("rows_known", len(rows) - len(new_rows))
+                    if rows and not new_rows:
+                        print(f"Page {page_number} only has known surveys, stopping incremental crawl")
+                        break
+                    rows = new_rows
+
+                if checkpoint_path:
+                    _append_checkpoint(checkpoint_path, page_number, rows, page_column_titles)
+
+                n_surveys += len(rows)
+                yield page_number, page_column_titles, rows
+    finally:
+        if cache:
+            cache.evict()
+        if owns_session:
+            session.close()
+
+def iter_survey_rows(agent:str, url:str, paths:list[str], **kwargs):
+    """Yield parsed survey rows one at a time as pages are crawled, so memory stays flat
+    however many pages are crawled. Accepts the same keyword arguments as scrape_data."""
+    for _, _, rows in iter_survey_pages(agent, url, paths, **kwargs):
+        yield from rows
+
+def scrape_data(agent:str, url:str, paths:list[str], min_results:int=10000, max_pages_to_crawl:int=10000,
+                starting_page:int=1, max_workers:int=1, checkpoint_path:str=None,
+                resume:bool=False, parser:str="html.parser", cache:ResponseCache=None,
+                parse_workers:int=0, session:CrawlSession=None,
+                known_urls:Container[str]=None, archive:RawArchive=None,
+                report:RunReport=None, raise_errors:bool=False) -> tuple[list, list[list[str]]]:
+    """Scrape survey data from the GradCafe website. Up to max_workers pages are fetched
+    concurrently, and results are always returned in page order.
+
+    If checkpoint_path is given, every completed page is appended to it. With resume=True an
+    existing checkpoint is loaded and the crawl continues after its last completed page
+    instead of at starting_page; otherwise the checkpoint is started fresh.
+
+    parser selects one of the _PARSER_BACKENDS used to parse each page. If a ResponseCache is
+    given, unchanged pages are served from it via conditional requests. With parse_workers
+    above 0, parsing runs on a pool of that many processes while pages are being fetched.
+
+    A CrawlSession can be passed to reuse its connection pool and cached robots.txt across
+    crawls; requests are then paced by robots.txt's Crawl-delay. Without one, a private
+    session sized to max_workers is used for this crawl.
+
+    known_urls turns on incremental crawling: rows whose survey URL (as built by survey_url)
+    is in known_urls are dropped, and the crawl stops at the first page made up entirely of
+    known surveys. Pass a set for cheap membership checks.
+
+    If a RawArchive is given, every parsed page (before known_urls filtering) is appended to it
+    so the data can be re-cleaned later without crawling again.
+
+    report collects fetch and parse timers and page / row counters, with the whole crawl timed
+    as the "scrape" stage (see instrumentation.RunReport).
+
+    A page that fails to fetch or parse ends the crawl early with the pages collected so far.
+    With raise_errors=True the error is raised instead, so callers that need every page (such
+    as shard crawls) can tell a partial crawl from a finished one. Pages completed before the
+    failure are still in the checkpoint."""
+    results = []
+    column_titles = []
 
-        n_surveys = len(results)
-        n_pages_crawled += 1
-        page_number += 1
+    pages = iter_survey_pages(
+        agent=agent,
+        url=url,
+        paths=paths,
+        min_results=min_results,
+        max_pages_to_crawl=max_pages_to_crawl,
+        starting_page=starting_page,
+        max_workers=max_workers,
+        checkpoint_path=checkpoint_path,
+        resume=resume,
+        parser=parser,
+        cache=cache,
+        parse_workers=parse_workers,
+        session=session,
+        known_urls=known_urls,
+        archive=archive,
+        report=report,
+        raise_errors=raise_errors
+    )
+    with report.stage("scrape") if report else nullcontext():
+        for _, page_column_titles, rows in pages:
+            if page_column_titles:
+                column_titles = page_column_titles
+            results.extend(rows)
 
     return column_titles, results
\ No newline at end of file
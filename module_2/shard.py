@@ -0,0 +1,178 @@
+"""
+Sharded crawling for full historical backfills.
+
+A page range is split into contiguous shards. Each shard is crawled by its own scrape_data call,
+in a separate process or on a separate host, and written to its own JSON file. merge_shards
+combines the shard files into one ordered dataset and dedupes by survey URL, because results
+shift across page boundaries as new surveys are posted during the crawl.
+
+Usage (from module_2/):
+    # Everything on one machine, 8 processes
+    python shard.py run --url https://www.thegradcafe.com/survey/ --start 1 --pages 5000 --shards 8 --output-dir shards/
+
+    # One shard per host, then merge the copied files
+    python shard.py crawl --url https://www.thegradcafe.com/survey/ --start 1 --pages 625 --output shards/shard_00001.json
+    python shard.py merge shards/shard_*.json --url https://www.thegradcafe.com/survey/ --output raw_results.json
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from scraper import scrape_data, survey_url
+
+def plan_shards(starting_page:int, n_pages:int, n_shards:int) -> list[tuple[int, int]]:
+    """Split n_pages pages beginning at starting_page into n_shards contiguous
+    (starting_page, n_pages) ranges of near-equal size."""
+    n_shards = max(1, min(n_shards, n_pages))
+    base, extra = divmod(n_pages, n_shards)
+
+    shards = []
+    page = starting_page
+    for shard_i in range(n_shards):
+        shard_pages = base + (1 if shard_i < extra else 0)
+        shards.append((page, shard_pages))
+        page += shard_pages
+
+    return shards
+
+def shard_filename(output_dir:str, starting_page:int) -> str:
+    """Name a shard's output file after its first page so files sort in page order."""
+    return os.path.join(output_dir, f"shard_{starting_page:06d}.json")
+
+def crawl_shard(agent:str, url:str, paths:list[str], starting_page:int, n_pages:int,
+                output:str, max_workers:int=1, parser:str="html.parser") -> int:
+    """Crawl exactly n_pages pages from starting_page and write them to output as
+    {"starting_page", "n_pages", "column_titles", "rows"}. A checkpoint next to the output
+    lets an interrupted shard resume. If a page fails, the error is raised and the checkpoint
+    is kept without writing output, so the shard is not mistaken for a finished one. Returns
+    the number of rows written."""
+    checkpoint_path = f"{output}.checkpoint.jsonl"
+    column_titles, rows = scrape_data(
+        agent=agent,
+        url=url,
+        paths=paths,
+        min_results=sys.maxsize,  # Shards stop on their page range only
+        max_pages_to_crawl=n_pages,
+        starting_page=starting_page,
+        max_workers=max_workers,
+        checkpoint_path=checkpoint_path,
+        resume=True,
+        parser=parser,
+        raise_errors=True
+    )
+
+    shard = {"starting_page": starting_page, "n_pages": n_pages, "column_titles": column_titles,
+             "rows": rows}
+    tmp_output = f"{output}.tmp"
+    with open(tmp_output, 'w', encoding='utf-8') as f:
+        json.dump(shard, f)
+    os.replace(tmp_output, output)
+    os.remove(checkpoint_path)
+
+    return len(rows)
+
+def merge_shards(filenames:list[str], url:str) -> tuple[list[str], list[list[str]]]:
+    """Merge shard files into one (column_titles, results) dataset in page order. A survey
+    that appears in more than one shard is kept once, at its first (newest) position."""
+    shards = []
+    for filename in filenames:
+        with open(filename, 'r', encoding='utf-8') as f:
+            shards.append(json.load(f))
+    shards.sort(key=lambda shard: shard["starting_page"])
+
+    column_titles = next((shard["column_titles"] for shard in shards if shard["column_titles"]), [])
+    results = []
+    seen_urls = set()
+    n_duplicates = 0
+
+    for shard in shards:
+        for row in shard["rows"]:
+            # Rows too short to carry a link can't be deduped, keep them for the cleaner
+            if len(row) >= 5:
+                row_url = survey_url(url, row[4])
+                if row_url in seen_urls:
+                    n_duplicates += 1
+                    continue
+                seen_urls.add(row_url)
+            results.append(row)
+
+    print(f"Merged {len(shards)} shards: {len(results)} results, {n_duplicates} duplicates dropped")
+
+    return column_titles, results
+
+def run_sharded_crawl(agent:str, url:str, paths:list[str], starting_page:int, n_pages:int,
+                      n_shards:int, output_dir:str, max_workers:int=1,
+                      parser:str="html.parser") -> tuple[list[str], list[list[str]]]:
+    """Crawl a page range as n_shards shards, one process each, then merge them. Shard
+    files are left in output_dir, so a failed run can be repeated and finished shards are
+    not crawled again. Raises RuntimeError after the other shards finish if any shard failed;
+    failed shards resume from their checkpoints on the next run."""
+    os.makedirs(output_dir, exist_ok=True)
+
+    filenames = []
+    failed_shards = []
+    with ProcessPoolExecutor(max_workers=n_shards) as executor:
+        futures = []
+        for shard_start, shard_pages in plan_shards(starting_page, n_pages, n_shards):
+            output = shard_filename(output_dir, shard_start)
+            filenames.append(output)
+            if os.path.exists(output):
+                continue
+            futures.append((output, executor.submit(crawl_shard, agent, url, paths, shard_start,
+                                                    shard_pages, output, max_workers, parser)))
+
+        for output, future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Shard {output} failed, rerun to resume it: {e}")
+                failed_shards.append(output)
+
+    if failed_shards:
+        raise RuntimeError(f"{len(failed_shards)} of {len(filenames)} shards failed: "
+                           f"{', '.join(failed_shards)}")
+
+    return merge_shards(filenames, url)
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Sharded GradCafe crawl and merge.")
+    subparsers = arg_parser.add_subparsers(dest="command", required=True)
+
+    for command in ("run", "crawl"):
+        sub = subparsers.add_parser(command)
+        sub.add_argument("--agent", default="rob")
+        sub.add_argument("--url", default="https://www.thegradcafe.com/survey/")
+        sub.add_argument("--start", type=int, default=1, help="First page to crawl")
+        sub.add_argument("--pages", type=int, required=True, help="Number of pages to crawl")
+        sub.add_argument("--max-workers", type=int, default=1, help="Concurrent fetches per shard")
+        sub.add_argument("--parser", default="html.parser")
+    subparsers.choices["run"].add_argument("--shards", type=int, required=True)
+    subparsers.choices["run"].add_argument("--output-dir", required=True)
+    subparsers.choices["run"].add_argument("--output", help="Write the merged results here")
+    subparsers.choices["crawl"].add_argument("--output", required=True, help="Shard file to write")
+
+    merge = subparsers.add_parser("merge")
+    merge.add_argument("shards", nargs="+", help="Shard files to merge")
+    merge.add_argument("--url", default="https://www.thegradcafe.com/survey/")
+    merge.add_argument("--output", required=True, help="Write the merged results here")
+
+    args = arg_parser.parse_args()
+    PATHS = ["/", "/survey/"]
+
+    if args.command == "crawl":
+        n_rows = crawl_shard(args.agent, args.url, PATHS, args.start, args.pages, args.output,
+                             args.max_workers, args.parser)
+        print(f"Wrote {n_rows} results to {args.output}")
+    else:
+        if args.command == "run":
+            merged = run_sharded_crawl(args.agent, args.url, PATHS, args.start, args.pages,
+                                       args.shards, args.output_dir, args.max_workers, args.parser)
+        else:
+            merged = merge_shards(args.shards, args.url)
+
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump({"column_titles": merged[0], "rows": merged[1]}, f)
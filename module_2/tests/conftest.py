@@ -0,0 +1,9 @@
+import pytest
+
+from benchmarks.fixture_server import SurveyFixtureServer
+
+@pytest.fixture
+def survey_server():
+    """Local stand-in for TheGradCafe with 6 pages of 5 results each."""
+    with SurveyFixtureServer(n_pages=6, rows_per_page=5) as server:
+        yield server
@@ -0,0 +1,157 @@
+import os
+import stat
+
+import pytest
+
+import clean
+import scraper
+from benchmarks.fixture_server import make_survey_page
+from instrumentation import RunReport
+
+URL = "https://www.thegradcafe.com/survey/"
+
+@pytest.fixture
+def scraped_rows():
+    """Parsed rows from two synthetic survey pages."""
+    rows = []
+    for page_number in (1, 2):
+        rows.extend(scraper._parse_page(make_survey_page(page_number, rows_per_page=10))[1])
+    return rows
+
+def test_merge_rows_adds_new_results_first(scraped_rows):
+    existing, _ = clean.clean_rows(scraped_rows[10:], URL)
+    merged, n_new, n_updated, n_skipped = clean.merge_rows(existing, scraped_rows, URL)
+
+    expected, _ = clean.clean_rows(scraped_rows, URL)
+    assert merged == expected
+    assert (n_new, n_updated, n_skipped) == (10, 0, 0)
+
+def test_merge_rows_updates_changed_status(scraped_rows):
+    existing, _ = clean.clean_rows(scraped_rows, URL)
+    changed = list(scraped_rows[0])
+    changed[3] = "Rejected on 3 Mar"
+
+    merged, n_new, n_updated, n_skipped = clean.merge_rows(existing, [changed], URL)
+    assert (n_new, n_updated, n_skipped) == (0, 1, 0)
+    assert merged[0]["applicant_status"][0] == "Rejected"
+
+def test_merge_rows_skips_short_row_for_known_survey(scraped_rows):
+    existing, _ = clean.clean_rows(scraped_rows, URL)
+    stored = dict(existing[0])
+
+    # Status changed, but the row lost its semester and nationality columns
+    short_row = list(scraped_rows[0][:6])
+    short_row[3] = "Rejected on 3 Mar"
+    report = RunReport()
+
+    merged, n_new, n_updated, n_skipped = clean.merge_rows(existing, [short_row], URL,
+                                                           report=report)
+    assert (n_new, n_updated, n_skipped) == (0, 0, 1)
+    assert merged[0] == stored
+    assert report.counters["rows_dropped_index_error"] == 1
+
+def test_iter_clean_data_matches_clean_data(survey_server):
+    streamed = list(clean.iter_clean_data("test", survey_server.url, ["/survey/"],
+                                          max_pages_to_crawl=6))
+    assert streamed == clean.clean_data("test", survey_server.url, ["/survey/"],
+                                        max_pages_to_crawl=6)
+    assert len(streamed) == 30
+
+def test_update_data_only_adds_new_surveys(survey_server, tmp_path):
+    filename = str(tmp_path / "applicant_data.json")
+    assert clean.load_known_urls(filename) == set()
+
+    # An earlier run stored the older surveys, on pages 4 to 6 now
+    first = clean.update_data(filename, "test", survey_server.url, ["/survey/"],
+                              starting_page=4, max_pages_to_crawl=3)
+    known_urls = clean.load_known_urls(filename)
+    assert len(known_urls) == len(first) == 15
+
+    merged = clean.update_data(filename, "test", survey_server.url, ["/survey/"],
+                               max_pages_to_crawl=6, known_urls=known_urls)
+    expected = clean.clean_data("test", survey_server.url, ["/survey/"], max_pages_to_crawl=6)
+    assert [applicant["url_link"] for applicant in clean.load_data(filename)] == \
+        [applicant["url_link"] for applicant in expected]
+    assert len(merged) == 30
+
+@pytest.mark.skipif(os.name != "posix", reason="POSIX permission bits")
+def test_save_data_file_mode(tmp_path):
+    filename = str(tmp_path / "applicant_data.json")
+    umask = os.umask(0o022)
+    try:
+        clean.save_data([], filename)
+        # A new file gets the usual open() mode rather than the temporary file's 0600
+        assert stat.S_IMODE(os.stat(filename).st_mode) == 0o644
+
+        os.chmod(filename, 0o640)
+        clean.save_data([], filename)
+        assert stat.S_IMODE(os.stat(filename).st_mode) == 0o640
+    finally:
+        os.umask(umask)
+
+@pytest.mark.parametrize("program, expected", [
+    ("Computer Science\nPhD", ("Computer Science", "PhD")),
+    ("Economics Masters", ("Economics", "Masters")),
+    ("Fine Arts mfa", ("Fine Arts", "mfa")),
+    ("Chemistry", ("Chemistry", "")),
+])
+def test_separate_program_name_from_level(program, expected):
+    assert clean._separate_program_name_from_level(program) == expected
+
+def test_convert_date_to_iso():
+    assert clean._convert_date_to_iso("Mar 02, 2025") == ("2025-03-02", 2025)
+    # Unparseable dates are kept as they are
+    assert clean._convert_date_to_iso("yesterday")[0] == "yesterday"
+
+@pytest.mark.parametrize("status, expected", [
+    ("Accepted on 2 Mar", ("Accepted", "2025-03-02")),
+    ("Rejected on 15 Feb", ("Rejected", "2025-02-15")),
+    ("Wait listed on 1 Apr", ("Waitlisted", "2025-04-01")),
+    ("Interview on 9 Jan", ("Interviewed", "2025-01-09")),
+    ("Other on 30 Jun", ("Other", "2025-06-30")),
+])
+def test_clean_applicant_status(status, expected):
+    assert clean._clean_applicant_status(status, 2025) == expected
+
+def test_clean_applicant_status_without_date():
+    with pytest.raises(AttributeError):
+        clean._clean_applicant_status("Accepted", 2025)
+
+def test_clean_secondary_rows():
+    assert clean._clean_secondary_rows(
+        ["GRE 325", "GRE V 160", "GRE AW 4.50", "GPA 3.87", "Great program"]) == {
+        "gre_score": 325, "gre_v_score": 160, "gre_aw_score": 4.5, "gpa": 3.87,
+        "comments": "Great program"}
+    # A score without a number is skipped
+    assert clean._clean_secondary_rows(["GPA n/a"]) == {}
+
+def test_clean_result_keys_are_complete():
+    row = ["Stanford University", "Statistics\nPhD", "Jan 05, 2025", "Accepted on 4 Jan",
+           "/result/1", "Accepted on 4 Jan", "Fall 2025", "International"]
+    assert clean._clean_result(row, URL) == {
+        "university": "Stanford University", "program_name": "Statistics",
+        "program_level": "PhD", "applicant_status": ("Accepted", "2025-01-04"),
+        "date_of_information_added": "2025-01-05",
+        "url_link": "https://www.thegradcafe.com/survey/result/1",
+        "program_start_semester": "Fall 2025", "nationality": "International",
+        "gre_score": None, "gre_v_score": None, "gre_aw_score": None, "gpa": None,
+        "comments": None}
+
+def test_chunks_are_sized_by_raw_text():
+    rows = [["a" * 40], ["b" * 40], ["c" * 300], ["d" * 10], ["e" * 10]]
+    chunks = list(clean._chunked(rows, 100))
+
+    assert chunks == [rows[:3], rows[3:]]
+
+@pytest.mark.parametrize("as_records", [False, True])
+def test_parallel_cleaning_matches_serial(scraped_rows, as_records):
+    rows = [*scraped_rows, ["too", "short"], *scraped_rows]
+    serial = clean.clean_rows(rows, URL, as_records=as_records)
+    report = RunReport("clean")
+    parallel = clean.clean_rows(rows, URL, workers=2, chunk_bytes=300, as_records=as_records,
+                                report=report)
+
+    assert parallel == serial
+    assert parallel[1] == 1
+    assert report.counters["rows_cleaned"] == 40
+    assert report.counters["rows_dropped_index_error"] == 1
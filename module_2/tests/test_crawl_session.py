@@ -0,0 +1,53 @@
+import pytest
+
+import crawl_session
+import scraper
+from benchmarks.fixture_server import SurveyFixtureServer
+from crawl_session import CrawlSession
+
+def test_robots_txt_is_cached(survey_server):
+    with CrawlSession("test") as session:
+        session.robots(survey_server.url)
+        n_requests = survey_server.requests_served
+        assert session.can_fetch(survey_server.url, "/survey/")
+        session.robots(survey_server.url)
+        assert survey_server.requests_served == n_requests
+
+def test_robots_txt_is_read_from_site_root(survey_server, monkeypatch):
+    session = CrawlSession("test")
+    requested = []
+    request = session.http.request
+
+    def recording_request(method, url, **kwargs):
+        requested.append(url)
+        return request(method, url, **kwargs)
+
+    monkeypatch.setattr(session.http, "request", recording_request)
+    session.robots(survey_server.url)
+    assert requested == [survey_server.url.replace("/survey/", "/robots.txt")]
+    session.close()
+
+def test_requests_are_paced_by_crawl_delay(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(crawl_session.time, "sleep", sleeps.append)
+
+    with SurveyFixtureServer(n_pages=1, crawl_delay=2) as server, CrawlSession("test") as session:
+        assert session.crawl_delay(server.url) == 2.0
+        for _ in range(3):
+            session.wait(server.url)
+
+    # The first request goes out at once, later ones are spaced by the delay
+    assert sleeps[0] == pytest.approx(0, abs=0.1)
+    assert sleeps[1] == pytest.approx(2, abs=0.1)
+    assert sleeps[2] == pytest.approx(4, abs=0.1)
+
+def test_shared_session_is_left_open(survey_server):
+    with CrawlSession("test") as session:
+        _, rows = scraper.scrape_data("test", survey_server.url, ["/survey/"],
+                                      max_pages_to_crawl=2, session=session)
+        assert len(rows) == 10
+        # The session's cached robots.txt is reused by the next crawl
+        n_requests = survey_server.requests_served
+        scraper.scrape_data("test", survey_server.url, ["/survey/"], max_pages_to_crawl=1,
+                            session=session)
+        assert survey_server.requests_served == n_requests + 1
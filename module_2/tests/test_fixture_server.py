@@ -0,0 +1,19 @@
+import scraper
+from benchmarks.fixture_server import SurveyFixtureServer, make_survey_page
+
+def test_pages_are_deterministic():
+    assert make_survey_page(3) == make_survey_page(3)
+    assert make_survey_page(3) != make_survey_page(4)
+
+def test_pages_past_the_end_are_empty(survey_server):
+    _, rows = scraper._parse_page(survey_server.page_body(survey_server.n_pages + 1))
+    assert rows == []
+
+def test_recorded_pages_are_served(tmp_path):
+    recorded = make_survey_page(7, rows_per_page=2)
+    (tmp_path / "page_1.html").write_bytes(recorded)
+
+    with SurveyFixtureServer(n_pages=2, pages_dir=str(tmp_path)) as server:
+        assert server.page_body(1) == recorded
+        # Pages without a recording fall back to synthetic ones
+        assert server.page_body(2) == make_survey_page(2)
@@ -0,0 +1,69 @@
+import os
+from types import SimpleNamespace
+
+import scraper
+from http_cache import ResponseCache
+
+URL = "http://127.0.0.1/survey/?page=1"
+
+class ConditionalSession:
+    """Session that answers like a server with an ETag, recording request headers."""
+
+    def __init__(self, body:bytes, etag:str='"v1"'):
+        self.body = body
+        self.etag = etag
+        self.sent_headers = []
+
+    def request(self, method, url, headers=None):
+        self.sent_headers.append(headers or {})
+        if headers and headers.get("If-None-Match") == self.etag:
+            return SimpleNamespace(status=304, data=b"", headers={})
+        return SimpleNamespace(status=200, data=self.body, headers={"ETag": self.etag})
+
+def test_put_and_get_round_trip(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.put(URL, b"<html>page</html>", {"ETag": '"abc"', "Last-Modified": "Mon, 01 Jan 2024"})
+
+    assert cache.get(URL) == b"<html>page</html>"
+    assert cache.conditional_headers(URL) == {"If-None-Match": '"abc"',
+                                              "If-Modified-Since": "Mon, 01 Jan 2024"}
+
+def test_responses_without_validators_are_not_cached(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.put(URL, b"body", {})
+
+    assert cache.get(URL) is None
+    assert cache.conditional_headers(URL) == {}
+
+def test_expired_entries_are_ignored_and_evicted(tmp_path):
+    cache = ResponseCache(str(tmp_path), ttl=-1)
+    cache.put(URL, b"body", {"ETag": '"abc"'})
+
+    assert cache.get(URL) is None
+    assert cache.evict() == 1
+    assert os.listdir(tmp_path) == []
+
+def test_evict_keeps_cache_under_max_size(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_size=1)
+    for page_number in range(3):
+        cache.put(f"{URL}{page_number}", os.urandom(100), {"ETag": f'"{page_number}"'})
+
+    assert cache.evict() == 3
+    assert cache.get(f"{URL}0") is None
+
+def test_not_modified_pages_come_from_the_cache(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    session = ConditionalSession(b"<html>page</html>")
+
+    assert scraper._fetch_page(session, URL, cache) == b"<html>page</html>"
+    assert scraper._fetch_page(session, URL, cache) == b"<html>page</html>"
+    assert session.sent_headers == [{}, {"If-None-Match": '"v1"'}]
+
+def test_changed_pages_replace_the_cached_body(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    session = ConditionalSession(b"old")
+    scraper._fetch_page(session, URL, cache)
+
+    session.body, session.etag = b"new", '"v2"'
+    assert scraper._fetch_page(session, URL, cache) == b"new"
+    assert cache.get(URL) == b"new"
@@ -0,0 +1,44 @@
+import json
+
+from instrumentation import RunReport
+
+def test_counters_and_stages():
+    with RunReport("test") as report:
+        report.count("pages_fetched")
+        report.count("pages_fetched", 2)
+        report.add_time("fetch", 0.5)
+        report.add_time("fetch", 0.25)
+        with report.stage("clean"):
+            pass
+
+    result = report.to_dict()
+    assert result["counters"] == {"pages_fetched": 3}
+    assert result["stages"]["fetch"]["seconds"] == 0.75
+    assert "clean" in result["stages"]
+    assert result["duration_seconds"] >= 0
+
+def test_trace_memory_records_stage_peaks():
+    with RunReport("test", trace_memory=True) as report:
+        with report.stage("allocate"):
+            data = [bytes(1024) for _ in range(1000)]
+        del data
+
+    result = report.to_dict()
+    assert result["stages"]["allocate"]["peak_memory_bytes"] > 1000 * 1024
+    assert result["peak_memory_bytes"] >= result["stages"]["allocate"]["peak_memory_bytes"]
+
+def test_prometheus_output_is_labelled_by_run():
+    with RunReport('nightly "full"') as report:
+        report.count("rows_parsed", 5)
+
+    text = report.to_prometheus()
+    assert '# TYPE gradcafe_rows_parsed_total counter' in text
+    assert 'gradcafe_rows_parsed_total{run="nightly \\"full\\""} 5' in text
+
+def test_save_json(tmp_path):
+    report = RunReport("test")
+    report.count("rows_cleaned", 2)
+    report.save_json(str(tmp_path / "report.json"))
+
+    with open(tmp_path / "report.json", 'r', encoding='utf-8') as f:
+        assert json.load(f)["counters"] == {"rows_cleaned": 2}
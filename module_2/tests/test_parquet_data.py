@@ -0,0 +1,65 @@
+import os
+from urllib.parse import unquote
+
+import pytest
+
+import clean
+import scraper
+from benchmarks.fixture_server import make_survey_page
+from parquet_data import load_parquet_data, read_parquet_table, save_parquet_data
+
+URL = "https://www.thegradcafe.com/survey/"
+
+@pytest.fixture
+def cleaned_data():
+    """Cleaned results from three synthetic survey pages, with JSON-style list statuses."""
+    rows = []
+    for page_number in (1, 2, 3):
+        rows.extend(scraper._parse_page(make_survey_page(page_number, rows_per_page=10))[1])
+    data, _ = clean.clean_rows(rows, URL)
+    for applicant in data:
+        applicant["applicant_status"] = list(applicant["applicant_status"])
+    return data
+
+def by_url(data:list[dict]) -> list[dict]:
+    """Sort results by survey URL, since partitions are read back in directory order."""
+    return sorted(data, key=lambda applicant: applicant["url_link"])
+
+def test_round_trip(cleaned_data, tmp_path):
+    save_parquet_data(cleaned_data, str(tmp_path))
+
+    assert by_url(load_parquet_data(str(tmp_path))) == by_url(cleaned_data)
+    semesters = {applicant["program_start_semester"] for applicant in cleaned_data}
+    # One hive-style directory per term, with URL-encoded names
+    assert {unquote(name.split("=", 1)[1]) for name in os.listdir(tmp_path)} == semesters
+
+def test_semester_and_column_pushdown(cleaned_data, tmp_path):
+    save_parquet_data(cleaned_data, str(tmp_path))
+
+    fall_2025 = load_parquet_data(str(tmp_path), columns=["url_link", "applicant_status"],
+                                  semesters=["Fall 2025"])
+    expected = [{"url_link": applicant["url_link"],
+                 "applicant_status": applicant["applicant_status"]}
+                for applicant in cleaned_data
+                if applicant["program_start_semester"] == "Fall 2025"]
+    assert by_url(fall_2025) == by_url(expected)
+
+def test_filters_on_typed_columns(cleaned_data, tmp_path):
+    save_parquet_data(cleaned_data, str(tmp_path))
+
+    table = read_parquet_table(str(tmp_path), columns=["gre_score"],
+                               filters={"applicant_status": "Accepted"})
+    n_accepted = sum(applicant["applicant_status"][0] == "Accepted"
+                     for applicant in cleaned_data)
+    assert table.num_rows == n_accepted
+    assert str(table.schema.field("gre_score").type) == "int16"
+
+def test_saving_a_semester_replaces_its_partition(cleaned_data, tmp_path):
+    save_parquet_data(cleaned_data, str(tmp_path))
+    fall_2025 = [applicant for applicant in cleaned_data
+                 if applicant["program_start_semester"] == "Fall 2025"]
+
+    save_parquet_data(fall_2025[:1], str(tmp_path))
+
+    assert load_parquet_data(str(tmp_path), semesters=["Fall 2025"]) == fall_2025[:1]
+    assert len(load_parquet_data(str(tmp_path))) == len(cleaned_data) - len(fall_2025) + 1
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+import clean
+import scraper
+from parquet_data import load_parquet_data
+from raw_archive import RawArchive
+from reclean import archived_rows, reclean_archive
+
+TITLES = ["school", "program", "added_on", "decision"]
+
+def test_pages_round_trip_across_segments(tmp_path):
+    with RawArchive(str(tmp_path), segment_max_pages=2) as archive:
+        for page_number in range(1, 6):
+            archive.append_page(page_number, TITLES, [[f"row {page_number}"]])
+
+    archive = RawArchive(str(tmp_path))
+    assert len(archive.segments()) == 3
+    assert [page for page, _, _ in archive.iter_pages()] == [1, 2, 3, 4, 5]
+    assert list(archive.iter_rows()) == [[f"row {page_number}"] for page_number in range(1, 6)]
+
+def test_each_writer_starts_a_new_segment(tmp_path):
+    for page_number in (1, 2):
+        with RawArchive(str(tmp_path)) as archive:
+            archive.append_page(page_number, TITLES, [])
+
+    assert len(RawArchive(str(tmp_path)).segments()) == 2
+
+def test_truncated_segment_is_read_up_to_the_damage(tmp_path):
+    with RawArchive(str(tmp_path)) as archive:
+        for page_number in range(1, 4):
+            archive.append_page(page_number, TITLES, [[f"row {page_number}"] * 50])
+    segment = archive.segments()[0]
+    with open(segment, 'rb') as f:
+        data = f.read()
+    with open(segment, 'wb') as f:
+        f.write(data[:-20])
+
+    pages = [page for page, _, _ in RawArchive(str(tmp_path)).iter_pages()]
+    assert pages == [1, 2]
+
+def test_reclean_matches_crawl(survey_server, tmp_path):
+    archive_dir = str(tmp_path / "archive")
+    with RawArchive(archive_dir) as archive:
+        expected = clean.clean_data("test", survey_server.url, ["/survey/"],
+                                    max_pages_to_crawl=6, archive=archive)
+
+    output = str(tmp_path / "applicant_data.json")
+    assert reclean_archive(archive_dir, survey_server.url, output, workers=2,
+                           chunk_bytes=700) == 30
+    # Compare through JSON, which stores the status tuples as lists
+    assert clean.load_data(output) == json.loads(json.dumps(expected))
+
+    parquet_output = str(tmp_path / "applicant_data")
+    assert reclean_archive(archive_dir, survey_server.url, parquet_output, "parquet") == 30
+    assert len(load_parquet_data(parquet_output)) == 30
+
+    with pytest.raises(ValueError):
+        reclean_archive(archive_dir, survey_server.url, output, "csv")
+
+def test_archived_rows_keep_latest_copy_of_a_survey(tmp_path):
+    url = "https://www.thegradcafe.com/survey/"
+    with RawArchive(str(tmp_path)) as archive:
+        archive.append_page(1, TITLES, [["A", "", "", "Accepted", "/result/1"],
+                                        ["B", "", "", "Rejected", "/result/2"],
+                                        ["short"]])
+        archive.append_page(1, TITLES, [["A", "", "", "Rejected", "/result/1"]])
+
+    assert archived_rows(RawArchive(str(tmp_path)), url) == [
+        ["A", "", "", "Rejected", "/result/1"], ["B", "", "", "Rejected", "/result/2"],
+        ["short"]]
@@ -0,0 +1,61 @@
+import json
+import pickle
+
+import pytest
+
+import clean
+from records import ApplicantRecord, to_json_default
+
+APPLICANT = {
+    "university": "Johns Hopkins University",
+    "program_name": "Computer Science",
+    "program_level": "Masters",
+    "applicant_status": ["Accepted", "2025-03-01"],
+    "date_of_information_added": "2025-03-02",
+    "url_link": "https://www.thegradcafe.com/survey/result/1",
+    "program_start_semester": "Fall 2025",
+    "nationality": "International",
+    "gre_score": 330,
+    "gre_v_score": 165,
+    "gre_aw_score": 4.5,
+    "gpa": 3.9,
+    "comments": None
+}
+
+def test_dict_round_trip():
+    record = ApplicantRecord.from_dict(APPLICANT)
+
+    assert record.applicant_status == ("Accepted", "2025-03-01")
+    assert record.to_dict() == dict(APPLICANT, applicant_status=("Accepted", "2025-03-01"))
+    assert list(record.keys()) == list(APPLICANT)
+
+def test_item_access_matches_dicts():
+    record = ApplicantRecord.from_dict(APPLICANT)
+
+    assert record["university"] == APPLICANT["university"]
+    assert record.get("gpa") == 3.9
+    assert record.get("missing", "default") == "default"
+    with pytest.raises(KeyError):
+        record["missing"]
+
+def test_repeated_strings_are_shared():
+    first = ApplicantRecord.from_dict(APPLICANT)
+    # Build the strings at runtime so they are distinct objects before interning
+    second = ApplicantRecord.from_dict({key: "".join(value) if isinstance(value, str) else value
+                                        for key, value in APPLICANT.items()})
+
+    assert first.university is second.university
+    assert first.program_start_semester is second.program_start_semester
+
+def test_records_pickle_and_serialize():
+    record = ApplicantRecord.from_dict(APPLICANT)
+
+    assert pickle.loads(pickle.dumps(record)) == record
+    assert json.loads(json.dumps([record], default=to_json_default)) == [APPLICANT]
+
+def test_save_and_load_records(tmp_path):
+    filename = str(tmp_path / "applicant_data.json")
+    clean.save_data([ApplicantRecord.from_dict(APPLICANT)], filename)
+
+    assert clean.load_data(filename) == [APPLICANT]
+    assert clean.load_data(filename, as_records=True) == [ApplicantRecord.from_dict(APPLICANT)]
@@ -0,0 +1,131 @@
+import pytest
+
+import scraper
+from benchmarks import bench_parsers
+from benchmarks.fixture_server import make_survey_entries, make_survey_page
+
+@pytest.mark.parametrize("backend", list(scraper._PARSER_BACKENDS))
+def test_parser_backends_match_reference(backend):
+    pages = [make_survey_page(page_number) for page_number in range(1, 4)]
+    assert bench_parsers.parse_pages(pages, backend) == bench_parsers.parse_pages(pages, "html.parser")
+
+def test_parse_page_reads_every_entry():
+    entries = make_survey_entries(1, rows_per_page=5)
+    column_titles, rows = scraper._parse_page(make_survey_page(1, rows_per_page=5))
+
+    assert column_titles == ["school", "program", "added_on", "decision"]
+    assert len(rows) == 5
+    assert [row[0] for row in rows] == [entry["university"] for entry in entries]
+    assert [row[4] for row in rows] == [entry["href"] for entry in entries]
+
+def test_unknown_parser_backend_is_rejected(survey_server):
+    with pytest.raises(ValueError):
+        scraper.scrape_data("test", survey_server.url, ["/survey/"], parser="html5")
+
+def test_download_pages_saves_raw_pages(survey_server, tmp_path):
+    bench_parsers.download_pages(survey_server.url, str(tmp_path), 2)
+    assert bench_parsers.load_pages(str(tmp_path)) == \
+        [survey_server.page_body(1), survey_server.page_body(2)]
+
+def test_concurrent_fetching_keeps_page_order(survey_server):
+    serial = scraper.scrape_data("test", survey_server.url, ["/survey/"], max_pages_to_crawl=6)
+    concurrent = scraper.scrape_data("test", survey_server.url, ["/survey/"],
+                                     max_pages_to_crawl=6, max_workers=4)
+
+    assert concurrent == serial
+    assert len(serial[1]) == 30
+    expected_hrefs = [entry["href"] for page_number in range(1, 7)
+                      for entry in make_survey_entries(page_number, rows_per_page=5)]
+    assert [row[4] for row in concurrent[1]] == expected_hrefs
+
+def test_checkpoint_resume_continues_after_last_page(survey_server, tmp_path):
+    checkpoint = str(tmp_path / "crawl.jsonl")
+    _, expected = scraper.scrape_data("test", survey_server.url, ["/survey/"],
+                                      max_pages_to_crawl=6)
+
+    scraper.scrape_data("test", survey_server.url, ["/survey/"], max_pages_to_crawl=3,
+                        checkpoint_path=checkpoint)
+    requests_before = survey_server.requests_served
+    column_titles, results = scraper.scrape_data("test", survey_server.url, ["/survey/"],
+                                                 max_pages_to_crawl=6,
+                                                 checkpoint_path=checkpoint, resume=True)
+
+    assert column_titles == ["school", "program", "added_on", "decision"]
+    assert results == expected
+    # Only pages 4 to 6 and robots.txt are fetched again
+    assert survey_server.requests_served - requests_before == 4
+
+def test_checkpoint_truncated_line_is_dropped(survey_server, tmp_path):
+    checkpoint = tmp_path / "crawl.jsonl"
+    scraper.scrape_data("test", survey_server.url, ["/survey/"], max_pages_to_crawl=2,
+                        checkpoint_path=str(checkpoint))
+    # Simulate a crash part way through writing page 3
+    with open(checkpoint, 'a', encoding='utf-8') as f:
+        f.write('{"page": 3, "column_titles": [], "rows": [["Johns')
+
+    column_titles, results, last_page, n_pages = scraper._load_checkpoint(str(checkpoint))
+
+    assert (last_page, n_pages, len(results)) == (2, 2, 10)
+    assert column_titles
+    assert checkpoint.read_text(encoding='utf-8').endswith("\n")
+    _, resumed = scraper.scrape_data("test", survey_server.url, ["/survey/"],
+                                     max_pages_to_crawl=6, checkpoint_path=str(checkpoint),
+                                     resume=True)
+    assert len(resumed) == 30
+
+def test_fresh_crawl_overwrites_checkpoint(survey_server, tmp_path):
+    checkpoint = tmp_path / "crawl.jsonl"
+    checkpoint.write_text('{"page": 9, "column_titles": [], "rows": []}\n', encoding='utf-8')
+
+    scraper.scrape_data("test", survey_server.url, ["/survey/"], max_pages_to_crawl=1,
+                        checkpoint_path=str(checkpoint))
+
+    assert scraper._load_checkpoint(str(checkpoint))[2] == 1
+
+def test_iter_survey_rows_streams_pages(survey_server):
+    rows = scraper.iter_survey_rows("test", survey_server.url, ["/survey/"],
+                                    max_pages_to_crawl=6)
+    first_row = next(rows)
+
+    # Only robots.txt and the first page have been needed so far
+    assert survey_server.requests_served <= 3
+    assert [first_row, *rows] == scraper.scrape_data("test", survey_server.url, ["/survey/"],
+                                                     max_pages_to_crawl=6)[1]
+
+def test_parse_pool_matches_inline_parsing(survey_server):
+    inline = scraper.scrape_data("test", survey_server.url, ["/survey/"], max_pages_to_crawl=6)
+    pooled = scraper.scrape_data("test", survey_server.url, ["/survey/"], max_pages_to_crawl=6,
+                                 max_workers=2, parse_workers=2)
+    assert pooled == inline
+
+def test_parse_pool_passes_fetch_errors_down(survey_server, monkeypatch):
+    fetch_page = scraper._fetch_page
+
+    def failing_fetch(session, page_url, *args, **kwargs):
+        if page_url.endswith("page=3"):
+            raise ConnectionError("connection reset")
+        return fetch_page(session, page_url, *args, **kwargs)
+
+    monkeypatch.setattr(scraper, "_fetch_page", failing_fetch)
+    _, rows = scraper.scrape_data("test", survey_server.url, ["/survey/"],
+                                  max_pages_to_crawl=6, parse_workers=2)
+    # The crawl stops at the failed page, keeping the pages before it
+    assert len(rows) == 10
+
+    with pytest.raises(ConnectionError):
+        scraper.scrape_data("test", survey_server.url, ["/survey/"], max_pages_to_crawl=6,
+                            parse_workers=2, raise_errors=True)
+
+def test_incremental_crawl_stops_at_known_page(survey_server):
+    known_urls = {scraper.survey_url(survey_server.url, entry["href"])
+                  for page_number in range(3, 7)
+                  for entry in make_survey_entries(page_number, rows_per_page=5)}
+    # One survey on page 2 is known too, and only it is dropped
+    known_urls.add(scraper.survey_url(survey_server.url,
+                                      make_survey_entries(2, rows_per_page=5)[0]["href"]))
+
+    _, rows = scraper.scrape_data("test", survey_server.url, ["/survey/"],
+                                  max_pages_to_crawl=6, known_urls=known_urls)
+
+    assert len(rows) == 9
+    assert not any(scraper.survey_url(survey_server.url, row[4]) in known_urls for row in rows)
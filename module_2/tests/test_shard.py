@@ -0,0 +1,71 @@
+import json
+import os
+
+import pytest
+
+import scraper
+import shard
+
+def test_plan_shards_covers_range():
+    shards = shard.plan_shards(1, 10, 3)
+    assert shards == [(1, 4), (5, 3), (8, 3)]
+    # Never more shards than pages
+    assert shard.plan_shards(1, 2, 8) == [(1, 1), (2, 1)]
+
+def test_crawl_shard_writes_output(survey_server, tmp_path):
+    output = str(tmp_path / "shard_000001.json")
+    n_rows = shard.crawl_shard("test", survey_server.url, ["/survey/"], 1, 3, output)
+
+    with open(output, 'r', encoding='utf-8') as f:
+        written = json.load(f)
+    assert n_rows == 15
+    assert written["n_pages"] == 3
+    assert len(written["rows"]) == 15
+    assert not os.path.exists(f"{output}.checkpoint.jsonl")
+
+def test_crawl_shard_failure_keeps_checkpoint(survey_server, tmp_path, monkeypatch):
+    output = str(tmp_path / "shard_000001.json")
+    checkpoint = f"{output}.checkpoint.jsonl"
+    fetch_page = scraper._fetch_page
+
+    # Page 3 of 4 fails to fetch
+    def failing_fetch(session, page_url, cache=None, report=None):
+        if page_url.endswith("page=3"):
+            raise ConnectionError("injected failure")
+        return fetch_page(session, page_url, cache, report)
+
+    monkeypatch.setattr(scraper, "_fetch_page", failing_fetch)
+    with pytest.raises(ConnectionError):
+        shard.crawl_shard("test", survey_server.url, ["/survey/"], 1, 4, output)
+
+    # A short shard is not written, and its completed pages stay checkpointed
+    assert not os.path.exists(output)
+    with open(checkpoint, 'r', encoding='utf-8') as f:
+        assert [json.loads(line)["page"] for line in f] == [1, 2]
+
+    # The next run resumes after page 2 and finishes the shard
+    monkeypatch.setattr(scraper, "_fetch_page", fetch_page)
+    n_rows = shard.crawl_shard("test", survey_server.url, ["/survey/"], 1, 4, output)
+    assert n_rows == 20
+    assert not os.path.exists(checkpoint)
+
+def test_run_sharded_crawl_merges_in_page_order(survey_server, tmp_path):
+    _, sharded = shard.run_sharded_crawl("test", survey_server.url, ["/survey/"], 1, 6, 3,
+                                         str(tmp_path))
+    _, serial = scraper.scrape_data("test", survey_server.url, ["/survey/"],
+                                    max_pages_to_crawl=6)
+    assert sharded == serial
+
+def test_merge_shards_drops_duplicate_surveys(tmp_path):
+    row = ["University", "Program", "Jan 01, 2025", "Accepted on 1 Jan", "/result/1"]
+    filenames = []
+    for starting_page, rows in ((1, [row]), (2, [row, row[:3]])):
+        filename = shard.shard_filename(str(tmp_path), starting_page)
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump({"starting_page": starting_page, "n_pages": 1, "column_titles": [],
+                       "rows": rows}, f)
+        filenames.append(filename)
+
+    _, merged = shard.merge_shards(filenames, "https://www.thegradcafe.com/survey/")
+    # The duplicate is dropped, the row without a link is kept for the cleaner
+    assert merged == [row, row[:3]]
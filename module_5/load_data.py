@@ -5,17 +5,48 @@ into a PostgreSQL database.
 Functions:
 - create_connection: Establishes a connection to the PostgreSQL database.
 - insert_applicant_record: Inserts an applicant record into the database.
+- bulk_load_applicants: Streams many applicant records into the database with COPY in one
+transaction.
+- copy_applicants: Streams applicant records into a table with COPY, without committing.
+- ensure_url_key: Adds the unique index on survey URL that upserts are keyed on.
+- upsert_applicants: Inserts new applicants and updates changed ones, keyed on survey URL, in
+batches through a staging table.
+- iter_json_array: Yields the elements of a JSON array file one at a time, reading it in chunks.
+- prefetch: Runs an iterator on a background thread, a bounded number of items ahead.
 
 Usage:
-Run this module as a script to load applicant data from a JSON file and insert it into the
-database.
+Run this module as a script to stream applicant data from a JSON file and upsert it into the
+database, so it can be re-run after every scrape. The file is parsed on a background thread
+while earlier batches are written, and memory use does not grow with the file size. A run
+report with the load timing, row counts and peak memory is saved next to the data.
 """
 
+import datetime
 import json
+import queue
+import re
+import threading
+import time
+from contextlib import nullcontext
+from itertools import islice
+from typing import IO, Callable, Iterable, Iterator
+
 import psycopg2
 from psycopg2 import OperationalError
 from psycopg2 import sql
 
+from instrumentation import RunReport
+
+APPLICANT_COLUMNS = ["p_id", "program", "comments", "date_added", "url", "status", "term",
+                     "us_or_international", "gpa", "gre", "gre_v", "gre_aw", "degree",
+                     "university", "program_name", "decision_date"]
+
+# Characters with a special meaning in COPY's text format
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+# What must follow a complete number or literal inside an array
+_ELEMENT_END = re.compile(r"\s*[,\]]")
+
 def create_connection(db_name:str, db_user:str, db_password:str, db_host:str="localhost",
                       db_port:int=5432) -> psycopg2.extensions.connection:
     """Create a database connection to the PostgreSQL database specified by the
@@ -45,19 +76,69 @@ def create_connection(db_name:str, db_user:str, db_password:str, db_host:str="lo
         print(f"Error connecting to the database: {e}")
     return connection
 
+def _iso_date(value:str) -> str:
+    """Normalize a cleaned date to YYYY-MM-DD so PostgreSQL accepts it. None stays None.
+
+    Raises:
+        ValueError: If value is not an ISO 8601 date.
+    """
+    if value is None:
+        return None
+    try:
+        return datetime.date.fromisoformat(value).isoformat()
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid date {value!r}") from e
+
+def _applicant_row(applicant_data_dict:dict, applicant_number:int) -> tuple:
+    """Transform a cleaned applicant into a row of column values, in APPLICANT_COLUMNS order.
+    University, program name, status and decision date get their own columns. The combined
+    "university : program_name" program column is kept for existing queries. Dates are
+    checked here, since one bad date would otherwise fail a whole COPY.
+
+    Args:
+        applicant_data_dict (dict): Dictionary containing applicant data.
+        applicant_number (int): Primary key for the row.
+
+    Returns:
+        row: Tuple of column values.
+
+    Raises:
+        ValueError: If the date added or decision date is not a valid date.
+    """
+    status, decision_date = applicant_data_dict['applicant_status']
+    return (
+        applicant_number,
+        f"{applicant_data_dict['university']} : {applicant_data_dict['program_name']}",
+        applicant_data_dict['comments'],
+        _iso_date(applicant_data_dict['date_of_information_added']),
+        applicant_data_dict['url_link'],
+        status,
+        applicant_data_dict['program_start_semester'],
+        applicant_data_dict['nationality'],
+        applicant_data_dict['gpa'],
+        applicant_data_dict['gre_score'],
+        applicant_data_dict['gre_v_score'],
+        applicant_data_dict['gre_aw_score'],
+        applicant_data_dict['program_level'],
+        applicant_data_dict['university'],
+        applicant_data_dict['program_name'],
+        _iso_date(decision_date)
+    )
+
 def insert_applicant_record(connection:psycopg2.extensions.connection, applicant_data_dict:dict,
-                            applicant_number:int) -> None:
+                            applicant_number:int, report:RunReport=None) -> None:
     """Insert a new applicant record into the database.
     
     Args:
         conn (psycopg2.extensions.connection): Database connection object.
-        applicant_data (dict): Dictionary containing applicant data.
+        applicant_data (dict): Dictionary containing applicant data. Any object with the same
+            keys that supports item access, such as module_2's compact ApplicantRecord, also
+            works.
         applicant_i (int): Index of the applicant in the data list. Used as primary key.
+        report (RunReport): Optional run report counting inserted and failed rows.
     """
 
-    column_names = ["p_id", "program", "comments", "date_added", "url", "status", "term",
-                    "us_or_international", "gpa", "gre", "gre_v", "gre_aw", "degree"]
-    column_identifiers = [sql.Identifier(col) for col in column_names]
+    column_identifiers = [sql.Identifier(col) for col in APPLICANT_COLUMNS]
 
     cursor = connection.cursor()
 
@@ -66,38 +147,423 @@ def insert_applicant_record(connection:psycopg2.extensions.connection, applicant
     ).format(
         table=sql.Identifier("applicants"),
         fields = sql.SQL(", ").join(column_identifiers),
-        p_holders = sql.SQL(", ").join(sql.Placeholder() * 13)  # 13 column vals to insert
+        p_holders = sql.SQL(", ").join(sql.Placeholder() * len(APPLICANT_COLUMNS))
     )
 
     try:
-        cursor.execute(insert_query, (
-            applicant_number,
-            f"{applicant_data_dict['university']} : {applicant_data_dict['program_name']}",
-            applicant_data_dict['comments'],
-            applicant_data_dict['date_of_information_added'],
-            applicant_data_dict['url_link'],
-            " on ".join(applicant_data_dict['applicant_status']),  # Concat status w/ decision date
-            applicant_data_dict['program_start_semester'],
-            applicant_data_dict['nationality'],
-            applicant_data_dict['gpa'],
-            applicant_data_dict['gre_score'],
-            applicant_data_dict['gre_v_score'],
-            applicant_data_dict['gre_aw_score'],
-            applicant_data_dict['program_level']
-        ))
+        cursor.execute(insert_query, _applicant_row(applicant_data_dict, applicant_number))
         connection.commit()
-    except ValueError as e:
+        if report:
+            report.count("rows_inserted")
+    except (ValueError, psycopg2.DataError) as e:
         print(f"Error inserting record: {e} on applicant number {applicant_number}")
         connection.rollback()
+        if report:
+            report.count("rows_failed")
+    finally:
+        cursor.close()
+
+def _copy_value(value) -> str:
+    """Format one column value for COPY's text format. None becomes NULL (\\N), while an
+    empty string stays an empty string."""
+    if value is None:
+        return "\\N"
+    return str(value).translate(_COPY_ESCAPES)
+
+class _CopyStream:
+    """Read-only file-like object that serves COPY text-format lines from an iterator of rows,
+    so rows are encoded as copy_expert asks for them instead of all at once."""
+
+    def __init__(self, rows:Iterable[tuple]):
+        self._lines = ("\t".join(map(_copy_value, row)) + "\n" for row in rows)
+        self._buffer = ""
+
+    def read(self, size:int=-1) -> str:
+        """Return up to size characters (everything left if size is negative)."""
+        parts = [self._buffer]
+        length = len(self._buffer)
+        if size < 0 or length < size:
+            for line in self._lines:
+                parts.append(line)
+                length += len(line)
+                if 0 <= size <= length:
+                    break
+
+        data = "".join(parts)
+        if size < 0:
+            self._buffer = ""
+            return data
+        self._buffer = data[size:]
+        return data[:size]
+
+    def readline(self, size:int=-1) -> str:  # pylint: disable=unused-argument
+        """Return the next line, for callers that read line by line."""
+        if self._buffer:
+            line, self._buffer = self._buffer, ""
+            return line
+        return next(self._lines, "")
+
+def _applicant_rows(applicant_data:Iterable[dict], first_p_id:int,
+                    report:RunReport=None) -> Iterator[tuple]:
+    """Yield a row per applicant with consecutive primary keys starting at first_p_id.
+    Applicants with invalid values are skipped and counted as rows_failed."""
+    applicant_number = first_p_id
+    for applicant in applicant_data:
+        try:
+            row = _applicant_row(applicant, applicant_number)
+        except ValueError as e:
+            print(f"Skipping applicant {applicant.get('url_link')}: {e}")
+            if report:
+                report.count("rows_failed")
+            continue
+        applicant_number += 1
+        yield row
+
+def copy_applicants(cursor:psycopg2.extensions.cursor, table:str,
+                      applicant_data:Iterable[dict], first_p_id:int,
+                      report:RunReport=None) -> int:
+    """Stream applicants into table with COPY ... FROM STDIN, without committing.
+    Applicants with invalid dates are skipped rather than failing the COPY.
+
+    Args:
+        cursor (psycopg2.extensions.cursor): Cursor to run the COPY on.
+        table (str): PostgreSQL table to copy into.
+        applicant_data (Iterable[dict]): Cleaned applicant dictionaries (or records).
+        first_p_id (int): Primary key of the first applicant. Later applicants count up.
+        report (RunReport): Optional run report counting skipped rows as rows_failed.
+
+    Returns:
+        n_rows: Number of rows copied.
+    """
+    copy_query = sql.SQL("COPY {table} ({fields}) FROM STDIN").format(
+        table=sql.Identifier(table),
+        fields=sql.SQL(", ").join(sql.Identifier(col) for col in APPLICANT_COLUMNS)
+    )
+    cursor.copy_expert(copy_query, _CopyStream(_applicant_rows(applicant_data, first_p_id, report)))
+    return cursor.rowcount
+
+def bulk_load_applicants(connection:psycopg2.extensions.connection,
+                         applicant_data:Iterable[dict], table:str="applicants",
+                         first_p_id:int=0, report:RunReport=None) -> int:
+    """Load many applicants with a single COPY ... FROM STDIN and one commit, instead of an
+    INSERT and commit per applicant. Rows get the same transformations as
+    insert_applicant_record, and are streamed to the server as they are transformed, so
+    applicant_data can be a generator. Applicants with invalid dates are skipped and
+    counted; the whole load is rolled back if the database rejects any other row.
+
+    Args:
+        connection (psycopg2.extensions.connection): Database connection object.
+        applicant_data (Iterable[dict]): Cleaned applicant dictionaries (or records).
+        table (str): PostgreSQL table to load into.
+        first_p_id (int): Primary key of the first applicant. Later applicants count up.
+        report (RunReport): Optional run report. The COPY is timed as the 'load' stage, and
+            skipped applicants are counted as rows_failed.
+
+    Returns:
+        n_rows: Number of rows loaded, or 0 if the load failed.
+    """
+    cursor = connection.cursor()
+
+    start = time.perf_counter()
+    try:
+        with report.stage("load") if report else nullcontext():
+            n_rows = copy_applicants(cursor, table, applicant_data, first_p_id, report)
+            connection.commit()
+    except psycopg2.Error as e:
+        connection.rollback()
+        print(f"Bulk load into {table} failed, no rows were loaded:\n\n{e}")
+        return 0
     finally:
         cursor.close()
+    elapsed = time.perf_counter() - start
+
+    if report:
+        report.count("rows_inserted", n_rows)
+    print(f"Loaded {n_rows} rows into {table} in {elapsed:.2f} s "
+          f"({n_rows / elapsed if elapsed else 0:.0f} rows/sec)")
+
+    return n_rows
+
+def ensure_url_key(connection:psycopg2.extensions.connection, table:str="applicants") -> bool:
+    """Create the unique index on url that upsert_applicants uses as its conflict target, if
+    it does not exist yet.
+
+    Args:
+        connection (psycopg2.extensions.connection): Database connection object.
+        table (str): PostgreSQL table
+
+    Returns:
+        created: True if the index exists, False if the table already holds duplicate URLs.
+    """
+    cursor = connection.cursor()
 
+    query = sql.SQL("CREATE UNIQUE INDEX IF NOT EXISTS {index} ON {table} ({field});").format(
+        index=sql.Identifier(f"{table}_url_key"),
+        table=sql.Identifier(table),
+        field=sql.Identifier("url")
+    )
+    try:
+        cursor.execute(query)
+        connection.commit()
+    except psycopg2.errors.UniqueViolation as e:
+        connection.rollback()
+        print(f"{table} has duplicate survey URLs, remove them before upserting:\n\n{e}")
+        return False
+    finally:
+        cursor.close()
+
+    return True
+
+def _upsert_query(table:str, staging:str) -> sql.Composed:
+    """Build the statement that merges the staging table into table. Only the last staged row
+    per URL is used. New URLs get p_ids after the current maximum, in staging order, while
+    existing rows keep theirs and are only rewritten if a column changed. Returns the numbers
+    of inserted and updated rows."""
+    update_columns = [col for col in APPLICANT_COLUMNS if col not in ("p_id", "url")]
+
+    return sql.SQL("""
+        WITH upserted AS (
+            INSERT INTO {table} AS t ({fields})
+            SELECT (SELECT COALESCE(MAX({p_id}), -1) FROM {table})
+                       + ROW_NUMBER() OVER (ORDER BY s.{p_id}),
+                   {staged_values}
+            FROM (
+                SELECT DISTINCT ON ({url}) * FROM {staging}
+                WHERE {url} IS NOT NULL
+                ORDER BY {url}, {p_id} DESC
+            ) AS s
+            ON CONFLICT ({url}) DO UPDATE SET {assignments}
+            WHERE ({current_values}) IS DISTINCT FROM ({excluded_values})
+            RETURNING t.xmax = 0 AS inserted
+        )
+        SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted)
+        FROM upserted;
+    """).format(
+        table=sql.Identifier(table),
+        staging=sql.Identifier(staging),
+        p_id=sql.Identifier("p_id"),
+        url=sql.Identifier("url"),
+        fields=sql.SQL(", ").join(sql.Identifier(col) for col in APPLICANT_COLUMNS),
+        staged_values=sql.SQL(", ").join(
+            sql.SQL("s.{}").format(sql.Identifier(col)) for col in APPLICANT_COLUMNS[1:]
+        ),
+        assignments=sql.SQL(", ").join(
+            sql.SQL("{col} = EXCLUDED.{col}").format(col=sql.Identifier(col))
+            for col in update_columns
+        ),
+        current_values=sql.SQL(", ").join(
+            sql.SQL("t.{}").format(sql.Identifier(col)) for col in update_columns
+        ),
+        excluded_values=sql.SQL(", ").join(
+            sql.SQL("EXCLUDED.{}").format(sql.Identifier(col)) for col in update_columns
+        )
+    )
+
+def upsert_applicants(connection:psycopg2.extensions.connection,
+                      applicant_data:Iterable[dict], table:str="applicants",
+                      batch_size:int=10000, report:RunReport=None) -> tuple[int, int]:
+    """Insert new applicants and update changed ones, keyed on survey URL, so the loader can
+    be re-run on the same or a newer applicant_data.json without truncating the table. Each
+    batch is copied into a temporary staging table and merged with INSERT ... ON CONFLICT
+    DO UPDATE in its own transaction. Unchanged rows are not rewritten, and applicants
+    without a URL are skipped.
+
+    Args:
+        connection (psycopg2.extensions.connection): Database connection object.
+        applicant_data (Iterable[dict]): Cleaned applicant dictionaries (or records).
+        table (str): PostgreSQL table to load into.
+        batch_size (int): Applicants per staging batch and transaction.
+        report (RunReport): Optional run report. The upsert is timed as the 'load' stage.
+
+    Returns:
+        counts: Numbers of inserted and updated rows.
+    """
+    if not ensure_url_key(connection, table):
+        return 0, 0
+
+    staging = f"{table}_staging"
+    upsert_query = _upsert_query(table, staging)
+    n_inserted = 0
+    n_updated = 0
+    n_staged = 0
+    cursor = connection.cursor()
+
+    start = time.perf_counter()
+    try:
+        with report.stage("load") if report else nullcontext():
+            cursor.execute(sql.SQL(
+                "CREATE TEMP TABLE IF NOT EXISTS {staging} (LIKE {table} INCLUDING DEFAULTS);"
+            ).format(staging=sql.Identifier(staging), table=sql.Identifier(table)))
+
+            applicant_data = iter(applicant_data)
+            while batch := list(islice(applicant_data, batch_size)):
+                cursor.execute(sql.SQL("TRUNCATE {staging};").format(staging=sql.Identifier(staging)))
+                # Staging p_ids are input positions, used to order and deduplicate the batch
+                n_staged += copy_applicants(cursor, staging, batch, n_staged, report)
+                cursor.execute(upsert_query)
+                batch_inserted, batch_updated = cursor.fetchone()
+                connection.commit()
+                n_inserted += batch_inserted
+                n_updated += batch_updated
+
+            cursor.execute(sql.SQL("DROP TABLE IF EXISTS {staging};").format(
+                staging=sql.Identifier(staging)))
+            connection.commit()
+    except psycopg2.Error as e:
+        connection.rollback()
+        print(f"Upsert into {table} failed after {n_inserted + n_updated} rows:\n\n{e}")
+    finally:
+        cursor.close()
+    elapsed = time.perf_counter() - start
+
+    if report:
+        report.count("rows_inserted", n_inserted)
+        report.count("rows_updated", n_updated)
+        report.count("rows_unchanged", n_staged - n_inserted - n_updated)
+    print(f"Upserted {n_staged} applicants into {table} in {elapsed:.2f} s: {n_inserted} inserted, "
+          f"{n_updated} updated ({n_staged / elapsed if elapsed else 0:.0f} rows/sec)")
+
+    return n_inserted, n_updated
+
+def iter_json_array(file:IO[str], chunk_size:int=65536,
+                    object_hook:Callable[[dict], object]=None) -> Iterator:
+    """Yield the elements of a top-level JSON array one at a time, reading the file in
+    chunk_size pieces. Only the current element and one unparsed chunk are held in memory,
+    unlike json.load, which builds the whole list first.
+
+    Args:
+        file (IO[str]): Text file positioned at the start of a JSON array, such as
+            applicant_data.json.
+        chunk_size (int): Characters read from the file at a time.
+        object_hook (Callable[[dict], object]): Optional hook applied to every decoded object,
+            as in json.load (e.g. module_2's ApplicantRecord.from_dict).
+
+    Yields:
+        element: Each decoded array element, in file order.
+
+    Raises:
+        json.JSONDecodeError: If the file is not a JSON array, ends part way through one or has
+            anything but whitespace after it.
+    """
+    decoder = json.JSONDecoder(object_hook=object_hook)
+    buffer = ""
+    position = 0
+    at_eof = False
+
+    def next_token() -> str:
+        """Skip whitespace, reading more of the file as needed, and return the next
+        character, or an empty string at the end of the file."""
+        nonlocal buffer, position, at_eof
+        while True:
+            while position < len(buffer) and buffer[position].isspace():
+                position += 1
+            if position < len(buffer) or at_eof:
+                return buffer[position:position + 1]
+            chunk = file.read(chunk_size)
+            at_eof = not chunk
+            buffer, position = chunk, 0
+
+    if next_token() != "[":
+        raise json.JSONDecodeError("Expected a JSON array", buffer, position)
+    position += 1
+
+    expect_element = True
+    n_elements = 0
+    while True:
+        token = next_token()
+        if not token:
+            raise json.JSONDecodeError("Unexpected end of file, the JSON array is truncated",
+                                       buffer, position)
+        if token == "]" and (not expect_element or n_elements == 0):
+            position += 1
+            break
+        if token == "," and not expect_element:
+            position += 1
+            expect_element = True
+            continue
+        if not expect_element:
+            raise json.JSONDecodeError("Expected ',' or ']' between array elements",
+                                       buffer, position)
+
+        # An element may run past the end of the buffer, so extend it until one decodes. A
+        # number or literal may also decode from a prefix (e.g. "2." as 2), so those must be
+        # followed by a separator first.
+        while True:
+            try:
+                element, end = decoder.raw_decode(buffer, position)
+                if token in "{[\"" or at_eof or _ELEMENT_END.match(buffer, end):
+                    break
+            except json.JSONDecodeError:
+                if at_eof:
+                    raise
+            chunk = file.read(chunk_size)
+            at_eof = not chunk
+            buffer, position = buffer[position:] + chunk, 0
+
+        position = end
+        expect_element = False
+        n_elements += 1
+        yield element
+
+    # Only whitespace may follow the array, as with json.load
+    if next_token():
+        raise json.JSONDecodeError("Extra data after the JSON array", buffer, position)
+
+def prefetch(iterable:Iterable, maxsize:int=10000) -> Iterator:
+    """Consume iterable on a background thread, up to maxsize items ahead of the caller, so
+    producing items (e.g. parsing JSON) overlaps with whatever the caller does with them
+    (e.g. waiting on the database). The bounded queue keeps memory flat when the producer is
+    faster. Errors raised by iterable are re-raised in the caller.
+
+    Args:
+        iterable (Iterable): Items to produce.
+        maxsize (int): Maximum number of items waiting to be consumed.
+
+    Yields:
+        item: The items of iterable, in order.
+    """
+    items = queue.Queue(maxsize=maxsize)
+    stopped = threading.Event()
+    finished = object()
+
+    def put(entry:tuple) -> bool:
+        # Time out periodically so the thread exits if the caller stops early
+        while not stopped.is_set():
+            try:
+                items.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            put((finished, e))
+            return
+        put((finished, None))
+
+    producer = threading.Thread(target=produce, name="prefetch", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item, error = items.get()
+            if error is not None:
+                raise error
+            if item is finished:
+                return
+            yield item
+    finally:
+        stopped.set()
+        producer.join()
 
 if __name__ == "__main__":
     APPLICANT_DATA = r"module_2\applicant_data.json"
     DB_CONFIG = r"module_3\data\db_config.json"
-    with open(APPLICANT_DATA, 'r', encoding='utf-8') as file:
-        applicant_data = json.load(file)
+    RUN_REPORT = r"module_5\load_report.json"
     with open(DB_CONFIG, 'r', encoding='utf-8') as file:
         config = json.load(file)
 
@@ -110,10 +576,14 @@ if __name__ == "__main__":
         db_port=config["db_port"]
     )
 
-    for applicant_i, applicant in enumerate(applicant_data):
-        # Insert each applicant record into the database
-        insert_applicant_record(conn, applicant, applicant_i)
+    # Insert new applicants and update changed ones, so the load can be repeated daily. The
+    # file is parsed a batch ahead of the upsert rather than loaded whole.
+    with open(APPLICANT_DATA, 'r', encoding='utf-8') as file, \
+            RunReport("load", trace_memory=True) as run_report:
+        applicant_data = prefetch(iter_json_array(file))
+        n_inserted, n_updated = upsert_applicants(conn, applicant_data, report=run_report)
+    run_report.save_json(RUN_REPORT)
 
-    print(f"{len(applicant_data)} applicants successfuly inserted into applicants")
+    print(f"{n_inserted} applicants successfuly inserted into applicants, {n_updated} updated")
 
     conn.close()
@@ -0,0 +1,209 @@
+"""
+This module provides a parallel full reload of the applicants table.
+
+The input is streamed in partitions that are copied over separate connections, one process
+each, into an UNLOGGED staging table. Indexes are then built once on the loaded table, it is
+made durable with SET LOGGED, and it replaces the applicants table in a single transaction.
+Readers see either the old table or the complete new one, never a partly loaded table.
+
+Functions:
+- parallel_load_applicants: Reloads the applicants table from many connections at once.
+
+Usage:
+Run this module as a script to replace the applicants table with the contents of
+applicant_data.json, loading on one process per CPU core.
+"""
+
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from itertools import islice
+from typing import Iterable
+
+import psycopg2
+from psycopg2 import sql
+
+from instrumentation import RunReport
+from load_data import copy_applicants, create_connection, iter_json_array
+from schema import (create_indexes, create_table_query, create_views, dependent_views,
+                    drop_views, index_names)
+
+def _connect(db_config:dict) -> psycopg2.extensions.connection:
+    """Open a connection from a db_config.json dictionary.
+
+    Args:
+        db_config (dict): Database configuration.
+
+    Returns:
+        connection: A psycopg2 connection object.
+
+    Raises:
+        psycopg2.OperationalError: If the connection fails.
+    """
+    conn = create_connection(
+        db_name=db_config["db_name"],
+        db_user=db_config["db_user"],
+        db_password=db_config["db_password"],
+        db_host=db_config["db_host"],
+        db_port=db_config["db_port"]
+    )
+    if conn is None:
+        raise psycopg2.OperationalError(f"Unable to connect to {db_config['db_name']}")
+
+    return conn
+
+def _load_partition(db_config:dict, table:str, applicant_data:list[dict], first_p_id:int) -> int:
+    """Copy one partition of applicants into the staging table over its own connection. Kept
+    at module level so it can run in a process pool.
+
+    Args:
+        db_config (dict): Database configuration.
+        table (str): Staging table to copy into.
+        applicant_data (list[dict]): The partition's cleaned applicants.
+        first_p_id (int): Primary key of the partition's first applicant.
+
+    Returns:
+        n_rows: Number of rows copied.
+    """
+    conn = _connect(db_config)
+    cursor = conn.cursor()
+    try:
+        # A failed load discards the staging table anyway, so don't wait on the WAL flush
+        cursor.execute("SET synchronous_commit TO OFF;")
+        n_rows = copy_applicants(cursor, table, applicant_data, first_p_id)
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+    return n_rows
+
+def _swap_tables(cursor:psycopg2.extensions.cursor, staging:str, table:str) -> None:
+    """Replace table with staging, renaming its primary key and indexes to the names
+    create_indexes uses for table. Must run in one transaction so the swap is atomic. Views
+    over the old table are recreated over the new one. Any other dependent object makes the
+    DROP TABLE fail rather than being dropped with it.
+
+    Args:
+        cursor (psycopg2.extensions.cursor): Cursor to run the DDL on.
+        staging (str): Loaded and indexed staging table.
+        table (str): Table to replace.
+    """
+    views = dependent_views(cursor, table)
+    drop_views(cursor, views)
+    cursor.execute(sql.SQL("DROP TABLE IF EXISTS {table};").format(table=sql.Identifier(table)))
+    cursor.execute(sql.SQL("ALTER TABLE {staging} RENAME TO {table};").format(
+        staging=sql.Identifier(staging), table=sql.Identifier(table)))
+    cursor.execute(sql.SQL("ALTER TABLE {table} RENAME CONSTRAINT {staging_pkey} TO {pkey};").format(
+        table=sql.Identifier(table),
+        staging_pkey=sql.Identifier(f"{staging}_pkey"),
+        pkey=sql.Identifier(f"{table}_pkey")
+    ))
+    for staging_index, table_index in zip(index_names(staging), index_names(table)):
+        cursor.execute(sql.SQL("ALTER INDEX IF EXISTS {staging_index} RENAME TO {table_index};").format(
+            staging_index=sql.Identifier(staging_index),
+            table_index=sql.Identifier(table_index)
+        ))
+    create_views(cursor, views)
+
+def parallel_load_applicants(db_config:dict, applicant_data:Iterable[dict],
+                             table:str="applicants", n_partitions:int=None,
+                             partition_size:int=50000, report:RunReport=None) -> int:
+    """Replace table with applicant_data, loading partitions of partition_size applicants on
+    n_partitions processes in parallel. Each partition is copied over its own connection into
+    an UNLOGGED staging table. Partitions are read from applicant_data as loaders become
+    free, so it can be a generator such as iter_json_array. The primary key and indexes are
+    then built once, the table is SET LOGGED and analyzed, and it is swapped in for table in
+    one transaction. On failure the staging table is dropped and table is left as it was.
+
+    Args:
+        db_config (dict): Database configuration, as in db_config.json.
+        applicant_data (Iterable[dict]): Cleaned applicant dictionaries (or records). p_ids
+            are their positions in the input.
+        table (str): PostgreSQL table to replace.
+        n_partitions (int): Number of parallel loaders. Defaults to the number of CPU cores.
+        partition_size (int): Applicants per partition.
+        report (RunReport): Optional run report, timing the 'load', 'index' and 'swap'
+            stages.
+
+    Returns:
+        n_rows: Number of rows loaded, or 0 if the load failed.
+    """
+    n_partitions = n_partitions or os.cpu_count() or 1
+    staging = f"{table}_load"
+
+    conn = _connect(db_config)
+    cursor = conn.cursor()
+    try:
+        # Fresh staging table, without a primary key or indexes to maintain during the load
+        cursor.execute(sql.SQL("DROP TABLE IF EXISTS {staging};").format(
+            staging=sql.Identifier(staging)))
+        cursor.execute(create_table_query(staging, unlogged=True, primary_key=False))
+        conn.commit()
+
+        with report.stage("load") if report else nullcontext():
+            applicant_data = iter(applicant_data)
+            n_rows = 0
+            first_p_id = 0
+            pending = deque()
+            with ProcessPoolExecutor(max_workers=n_partitions) as executor:
+                while partition := list(islice(applicant_data, partition_size)):
+                    # Keep one partition queued per loader, so memory stays bounded
+                    if len(pending) >= 2 * n_partitions:
+                        n_rows += pending.popleft().result()
+                    pending.append(executor.submit(_load_partition, db_config, staging,
+                                                   partition, first_p_id))
+                    first_p_id += len(partition)
+                n_rows += sum(future.result() for future in pending)
+
+        with report.stage("index") if report else nullcontext():
+            cursor.execute(sql.SQL("ALTER TABLE {staging} ADD PRIMARY KEY ({p_id});").format(
+                staging=sql.Identifier(staging), p_id=sql.Identifier("p_id")))
+            conn.commit()
+
+            created = create_indexes(conn, staging)
+            missing = [name for name in index_names(staging)
+                       if name not in created and "trgm" not in name]
+            if missing:
+                raise psycopg2.DataError(f"Unable to build {', '.join(missing)}")
+
+            cursor.execute(sql.SQL("ALTER TABLE {staging} SET LOGGED;").format(
+                staging=sql.Identifier(staging)))
+            cursor.execute(sql.SQL("ANALYZE {staging};").format(staging=sql.Identifier(staging)))
+            conn.commit()
+
+        with report.stage("swap") if report else nullcontext():
+            _swap_tables(cursor, staging, table)
+            conn.commit()
+    except (psycopg2.Error, ValueError) as e:
+        # ValueError covers a malformed JSON input (json.JSONDecodeError) part way through
+        conn.rollback()
+        cursor.execute(sql.SQL("DROP TABLE IF EXISTS {staging};").format(
+            staging=sql.Identifier(staging)))
+        conn.commit()
+        print(f"Parallel load into {table} failed, {table} was left unchanged:\n\n{e}")
+        return 0
+    finally:
+        cursor.close()
+        conn.close()
+
+    if report:
+        report.count("rows_inserted", n_rows)
+    print(f"Loaded {n_rows} rows into {table} over {n_partitions} connections")
+
+    return n_rows
+
+if __name__ == "__main__":
+    APPLICANT_DATA = r"module_2\applicant_data.json"
+    DB_CONFIG = r"module_3\data\db_config.json"
+    RUN_REPORT = r"module_5\load_report.json"
+    with open(DB_CONFIG, 'r', encoding='utf-8') as file:
+        config = json.load(file)
+
+    # Stream the file rather than json.load it, so only the queued partitions are in memory
+    with RunReport("parallel_load") as run_report:
+        with open(APPLICANT_DATA, 'r', encoding='utf-8') as file:
+            parallel_load_applicants(config, iter_json_array(file), report=run_report)
+    run_report.save_json(RUN_REPORT)
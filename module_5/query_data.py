@@ -3,6 +3,8 @@ This module provides various functions to query and analyze data from a PostgreS
 
 Functions:
 - count_semester_entries: Counts the number of entries for a specific semester.
+- value_distribution: Counts each value of a column, optionally filtered and limited to the most
+common values, in one query.
 - compute_percentage_of_distinct_entries: Computes the percentage of distinct
 entries for a given column.
 - compute_average_of_column: Computes the average value of a column.
@@ -13,6 +15,8 @@ column based on a condition.
 - compute_fuzzy_average_of_column: Computes the average value of a column
 based on a fuzzy condition.
 - count_university_program: Counts the number of entries for a specific university and program.
+- count_decisions: Counts decisions of one kind made within a date range.
+- fetch_survey_urls: Fetches the set of survey URLs already stored, for incremental crawls.
 
 Usage:
 Run this module as a script to perform various database queries and computations.
@@ -48,56 +52,72 @@ def count_semester_entries(conn: psycopg2.extensions.connection, semester: str)
 
     return count
 
-def compute_percentage_of_distinct_entries(conn: psycopg2.extensions.connection,
-                                           column: str, table:str="applicants",
-                                           limit:int=1000) -> float:
-    """Compute the percentage of distinct entries for a given column.
-    
+def value_distribution(conn: psycopg2.extensions.connection, column:str, filters:dict=None,
+                       top_k:int=None, table:str="applicants") -> list[tuple]:
+    """Count how often each value of a column occurs, with one GROUP BY query. NULL is
+    counted as its own value (None).
+
     Args:
         conn (psycopg2.extensions.connection): Database connection object.
-        column (str): The column to compute the percentage of distinct entries for.
+        column (str): The column to group by.
+        filters (dict): Optional column -> value equality filters, e.g. {"term": "Fall 2024"}.
+            A value of None matches NULL.
+        top_k (int): Return only the top_k most common values, or None for all of them.
+            Percentages are still relative to every matching row.
         table (str): PostgreSQL table
-        limit (int): Max distinct records to process
-        
+
     Returns:
-        percentage: The percentage of each distinct entry in the specified column.
+        distribution: (value, count, percentage) tuples, most common first.
     """
 
     cursor = conn.cursor()
 
-    # Sanitized query for distinct entries of specified column
-    query = sql.SQL("SELECT DISTINCT({field}) FROM {table} LIMIT %s;").format(
+    conditions = []
+    params = []
+    for field, value in (filters or {}).items():
+        if value is None:
+            conditions.append(sql.SQL("{field} IS NULL").format(field=sql.Identifier(field)))
+        else:
+            conditions.append(sql.SQL("{field} = %s").format(field=sql.Identifier(field)))
+            params.append(value)
+    where = sql.SQL(" WHERE ") + sql.SQL(" AND ").join(conditions) if conditions else sql.SQL("")
+
+    # The window total is taken over every group, before LIMIT drops any (LIMIT NULL is no limit)
+    query = sql.SQL("""SELECT {field}, COUNT(*), (SUM(COUNT(*)) OVER ())::bigint
+                       FROM {table}{where}
+                       GROUP BY {field}
+                       ORDER BY COUNT(*) DESC, {field}
+                       LIMIT %s;""").format(
         field=sql.Identifier(column),
-        table=sql.Identifier(table)
+        table=sql.Identifier(table),
+        where=where
     )
-    cursor.execute(query, (limit,))
+    cursor.execute(query, (*params, top_k))
     result = cursor.fetchall()
-    distinct_entries = [x[0] for x in result] if result else None
 
-    # Total number of records in table
-    query = sql.SQL("SELECT COUNT({field}) FROM {table} LIMIT 1;").format(
-        field=sql.Identifier(column),
-        table=sql.Identifier(table)
-    )
-    cursor.execute(query)
-    total_records = cursor.fetchone()[0]
+    cursor.close()
 
-    # Count occurrences of each distinct entry.
-    distinct_dict = {}
-    for entry in distinct_entries:
-        query = sql.SQL("SELECT COUNT(*) FROM {table} WHERE {field} = %s LIMIT 1;").format(
-            field=sql.Identifier(column),
-            table=sql.Identifier(table)
-        )
-        cursor.execute(query, (entry, ))
-        count = cursor.fetchone()[0]
-        distinct_dict[entry] = count
+    return [(value, count, round((count / total) * 100, 2)) for value, count, total in result]
 
-    cursor.close()
+def compute_percentage_of_distinct_entries(conn: psycopg2.extensions.connection,
+                                           column: str, table:str="applicants",
+                                           limit:int=None) -> dict:
+    """Compute the percentage of distinct entries for a given column, in one query. Entries
+    that are NULL are reported under None, so the percentages add up to 100.
+    
+    Args:
+        conn (psycopg2.extensions.connection): Database connection object.
+        column (str): The column to compute the percentage of distinct entries for.
+        table (str): PostgreSQL table
+        limit (int): Max distinct entries to return, most common first, or None for all
+        
+    Returns:
+        percentage: The percentage of each distinct entry in the specified column.
+    """
 
-    # Handle None values and computer percentages
-    distinct_dict[None] = total_records - sum(distinct_dict.values())
-    percentage_dict = {k: round((v / total_records) * 100, 2) for k, v in distinct_dict.items()}
+    percentage_dict = {value: percentage for value, _, percentage
+                       in value_distribution(conn, column, top_k=limit, table=table)}
+    percentage_dict.setdefault(None, 0.0)
 
     return percentage_dict
 
@@ -183,19 +203,15 @@ def compute_accpetance_percentages(conn: psycopg2.extensions.connection,
 
     cursor = conn.cursor()
 
-    # Count total applicants
-    count_query = sql.SQL("SELECT COUNT(*) FROM {table} limit 1").format(
+    # Count total and accepted applicants in one pass. status holds only the decision
+    count_query = sql.SQL(
+        "SELECT COUNT(*), COUNT(*) FILTER (WHERE {field} = %s) FROM {table};"
+    ).format(
             table=sql.Identifier(table),
+            field=sql.Identifier("status")
         )
-    cursor.execute(count_query)
-    count = cursor.fetchone()[0]
-
-    # Count accepted applicnats
-    accpeted_query = sql.SQL("SELECT COUNT(*) FROM {table} WHERE status LIKE %s limit 1").format(
-            table=sql.Identifier(table),
-        )
-    cursor.execute(accpeted_query, ("Accepted%",))
-    accepted_count = cursor.fetchone()[0]
+    cursor.execute(count_query, ("Accepted",))
+    count, accepted_count = cursor.fetchone()
 
     cursor.close()
 
@@ -227,7 +243,8 @@ def create_semester_view(conn: psycopg2.extensions.connection, semester: str,
         cursor.execute(query, (semester,))
         conn.commit()
         cursor.close()
-    except psycopg2.errors.DuplicateTable as e:
+    # Concurrent requests creating the same view race on the catalog and raise UniqueViolation
+    except (psycopg2.errors.DuplicateTable, psycopg2.errors.UniqueViolation) as e:
         conn.rollback()
         cursor.close()
         print("View already exists and 'replace' not specified or ",
@@ -238,12 +255,14 @@ def create_semester_view(conn: psycopg2.extensions.connection, semester: str,
 def compute_fuzzy_average_of_column(conn: psycopg2.extensions.connection, column:str,
                                     where_col:str, where_condition:str,
                                     table:str='applicants') -> float:
-    """Compute the average (mean) of a column given a 'WHERE LIKE' condition.
+    """Compute the average (mean) of a column given a 'WHERE LIKE' condition. Conditions
+    without wildcards are matched with '=' instead, and patterns should only end in a
+    wildcard ('Accepted%'), so an index on the column can be used.
     Args:
         conn (psycopg2.extensions.connection): Database connection object.
         column (str): The column to average entries for, e.g., 'gpa'.
         where_col (str): The column of the 'WHERE' condition
-        where_condition (str): The condition 'WHERE {col} = {condition}'
+        where_condition (str): The condition 'WHERE {col} LIKE {condition}'
         
     Returns:
         average: The average (mean) of entries for the specified column.
@@ -251,10 +270,12 @@ def compute_fuzzy_average_of_column(conn: psycopg2.extensions.connection, column
 
     cursor = conn.cursor()
 
+    operator = "LIKE" if "%" in where_condition or "_" in where_condition else "="
+
     # Sanitized query for average of specified column
     try:
         query = sql.SQL(
-            "SELECT AVG({field}) FROM {table} WHERE {conditional_column} LIKE %s LIMIT 1;"
+            "SELECT AVG({field}) FROM {table} WHERE {conditional_column} " + operator + " %s;"
         ).format(
             field=sql.Identifier(column),
             table=sql.Identifier(table),
@@ -276,30 +297,34 @@ def compute_fuzzy_average_of_column(conn: psycopg2.extensions.connection, column
 def count_university_program(conn: psycopg2.extensions.connection, university:str,
                              program:str, table:str="applicants"):
     """Count the number of entries that applied to a given university/program.
-    Do not need to include % in the strings.
+    Matches university and program names that contain the given strings, ignoring case
+    (e.g. 'Johns Hopkins' matches 'Johns Hopkins University' and 'Computer Science' matches
+    'MS Computer Science'), which the trigram index can serve. Do not need to include % in
+    the strings.
     Args:
         conn (psycopg2.extensions.connection): Database connection object.
         university (str): Name of university to be searched for
         program (str): Name of degree program to be searched for
         
     Returns:
-        average: The average (mean) of entries for the specified column.
+        count: The count of entries for the university and program.
     """
 
     cursor = conn.cursor()
 
-    university_fuzzy = f"%{university}%"
-    program_fuzzy = f"%{program}%"
+    university_pattern = "%" + _escape_like(university) + "%"
+    program_pattern = "%" + _escape_like(program) + "%"
 
     # Sanitized query to select count of entries from a given program
     try:
         query = sql.SQL(
-            "SELECT COUNT(*) FROM {table} WHERE {field} LIKE %s AND program LIKE %s LIMIT 1;"
+            "SELECT COUNT(*) FROM {table} WHERE {university} ILIKE %s AND {program} ILIKE %s;"
         ).format(
             table=sql.Identifier(table),
-            field=sql.Identifier("program")
+            university=sql.Identifier("university"),
+            program=sql.Identifier("program_name")
         )
-        cursor.execute(query, (university_fuzzy, program_fuzzy))
+        cursor.execute(query, (university_pattern, program_pattern))
         avg = cursor.fetchall()[0][0]
         cursor.close()
 
@@ -312,6 +337,80 @@ def count_university_program(conn: psycopg2.extensions.connection, university:st
 
     return avg
 
+def _escape_like(value:str) -> str:
+    """Escape LIKE wildcards so value is matched literally.
+
+    Args:
+        value (str): Text to match.
+
+    Returns:
+        escaped: value with backslash, % and _ escaped.
+    """
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def count_decisions(conn: psycopg2.extensions.connection, status:str, start_date:str=None,
+                    end_date:str=None, table:str="applicants") -> int:
+    """Count the decisions of one kind made within a date range, using the status and
+    decision_date columns.
+    Args:
+        conn (psycopg2.extensions.connection): Database connection object.
+        status (str): Decision to count, e.g. 'Accepted'.
+        start_date (str): First decision date to include (YYYY-MM-DD), or None for no limit.
+        end_date (str): Decision date to stop before (YYYY-MM-DD), or None for no limit.
+        table (str): PostgreSQL table
+
+    Returns:
+        count: The number of matching decisions.
+    """
+
+    cursor = conn.cursor()
+
+    query = sql.SQL("""SELECT COUNT(*) FROM {table} WHERE {status} = %s
+                       AND (%s::date IS NULL OR {decision_date} >= %s::date)
+                       AND (%s::date IS NULL OR {decision_date} < %s::date);""").format(
+        table=sql.Identifier(table),
+        status=sql.Identifier("status"),
+        decision_date=sql.Identifier("decision_date")
+    )
+    cursor.execute(query, (status, start_date, start_date, end_date, end_date))
+    count = cursor.fetchone()[0]
+
+    cursor.close()
+
+    return count
+
+def fetch_survey_urls(conn: psycopg2.extensions.connection, table:str="applicants") -> set[str]:
+    """Fetch every survey URL already stored in the database. The set can be passed to the
+    scraper as known_urls so an incremental crawl stops at surveys that are already loaded.
+    The read-only transaction is rolled back afterwards, so no lock is left on the table.
+
+    Args:
+        conn (psycopg2.extensions.connection): Database connection object.
+        table (str): PostgreSQL table
+
+    Returns:
+        urls: Set of stored survey URLs.
+    """
+
+    # Named cursor streams rows from the server instead of materializing them all at once
+    cursor = conn.cursor(name="fetch_survey_urls")
+    cursor.itersize = 10000
+
+    query = sql.SQL("SELECT {field} FROM {table} WHERE {field} IS NOT NULL;").format(
+        field=sql.Identifier("url"),
+        table=sql.Identifier(table)
+    )
+    # A named cursor only lives inside a transaction, so end it here. Left open, its ACCESS SHARE
+    # lock blocks DDL on the table (such as the swap in parallel_load) until the connection closes
+    try:
+        cursor.execute(query)
+        urls = {row[0] for row in cursor}
+    finally:
+        cursor.close()
+        conn.rollback()
+
+    return urls
+
 if __name__ == "__main__":
 
     # Load applicant data and database configuration from JSON files
@@ -344,9 +443,9 @@ if __name__ == "__main__":
                                                              "us_or_international",
                                                              "American", table=FALL_2024_VIEW)
     fall_24_accepted = compute_accpetance_percentages(connection, table=FALL_2024_VIEW)
-    fall_24_avg__accepted_gpa = compute_fuzzy_average_of_column(connection, "gpa", "status",
-                                                                "Accepted%",
-                                                                table=FALL_2024_VIEW)
+    fall_24_avg__accepted_gpa = compute_conditional_average_of_column(connection, "gpa", "status",
+                                                                      "Accepted",
+                                                                      table=FALL_2024_VIEW)
     jhu_cs_count = count_university_program(connection, "Johns Hopkins", "Computer Science")
 
     print(f"""1. Applicant count:   {n_fall_2024}
@@ -0,0 +1,407 @@
+"""
+This module defines the applicants table and its indexes, and migrates existing databases to
+match.
+
+Functions:
+- create_schema: Creates the applicants table and its indexes if they do not exist.
+- create_table_query: Builds the CREATE TABLE statement for an applicants table.
+- create_indexes: Creates the indexes used by the query_data filters.
+- index_names: Lists the names of a table's indexes, as created by create_indexes.
+- dependent_views: Lists the views that select from a table, directly or through other views.
+- drop_views / create_views: Drop and recreate views listed by dependent_views.
+- migrate_schema: Brings an existing applicants table up to the current schema, backfilling
+the normalized columns. Safe to run repeatedly.
+
+Usage:
+Run this module as a script to create or migrate the applicants table in the database
+configured in db_config.json.
+"""
+
+import json
+import psycopg2
+from psycopg2 import sql
+
+from load_data import create_connection
+
+# Column name -> PostgreSQL type, in APPLICANT_COLUMNS order
+APPLICANT_SCHEMA = {
+    "p_id": "INTEGER",
+    "program": "TEXT",
+    "comments": "TEXT",
+    "date_added": "DATE",
+    "url": "TEXT",
+    "status": "TEXT",
+    "term": "TEXT",
+    "us_or_international": "TEXT",
+    "gpa": "DOUBLE PRECISION",
+    "gre": "INTEGER",
+    "gre_v": "INTEGER",
+    "gre_aw": "DOUBLE PRECISION",
+    "degree": "TEXT",
+    "university": "TEXT",
+    "program_name": "TEXT",
+    "decision_date": "DATE"
+}
+
+def _index_definitions(table:str) -> list[tuple[str, sql.Composed]]:
+    """Build the index statements for a table, so any copy of the applicants table (e.g. one
+    being built for a swap) can be indexed the same way.
+
+    Args:
+        table (str): PostgreSQL table
+
+    Returns:
+        indexes: (index name, CREATE INDEX IF NOT EXISTS statement) pairs.
+    """
+    table_identifier = sql.Identifier(table)
+
+    def index(name:str, definition:str, **fields) -> tuple[str, sql.Composed]:
+        index_name = f"{table}_{name}"
+        statement = sql.SQL("CREATE " + definition).format(
+            index=sql.Identifier(index_name),
+            table=table_identifier,
+            **{key: sql.Identifier(value) for key, value in fields.items()}
+        )
+        return index_name, statement
+
+    return [
+        # Conflict target of load_data.upsert_applicants, same name as ensure_url_key's
+        index("url_key", "UNIQUE INDEX IF NOT EXISTS {index} ON {table} ({field});", field="url"),
+        # Equality filters in count_semester_entries, semester views and conditional averages
+        index("term_idx", "INDEX IF NOT EXISTS {index} ON {table} ({field});", field="term"),
+        index("us_or_international_idx", "INDEX IF NOT EXISTS {index} ON {table} ({field});",
+              field="us_or_international"),
+        # text_pattern_ops also serves prefix matches like status LIKE 'Accepted%'
+        index("status_idx", "INDEX IF NOT EXISTS {index} ON {table} ({field} text_pattern_ops);",
+              field="status"),
+        # Decision date ranges
+        index("decision_date_idx", "INDEX IF NOT EXISTS {index} ON {table} ({field});",
+              field="decision_date"),
+        # Trigram index for the ILIKE '%...%' matches in count_university_program
+        index("university_program_trgm_idx",
+              "INDEX IF NOT EXISTS {index} ON {table} "
+              "USING GIN ({university} gin_trgm_ops, {program_name} gin_trgm_ops);",
+              university="university", program_name="program_name"),
+    ]
+
+def _enable_trigram_extension(conn:psycopg2.extensions.connection) -> bool:
+    """Enable pg_trgm for trigram indexes.
+
+    Args:
+        conn (psycopg2.extensions.connection): Database connection object.
+
+    Returns:
+        enabled: True if pg_trgm is available, False if it could not be installed (e.g. the
+        contrib package is missing, or the user may not create extensions).
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+        conn.commit()
+    except psycopg2.Error as e:
+        # FeatureNotSupported when pg_trgm is not installed, InsufficientPrivilege without rights
+        conn.rollback()
+        print(f"pg_trgm is unavailable, skipping trigram indexes:\n\n{e}")
+        return False
+    finally:
+        cursor.close()
+
+    return True
+
+def create_indexes(conn:psycopg2.extensions.connection, table:str="applicants") -> list[str]:
+    """Create the indexes used by the query_data filters, skipping ones that exist. Each index
+    is created in its own transaction, so one failure does not block the rest.
+
+    Args:
+        conn (psycopg2.extensions.connection): Database connection object.
+        table (str): PostgreSQL table
+
+    Returns:
+        index_names: Names of the indexes that now exist.
+    """
+    trigrams_enabled = _enable_trigram_extension(conn)
+    index_names = []
+
+    cursor = conn.cursor()
+    for index_name, statement in _index_definitions(table):
+        if "trgm" in index_name and not trigrams_enabled:
+            continue
+        try:
+            cursor.execute(statement)
+            conn.commit()
+            index_names.append(index_name)
+        except psycopg2.errors.UniqueViolation as e:
+            conn.rollback()
+            print(f"Unable to create {index_name}, {table} has duplicate values:\n\n{e}")
+    cursor.close()
+
+    return index_names
+
+def index_names(table:str) -> list[str]:
+    """List the names of the indexes create_indexes builds for a table.
+
+    Args:
+        table (str): PostgreSQL table
+
+    Returns:
+        index_names: Index names, excluding the primary key's.
+    """
+    return [index_name for index_name, _ in _index_definitions(table)]
+
+def dependent_views(cursor:psycopg2.extensions.cursor,
+                    table:str) -> list[tuple[str, str, str]]:
+    """List the views that depend on a table, including views over those views, in an order
+    they can be recreated in. Such views (e.g. semester views) block dropping the table or
+    changing its column types.
+
+    Args:
+        cursor (psycopg2.extensions.cursor): Cursor to run the catalog query on.
+        table (str): PostgreSQL table, in the current schema.
+
+    Returns:
+        views: (schema, view name, SELECT definition) tuples, views before views over them.
+    """
+    cursor.execute(
+        """WITH RECURSIVE views (oid, depth) AS (
+               SELECT rewrite.ev_class, 1
+               FROM pg_depend depend JOIN pg_rewrite rewrite ON rewrite.oid = depend.objid
+               WHERE depend.classid = 'pg_rewrite'::regclass
+                 AND depend.refobjid = (
+                     SELECT oid FROM pg_class
+                     WHERE relname = %s AND relnamespace = current_schema()::regnamespace)
+                 AND rewrite.ev_class <> depend.refobjid
+               UNION
+               SELECT rewrite.ev_class, views.depth + 1
+               FROM views JOIN pg_depend depend ON depend.refobjid = views.oid
+                 JOIN pg_rewrite rewrite ON rewrite.oid = depend.objid
+               WHERE depend.classid = 'pg_rewrite'::regclass
+                 AND rewrite.ev_class <> depend.refobjid
+           )
+           SELECT namespace.nspname, class.relname, pg_get_viewdef(class.oid)
+           FROM views JOIN pg_class class ON class.oid = views.oid
+             JOIN pg_namespace namespace ON namespace.oid = class.relnamespace
+           WHERE class.relkind = 'v'
+           GROUP BY namespace.nspname, class.relname, class.oid
+           ORDER BY MAX(views.depth), class.relname;""",
+        (table,)
+    )
+    return cursor.fetchall()
+
+def drop_views(cursor:psycopg2.extensions.cursor, views:list[tuple[str, str, str]]) -> None:
+    """Drop views listed by dependent_views, views over other views first, without committing.
+
+    Args:
+        cursor (psycopg2.extensions.cursor): Cursor to run the DDL on.
+        views (list[tuple[str, str, str]]): Views, as returned by dependent_views.
+    """
+    for view_schema, view, _ in reversed(views):
+        cursor.execute(sql.SQL("DROP VIEW {view};").format(view=sql.Identifier(view_schema, view)))
+
+def create_views(cursor:psycopg2.extensions.cursor, views:list[tuple[str, str, str]]) -> None:
+    """Recreate views dropped with drop_views from their saved definitions, without committing.
+
+    Args:
+        cursor (psycopg2.extensions.cursor): Cursor to run the DDL on.
+        views (list[tuple[str, str, str]]): Views, as returned by dependent_views.
+    """
+    for view_schema, view, definition in views:
+        cursor.execute(sql.SQL("CREATE VIEW {view} AS ").format(
+            view=sql.Identifier(view_schema, view)) + sql.SQL(definition))
+
+def create_table_query(table:str, unlogged:bool=False, primary_key:bool=True) -> sql.Composed:
+    """Build the CREATE TABLE IF NOT EXISTS statement for an applicants table.
+
+    Args:
+        table (str): PostgreSQL table
+        unlogged (bool): Create an UNLOGGED table, which skips the write-ahead log. Used for
+            staging tables that are loaded and then SET LOGGED.
+        primary_key (bool): Declare p_id as the primary key. Bulk loads add it afterwards,
+            so the index is built once instead of row by row.
+
+    Returns:
+        query: The CREATE TABLE statement.
+    """
+    return sql.SQL(
+        "CREATE " + ("UNLOGGED " if unlogged else "") + "TABLE IF NOT EXISTS {table} ({columns}"
+        + (", PRIMARY KEY ({p_id})" if primary_key else "") + ");"
+    ).format(
+        table=sql.Identifier(table),
+        columns=sql.SQL(", ").join(
+            sql.SQL("{} " + column_type).format(sql.Identifier(column))
+            for column, column_type in APPLICANT_SCHEMA.items()
+        ),
+        p_id=sql.Identifier("p_id")
+    )
+
+def create_schema(conn:psycopg2.extensions.connection, table:str="applicants") -> None:
+    """Create the applicants table with typed columns and its indexes, if they do not exist.
+
+    Args:
+        conn (psycopg2.extensions.connection): Database connection object.
+        table (str): PostgreSQL table
+    """
+    cursor = conn.cursor()
+
+    cursor.execute(create_table_query(table))
+    conn.commit()
+    cursor.close()
+
+    create_indexes(conn, table)
+
+def _column_types(conn:psycopg2.extensions.connection, table:str) -> dict[str, str]:
+    """Fetch the current column types of a table.
+
+    Args:
+        conn (psycopg2.extensions.connection): Database connection object.
+        table (str): PostgreSQL table
+
+    Returns:
+        column_types: Column name -> upper case type name, empty if the table does not exist.
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        """SELECT column_name, data_type FROM information_schema.columns
+           WHERE table_schema = current_schema() AND table_name = %s;""",
+        (table,)
+    )
+    column_types = {name: data_type.upper() for name, data_type in cursor.fetchall()}
+    cursor.close()
+
+    return column_types
+
+def migrate_schema(conn:psycopg2.extensions.connection, table:str="applicants") -> list[str]:
+    """Bring an existing applicants table up to APPLICANT_SCHEMA: add missing columns, convert
+    columns stored with the wrong type, create missing indexes and refresh planner statistics.
+    Creates the table if it does not exist. Running it again makes no further changes. Views
+    over the table block type changes, so they are dropped and recreated around them; if a
+    view no longer works with the new types, nothing is changed.
+
+    Args:
+        conn (psycopg2.extensions.connection): Database connection object.
+        table (str): PostgreSQL table
+
+    Returns:
+        changes: Description of each column change made.
+    """
+    column_types = _column_types(conn, table)
+    if not column_types:
+        create_schema(conn, table)
+        return [f"created {table}"]
+
+    changes = []
+    cursor = conn.cursor()
+    retyped = [column for column, column_type in APPLICANT_SCHEMA.items()
+               if column_types.get(column, column_type) != column_type]
+    views = dependent_views(cursor, table) if retyped else []
+    try:
+        drop_views(cursor, views)
+        _migrate_columns(cursor, table, column_types, changes)
+        n_backfilled = _backfill_normalized_columns(cursor, table)
+        if n_backfilled:
+            changes.append(f"backfilled {n_backfilled} normalized rows")
+        create_views(cursor, views)
+        conn.commit()
+    except (psycopg2.ProgrammingError, psycopg2.DataError) as e:
+        # Unparseable values, or a view whose definition fails with the new column types
+        conn.rollback()
+        cursor.close()
+        print(f"Unable to migrate {table} columns, no changes were made:\n\n{e}")
+        if views:
+            print("These views must work with the new column types: "
+                  + ", ".join(view for _, view, _ in views))
+        return []
+
+    create_indexes(conn, table)
+
+    # Fresh statistics so the planner picks up the new indexes
+    cursor.execute(sql.SQL("ANALYZE {table};").format(table=sql.Identifier(table)))
+    conn.commit()
+    cursor.close()
+
+    return changes
+
+def _migrate_columns(cursor:psycopg2.extensions.cursor, table:str, column_types:dict[str, str],
+                     changes:list[str]) -> None:
+    """Add missing columns and convert mistyped ones, without committing.
+
+    Args:
+        cursor (psycopg2.extensions.cursor): Cursor to run the ALTER TABLE statements on.
+        table (str): PostgreSQL table
+        column_types (dict[str, str]): Current column types, from _column_types.
+        changes (list[str]): List that a description of each change is appended to.
+    """
+    for column, column_type in APPLICANT_SCHEMA.items():
+        if column not in column_types:
+            query = sql.SQL("ALTER TABLE {table} ADD COLUMN {field} " + column_type + ";")
+            changes.append(f"added {column} {column_type}")
+        elif column_types[column] != column_type:
+            # Empty strings from older loads become NULL rather than failing the cast
+            query = sql.SQL(
+                "ALTER TABLE {table} ALTER COLUMN {field} TYPE " + column_type
+                + " USING NULLIF({field}::text, '')::" + column_type + ";"
+            )
+            changes.append(f"converted {column} from {column_types[column]} to {column_type}")
+        else:
+            continue
+
+        cursor.execute(query.format(table=sql.Identifier(table), field=sql.Identifier(column)))
+
+def _backfill_normalized_columns(cursor:psycopg2.extensions.cursor, table:str) -> int:
+    """Split values packed by older loads into the normalized columns, without committing:
+    "university : program_name" programs into university and program_name, and
+    "status on date" statuses into status and decision_date. Rows that are already split are
+    left alone, so repeated runs do nothing.
+
+    Args:
+        cursor (psycopg2.extensions.cursor): Cursor to run the UPDATE statements on.
+        table (str): PostgreSQL table
+
+    Returns:
+        n_rows: Number of row updates made.
+    """
+    program_query = sql.SQL("""
+        UPDATE {table}
+        SET {university} = split_part({program}, ' : ', 1),
+            {program_name} = substr({program}, strpos({program}, ' : ') + 3)
+        WHERE {university} IS NULL AND strpos({program}, ' : ') > 0;
+    """).format(
+        table=sql.Identifier(table),
+        university=sql.Identifier("university"),
+        program_name=sql.Identifier("program_name"),
+        program=sql.Identifier("program")
+    )
+    cursor.execute(program_query)
+    n_rows = cursor.rowcount
+
+    status_query = sql.SQL("""
+        UPDATE {table}
+        SET {decision_date} = NULLIF(split_part({status}, ' on ', 2), '')::date,
+            {status} = split_part({status}, ' on ', 1)
+        WHERE strpos({status}, ' on ') > 0;
+    """).format(
+        table=sql.Identifier(table),
+        decision_date=sql.Identifier("decision_date"),
+        status=sql.Identifier("status")
+    )
+    cursor.execute(status_query)
+    n_rows += cursor.rowcount
+
+    return n_rows
+
+if __name__ == "__main__":
+    DB_CONFIG = r"module_3\data\db_config.json"
+    with open(DB_CONFIG, 'r', encoding='utf-8') as file:
+        config = json.load(file)
+
+    conn = create_connection(
+        db_name=config["db_name"],
+        db_user=config["db_user"],
+        db_password=config["db_password"],
+        db_host=config["db_host"],
+        db_port=config["db_port"]
+    )
+
+    schema_changes = migrate_schema(conn)
+    print("Schema changes:", ", ".join(schema_changes) if schema_changes else "none")
+
+    conn.close()
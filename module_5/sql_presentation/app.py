@@ -1,7 +1,8 @@
 """
 This module defines the Flask application factory function `create_app`.
 
-It imports and registers the `pages` blueprint from the `sql_presentation` package.
+It imports and registers the `pages` blueprint from the `sql_presentation` package, and creates
+the application's database connection pool.
 
 Functions:
 - create_app: Creates and configures the Flask application instance.
@@ -12,14 +13,25 @@ Use this module to initialize and configure the Flask application.
 from flask import Flask
 
 # Module imports
-from sql_presentation import pages
+from sql_presentation import db, pages
 
+DB_CONFIG = r"module_3\data\db_config.json"
 
-def create_app():
-    """Create and configure the Flask application."""
+
+def create_app(config_path:str=DB_CONFIG, minconn:int=1, maxconn:int=10):
+    """Create and configure the Flask application.
+
+    Args:
+        config_path (str): Path to db_config.json, read once for the connection pool.
+        minconn (int): Database connections opened up front.
+        maxconn (int): Maximum database connections open at once.
+    """
 
     # Create Flask app and register blueprints
     app = Flask(__name__)
     app.register_blueprint(pages.bp)
 
+    # Connections are pooled for the life of the app and checked out per request
+    db.init_app(app, config_path, minconn=minconn, maxconn=maxconn)
+
     return app
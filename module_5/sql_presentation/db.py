@@ -0,0 +1,255 @@
+"""
+This module provides the pooled PostgreSQL connections used by the Flask application.
+
+A single `ConnectionPool` is created by `create_app` and stored on the application. Each request
+checks out one connection on first use with `get_db`, and `close_db` returns it to the pool
+when the request's app context is torn down.
+
+Classes:
+- ConnectionPool: Thread-safe connection pool with health checks and usage statistics.
+
+Functions:
+- init_app: Creates the application's connection pool and registers the teardown handler.
+- get_db: Returns the current request's pooled connection, checking one out if needed.
+- close_db: Returns the current request's connection to the pool.
+- get_pool: Returns the application's connection pool.
+
+Usage:
+Call `init_app` from the application factory, then use `get_db()` inside request handlers
+instead of opening connections directly.
+"""
+
+import json
+import threading
+import time
+
+import psycopg2
+from psycopg2 import pool
+from flask import Flask, current_app, g
+
+# Name of the pool in Flask's app.extensions
+EXTENSION_NAME = "db_pool"
+
+class ConnectionPool:
+    """Thread-safe pool of PostgreSQL connections, configured once per application.
+
+    Returned connections stay open in an idle list, up to maxconn of them, so a burst of
+    requests reuses connections instead of reconnecting. When all maxconn connections are
+    checked out, callers wait up to checkout_timeout seconds for one to be returned instead of
+    failing at once. Connections that have been idle for longer than health_check_interval
+    seconds are checked with `SELECT 1` before they are handed out, and replaced if the
+    server dropped them.
+
+    Args:
+        db_config (dict): Database configuration with db_name, db_user, db_password, db_host
+            and db_port keys, as in db_config.json.
+        minconn (int): Connections opened up front.
+        maxconn (int): Maximum connections open at once.
+        health_check_interval (float): Idle seconds after which a connection is checked.
+        checkout_timeout (float): Seconds to wait for a free connection before giving up.
+    """
+
+    def __init__(self, db_config:dict, minconn:int=1, maxconn:int=10,
+                 health_check_interval:float=30.0, checkout_timeout:float=30.0):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.health_check_interval = health_check_interval
+        self.checkout_timeout = checkout_timeout
+        self._connect_kwargs = {
+            "dbname": db_config["db_name"],
+            "user": db_config["db_user"],
+            "password": db_config["db_password"],
+            "host": db_config["db_host"],
+            "port": db_config["db_port"]
+        }
+        # One slot per connection, so callers queue here instead of getting a PoolError
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._lock = threading.Lock()
+        self._idle = []  # Open connections waiting to be checked out, most recent last
+        self._last_used = {}  # id(connection) -> time.monotonic() when opened or returned
+        self._in_use = 0
+        self._counters = {"checkouts": 0, "waits": 0, "connects": 0, "health_checks": 0,
+                          "stale_replaced": 0, "exhausted": 0}
+
+        self._idle.extend(self._connect() for _ in range(minconn))
+
+    def _count(self, name:str, n:int=1) -> None:
+        with self._lock:
+            self._counters[name] += n
+
+    def _connect(self) -> psycopg2.extensions.connection:
+        """Open a new connection. It counts as just used, so it is not health checked."""
+        conn = psycopg2.connect(**self._connect_kwargs)
+        with self._lock:
+            self._counters["connects"] += 1
+            self._last_used[id(conn)] = time.monotonic()
+
+        return conn
+
+    def _close(self, conn:psycopg2.extensions.connection) -> None:
+        """Close a connection and drop its bookkeeping."""
+        with self._lock:
+            self._last_used.pop(id(conn), None)
+        if not conn.closed:
+            conn.close()
+
+    def _is_stale(self, conn:psycopg2.extensions.connection) -> bool:
+        """Return True if conn is closed, or was idle past the interval and fails SELECT 1."""
+        if conn.closed:
+            return True
+
+        with self._lock:
+            last_used = self._last_used.get(id(conn), 0.0)
+        if time.monotonic() - last_used < self.health_check_interval:
+            return False
+
+        self._count("health_checks")
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1;")
+            cursor.close()
+            conn.rollback()
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            return True
+
+        return False
+
+    def getconn(self) -> psycopg2.extensions.connection:
+        """Check out a healthy connection, reusing an idle one if there is one and waiting
+        for one to be returned if all maxconn connections are in use.
+
+        Returns:
+            connection: A pooled psycopg2 connection. Return it with `putconn`.
+
+        Raises:
+            psycopg2.pool.PoolError: If no connection is free within checkout_timeout seconds.
+            psycopg2.OperationalError: If no healthy connection can be opened.
+        """
+        if not self._slots.acquire(blocking=False):
+            self._count("waits")
+            if not self._slots.acquire(timeout=self.checkout_timeout):
+                self._count("exhausted")
+                raise pool.PoolError(f"No connection was free within {self.checkout_timeout} s")
+
+        try:
+            # Replace idle connections the server has dropped. A new connection needs no check
+            while True:
+                with self._lock:
+                    conn = self._idle.pop() if self._idle else None
+                if conn is None:
+                    conn = self._connect()
+                    break
+                if not self._is_stale(conn):
+                    break
+                self._count("stale_replaced")
+                self._close(conn)
+        except BaseException:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._counters["checkouts"] += 1
+            self._in_use += 1
+
+        return conn
+
+    def putconn(self, conn:psycopg2.extensions.connection) -> None:
+        """Return a checked out connection, rolling back anything the request left open. The
+        connection stays open for the next checkout unless it is broken.
+
+        Args:
+            conn (psycopg2.extensions.connection): Connection from `getconn`.
+        """
+        close = bool(conn.closed)
+        if not close and conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                close = True
+
+        if close:
+            self._close(conn)
+        with self._lock:
+            self._in_use -= 1
+            if not close:
+                self._last_used[id(conn)] = time.monotonic()
+                self._idle.append(conn)
+        self._slots.release()
+
+    def stats(self) -> dict:
+        """Return pool usage statistics.
+
+        Returns:
+            stats: Pool size limits, connections in use and idle, and lifetime counters for
+            checkouts, checkouts that had to wait, connections opened, health checks,
+            replaced stale connections and checkouts that timed out waiting.
+        """
+        with self._lock:
+            stats = {
+                "minconn": self.minconn,
+                "maxconn": self.maxconn,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+            }
+            stats.update(self._counters)
+
+        return stats
+
+    def closeall(self) -> None:
+        """Close every idle connection in the pool."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            self._close(conn)
+
+def init_app(app:Flask, config_path:str, minconn:int=1, maxconn:int=10) -> ConnectionPool:
+    """Read the database configuration once, create the application's connection pool and
+    return connections to it at the end of each request.
+
+    Args:
+        app (Flask): Application to attach the pool to.
+        config_path (str): Path to db_config.json.
+        minconn (int): Connections opened up front.
+        maxconn (int): Maximum connections open at once.
+
+    Returns:
+        pool: The application's ConnectionPool.
+    """
+    with open(config_path, 'r', encoding='utf-8') as file:
+        database_config = json.load(file)
+
+    connection_pool = ConnectionPool(database_config, minconn=minconn, maxconn=maxconn)
+    app.extensions[EXTENSION_NAME] = connection_pool
+    app.teardown_appcontext(close_db)
+
+    return connection_pool
+
+def get_pool() -> ConnectionPool:
+    """Return the current application's connection pool.
+
+    Returns:
+        pool: The ConnectionPool created by `init_app`.
+    """
+    return current_app.extensions[EXTENSION_NAME]
+
+def get_db() -> psycopg2.extensions.connection:
+    """Return the connection checked out for the current request, checking one out of the
+    pool on first use. It is returned automatically when the request ends.
+
+    Returns:
+        connection: A pooled psycopg2 connection.
+    """
+    if "db_conn" not in g:
+        g.db_conn = get_pool().getconn()
+
+    return g.db_conn
+
+def close_db(exception:BaseException=None) -> None:  # pylint: disable=unused-argument
+    """Return the current request's connection to the pool, if one was checked out.
+
+    Args:
+        exception (BaseException): Error that ended the request, if any. Unused.
+    """
+    conn = g.pop("db_conn", None)
+    if conn is not None:
+        get_pool().putconn(conn)
@@ -4,50 +4,36 @@ This module defines the `pages` blueprint for a Flask application.
 It includes routes and functions for rendering pages and querying data from a PostgreSQL database.
 
 Functions:
-- get_db_connection: Establishes a connection to the PostgreSQL database using
-configuration from a JSON file.
+- get_db_connection: Returns the request's pooled connection to the PostgreSQL database.
 - home: Defines the route for the home page, queries the database, and renders the home
 page template with query results.
+- pool_stats: Defines the route that reports database connection pool statistics as JSON.
 
 Usage:
 Register the `pages` blueprint with a Flask application to enable the defined routes.
 """
 
-# SQL, config, flask imports
-import json
+# SQL, flask imports
 import psycopg2
-from flask import Blueprint, render_template
+from flask import Blueprint, jsonify, render_template
 
 # Intra-package imports
-from load_data import create_connection
 import query_data
+from sql_presentation import db
 
 bp = Blueprint("pages", __name__)
 
 def get_db_connection() -> psycopg2.extensions.connection:
     """
-    Establishes a connection to the PostgreSQL database using configuration from a JSON file.
+    Returns the PostgreSQL connection for the current request.
 
-    The function reads database connection parameters from a JSON file and uses the
-    `create_connection` function to create and return a connection object.
+    The connection is checked out of the application's pool (created once in `create_app`)
+    on first use, and returned to the pool when the request ends, so it must not be closed.
 
     Returns:
-        psycopg2.extensions.connection: A connection object to the PostgreSQL database.
+        psycopg2.extensions.connection: A pooled connection to the PostgreSQL database.
     """
-    with open(r"module_3\data\db_config.json", 'r',
-              encoding='utf-8') as file:
-        database_config = json.load(file)
-
-    # Create a connection to the PostgreSQL database
-    conn = create_connection(
-        db_name=database_config["db_name"],
-        db_user=database_config["db_user"],
-        db_password=database_config["db_password"],
-        db_host=database_config["db_host"],
-        db_port=database_config["db_port"]
-    )
-
-    return conn
+    return db.get_db()
 
 # Define routes for each page
 @bp.route("/")
@@ -83,11 +69,21 @@ def home():
     query_responses["Percentage of Fall 2024 applicants accepted"] =\
         query_data.compute_accpetance_percentages(conn, table=fall_2024_view)
     query_responses["Average GPA of accepted Fall 2024 applicants"] =\
-        query_data.compute_fuzzy_average_of_column(conn, "gpa", "status", "Accepted%",
-                                                   table=fall_2024_view)
+        query_data.compute_conditional_average_of_column(conn, "gpa", "status", "Accepted",
+                                                         table=fall_2024_view)
     query_responses["Number of applicants to JHU Computer Science programs"] =\
         query_data.count_university_program(conn, "Johns Hopkins", "Computer Science")
 
-    conn.close()
-
     return render_template("pages/home.html", responses=query_responses)
+
+@bp.route("/pool")
+def pool_stats():
+    """
+    Reports database connection pool statistics.
+
+    Returns:
+        Response: JSON with the pool limits, connections in use and idle, and counters for
+        checkouts, waits for a free connection, connections opened, health checks, replaced
+        stale connections and checkouts that timed out.
+    """
+    return jsonify(db.get_pool().stats())
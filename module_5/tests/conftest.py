@@ -0,0 +1,102 @@
+import json
+import os
+import uuid
+
+import psycopg2
+import pytest
+from psycopg2 import sql
+
+from load_data import create_connection
+
+# db_config.json for a server the tests may create scratch databases on. Database tests are
+# skipped without one.
+TEST_DB_CONFIG = os.environ.get("MODULE_5_TEST_DB_CONFIG")
+
+def _connect(config:dict) -> psycopg2.extensions.connection:
+    return create_connection(
+        db_name=config["db_name"],
+        db_user=config["db_user"],
+        db_password=config["db_password"],
+        db_host=config["db_host"],
+        db_port=config["db_port"]
+    )
+
+@pytest.fixture
+def db_config():
+    """db_config for a fresh scratch database, dropped after the test."""
+    if not TEST_DB_CONFIG:
+        pytest.skip("Set MODULE_5_TEST_DB_CONFIG to a db_config.json to run database tests")
+    with open(TEST_DB_CONFIG, 'r', encoding='utf-8') as file:
+        server_config = json.load(file)
+
+    admin = _connect(server_config)
+    if admin is None:
+        pytest.skip(f"Unable to connect to {server_config['db_host']}")
+    admin.autocommit = True
+    db_name = f"module_5_test_{uuid.uuid4().hex[:12]}"
+    cursor = admin.cursor()
+    cursor.execute(sql.SQL("CREATE DATABASE {};").format(sql.Identifier(db_name)))
+
+    yield {**server_config, "db_name": db_name}
+
+    cursor.execute(sql.SQL("DROP DATABASE IF EXISTS {} WITH (FORCE);").format(sql.Identifier(db_name)))
+    cursor.close()
+    admin.close()
+
+@pytest.fixture
+def conn(db_config):
+    """Connection to the scratch database."""
+    connection = _connect(db_config)
+    yield connection
+    connection.close()
+
+@pytest.fixture
+def applicants():
+    """Cleaned applicants, as written to applicant_data.json by module_2."""
+    return [
+        {
+            "university": "Johns Hopkins University",
+            "program_name": "Computer Science",
+            "program_level": "Masters",
+            "applicant_status": ["Accepted", "2025-03-01"],
+            "date_of_information_added": "2025-03-02",
+            "url_link": "https://www.thegradcafe.com/survey/result/1",
+            "program_start_semester": "Fall 2025",
+            "nationality": "International",
+            "gre_score": 330,
+            "gre_v_score": 165,
+            "gre_aw_score": 4.5,
+            "gpa": 3.9,
+            "comments": "Tab\there, newline\nthere and a backslash \\"
+        },
+        {
+            "university": "Stanford University",
+            "program_name": "MS Computer Science",
+            "program_level": "Masters",
+            "applicant_status": ["Rejected", "2025-03-05"],
+            "date_of_information_added": "2025-03-06",
+            "url_link": "https://www.thegradcafe.com/survey/result/2",
+            "program_start_semester": "Fall 2025",
+            "nationality": "American",
+            "gre_score": None,
+            "gre_v_score": None,
+            "gre_aw_score": None,
+            "gpa": None,
+            "comments": None
+        },
+        {
+            "university": "Johns Hopkins University",
+            "program_name": "Applied Mathematics",
+            "program_level": "PhD",
+            "applicant_status": ["Waitlisted", "2025-02-10"],
+            "date_of_information_added": "2025-02-11",
+            "url_link": "https://www.thegradcafe.com/survey/result/3",
+            "program_start_semester": "Fall 2024",
+            "nationality": "International",
+            "gre_score": None,
+            "gre_v_score": None,
+            "gre_aw_score": None,
+            "gpa": 3.5,
+            "comments": ""
+        },
+    ]
@@ -0,0 +1,141 @@
+import json
+import threading
+import time
+
+import psycopg2
+import pytest
+from psycopg2 import pool
+
+import load_data
+import schema
+from sql_presentation import app, db
+
+def test_checkouts_wait_for_a_free_connection(db_config):
+    connection_pool = db.ConnectionPool(db_config, minconn=1, maxconn=2)
+    errors = []
+
+    def hold_connection():
+        try:
+            conn = connection_pool.getconn()
+            time.sleep(0.2)
+            connection_pool.putconn(conn)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            errors.append(e)
+
+    threads = [threading.Thread(target=hold_connection) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = connection_pool.stats()
+    assert not errors
+    assert stats["checkouts"] == 4
+    assert stats["waits"] >= 2
+    assert stats["in_use"] == 0
+    connection_pool.closeall()
+
+def test_connections_are_reused_under_concurrent_use(db_config):
+    connection_pool = db.ConnectionPool(db_config, minconn=1, maxconn=4)
+
+    def run_queries():
+        for _ in range(20):
+            conn = connection_pool.getconn()
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1;")
+            cursor.close()
+            connection_pool.putconn(conn)
+            time.sleep(0.001)
+
+    threads = [threading.Thread(target=run_queries) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = connection_pool.stats()
+    assert stats["checkouts"] == 160
+    # Never more connections than maxconn, and new connections are not health checked
+    assert stats["connects"] <= 4
+    assert stats["idle"] == stats["connects"]
+    assert stats["health_checks"] == 0
+    connection_pool.closeall()
+
+def test_checkout_times_out_when_exhausted(db_config):
+    connection_pool = db.ConnectionPool(db_config, minconn=1, maxconn=1, checkout_timeout=0.1)
+    conn = connection_pool.getconn()
+    with pytest.raises(pool.PoolError):
+        connection_pool.getconn()
+
+    connection_pool.putconn(conn)
+    assert connection_pool.stats()["exhausted"] == 1
+    # The slot is free again once the connection is returned
+    connection_pool.putconn(connection_pool.getconn())
+    connection_pool.closeall()
+
+def test_dropped_connections_are_replaced(db_config, conn):
+    connection_pool = db.ConnectionPool(db_config, minconn=1, maxconn=2,
+                                        health_check_interval=0)
+    pooled = connection_pool.getconn()
+    backend_pid = pooled.get_backend_pid()
+    connection_pool.putconn(pooled)
+
+    # Drop the idle pooled connection server side
+    cursor = conn.cursor()
+    cursor.execute("SELECT pg_terminate_backend(%s);", (backend_pid,))
+    conn.commit()
+    cursor.close()
+    time.sleep(0.1)
+
+    replacement = connection_pool.getconn()
+    cursor = replacement.cursor()
+    cursor.execute("SELECT 1;")
+    assert cursor.fetchone() == (1,)
+    cursor.close()
+    connection_pool.putconn(replacement)
+
+    stats = connection_pool.stats()
+    assert stats["stale_replaced"] == 1
+    assert stats["idle"] == 1
+    connection_pool.closeall()
+
+def test_putconn_rolls_back_open_transactions(db_config):
+    connection_pool = db.ConnectionPool(db_config, minconn=1, maxconn=1)
+    conn = connection_pool.getconn()
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1;")
+    cursor.close()
+    connection_pool.putconn(conn)
+
+    conn = connection_pool.getconn()
+    assert conn.get_transaction_status() == psycopg2.extensions.TRANSACTION_STATUS_IDLE
+    connection_pool.putconn(conn)
+    connection_pool.closeall()
+
+def test_concurrent_requests_share_a_small_pool(db_config, conn, applicants, tmp_path):
+    # The home page averages over accepted US applicants for Fall 2024, so add one
+    accepted = dict(applicants[2], applicant_status=["Accepted", "2024-03-01"],
+                    nationality="American", url_link="https://www.thegradcafe.com/survey/result/4")
+    schema.create_schema(conn)
+    load_data.bulk_load_applicants(conn, applicants + [accepted])
+    config_path = tmp_path / "db_config.json"
+    config_path.write_text(json.dumps(db_config), encoding='utf-8')
+
+    flask_app = app.create_app(str(config_path), minconn=1, maxconn=2)
+    statuses = []
+
+    def request_home():
+        with flask_app.test_client() as client:
+            statuses.append(client.get("/").status_code)
+
+    threads = [threading.Thread(target=request_home) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert statuses == [200] * 4
+    pool_stats = flask_app.test_client().get("/pool").get_json()
+    assert pool_stats["in_use"] == 0
+    assert pool_stats["checkouts"] == 4
+    flask_app.extensions[db.EXTENSION_NAME].closeall()
@@ -0,0 +1,156 @@
+import io
+import json
+
+import pytest
+
+import load_data
+import schema
+from instrumentation import RunReport
+
+NESTED = [
+    {"comments": "Brackets ] [ and a quote \" in a string", "scores": [1, [2, 3]]},
+    "a string with an escaped backslash \\ and ]",
+    [],
+    {},
+    2.5,
+    -1e3,
+    None,
+    True,
+]
+
+def read_array(text:str, chunk_size:int=65536) -> list:
+    """Decode a JSON array from text with iter_json_array."""
+    return list(load_data.iter_json_array(io.StringIO(text), chunk_size=chunk_size))
+
+@pytest.mark.parametrize("text", ["[]", "  [ ]  ", "\n[\n]\n"])
+def test_iter_json_array_empty(text):
+    assert read_array(text) == []
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 65536])
+def test_iter_json_array_matches_json_load(chunk_size):
+    text = json.dumps(NESTED, indent=2)
+    assert read_array(text, chunk_size) == json.loads(text)
+    # Without whitespace, numbers and literals end right at chunk boundaries
+    text = json.dumps([12345, 2.75, 10, True, False, None], separators=(",", ":"))
+    assert read_array(text, chunk_size) == json.loads(text)
+
+def test_iter_json_array_object_hook():
+    text = json.dumps([{"a": 1}, {"a": 2}])
+    elements = load_data.iter_json_array(io.StringIO(text), object_hook=lambda d: d["a"])
+    assert list(elements) == [1, 2]
+
+@pytest.mark.parametrize("chunk_size", [1, 65536])
+@pytest.mark.parametrize("text", ["[", "[1,", "[1", '[{"a": ', '["unterminated', "[1, 2"])
+def test_iter_json_array_truncated(text, chunk_size):
+    with pytest.raises(json.JSONDecodeError, match="truncated|Unterminated|Expecting"):
+        read_array(text, chunk_size)
+
+@pytest.mark.parametrize("chunk_size", [1, 65536])
+@pytest.mark.parametrize("text", ["[1]x", "[] []", "[1],", '[{"a": 1}] "b"'])
+def test_iter_json_array_trailing_data(text, chunk_size):
+    with pytest.raises(json.JSONDecodeError, match="Extra data"):
+        read_array(text, chunk_size)
+
+@pytest.mark.parametrize("text", ["", "{}", "1", "[1 2]", "[,1]", "[1,]"])
+def test_iter_json_array_invalid(text):
+    with pytest.raises(json.JSONDecodeError):
+        read_array(text)
+
+def test_iter_json_array_truncation_message():
+    with pytest.raises(json.JSONDecodeError, match="truncated"):
+        read_array("[")
+
+def test_prefetch_yields_in_order():
+    assert list(load_data.prefetch(range(1000), maxsize=10)) == list(range(1000))
+
+def test_prefetch_reraises_errors():
+    # The elements before the error still reach the caller
+    elements = load_data.prefetch(load_data.iter_json_array(io.StringIO("[1, 2]x")))
+    assert next(elements) == 1
+    assert next(elements) == 2
+    with pytest.raises(json.JSONDecodeError, match="Extra data"):
+        next(elements)
+
+def fetch_rows(conn, query:str) -> list[tuple]:
+    """Run a query and return all of its rows."""
+    cursor = conn.cursor()
+    cursor.execute(query)
+    rows = cursor.fetchall()
+    cursor.close()
+    return rows
+
+def test_bulk_load_applicants(conn, applicants):
+    schema.create_schema(conn)
+    report = RunReport("load")
+    assert load_data.bulk_load_applicants(conn, applicants, report=report) == 3
+
+    rows = fetch_rows(conn, "SELECT p_id, comments, gpa, date_added::text, status, "
+                            "decision_date::text FROM applicants ORDER BY p_id;")
+    # Tabs, newlines and backslashes survive COPY's text format, and None becomes NULL
+    assert rows[0] == (0, applicants[0]["comments"], 3.9, "2025-03-02", "Accepted",
+                       "2025-03-01")
+    assert rows[1][1:3] == (None, None)
+    assert rows[2][1] == ""
+    assert report.counters["rows_inserted"] == 3
+
+def test_bulk_load_skips_invalid_dates(conn, applicants):
+    schema.create_schema(conn)
+    applicants[0]["date_of_information_added"] = "2025-02-30"
+    applicants[1]["applicant_status"] = ["Rejected", "not a date"]
+    report = RunReport("load")
+
+    assert load_data.bulk_load_applicants(conn, applicants, report=report) == 1
+    assert fetch_rows(conn, "SELECT p_id, url FROM applicants;") == [
+        (0, applicants[2]["url_link"])]
+    assert report.counters["rows_failed"] == 2
+    assert report.counters["rows_inserted"] == 1
+
+def test_insert_applicant_record_counts_failures(conn, applicants):
+    schema.create_schema(conn)
+    report = RunReport("load")
+    applicants[0]["date_of_information_added"] = "March 2"
+    # Out of range for the INTEGER column, so only the database can reject it
+    applicants[1]["gre_score"] = 10 ** 12
+
+    for applicant_number, applicant in enumerate(applicants):
+        load_data.insert_applicant_record(conn, applicant, applicant_number, report=report)
+
+    assert fetch_rows(conn, "SELECT p_id FROM applicants;") == [(2,)]
+    assert report.counters["rows_failed"] == 2
+    assert report.counters["rows_inserted"] == 1
+
+def test_upsert_inserts_then_updates_changed_rows(conn, applicants):
+    schema.create_schema(conn)
+    assert load_data.upsert_applicants(conn, applicants[:2], batch_size=1) == (2, 0)
+
+    # Unchanged rows are left alone, changed ones updated in place, new ones numbered after
+    applicants[1]["applicant_status"] = ["Accepted", "2025-03-07"]
+    report = RunReport("load")
+    assert load_data.upsert_applicants(conn, applicants, report=report) == (1, 1)
+    assert report.counters["rows_unchanged"] == 1
+
+    rows = fetch_rows(conn, "SELECT p_id, url, status FROM applicants ORDER BY p_id;")
+    assert rows[:2] == [(0, applicants[0]["url_link"], "Accepted"),
+                        (1, applicants[1]["url_link"], "Accepted")]
+    # p_ids may have gaps, but never reuse an existing one
+    assert rows[2][0] > 1
+    assert rows[2][1:] == (applicants[2]["url_link"], "Waitlisted")
+    assert load_data.upsert_applicants(conn, applicants) == (0, 0)
+
+def test_upsert_keeps_last_duplicate_in_a_batch(conn, applicants):
+    schema.create_schema(conn)
+    changed = dict(applicants[0], comments="Updated comment")
+
+    assert load_data.upsert_applicants(conn, [applicants[0], changed]) == (1, 0)
+    assert fetch_rows(conn, "SELECT comments FROM applicants;") == [("Updated comment",)]
+
+def test_ensure_url_key_refuses_duplicate_urls(conn, applicants):
+    cursor = conn.cursor()
+    cursor.execute(schema.create_table_query("applicants"))
+    conn.commit()
+    cursor.close()
+    duplicate = dict(applicants[1], url_link=applicants[0]["url_link"])
+    load_data.bulk_load_applicants(conn, [applicants[0], duplicate])
+
+    assert not load_data.ensure_url_key(conn)
+    assert load_data.upsert_applicants(conn, applicants) == (0, 0)
@@ -0,0 +1,75 @@
+import io
+import json
+
+import load_data
+import parallel_load
+import query_data
+import schema
+
+def fetch_rows(conn, query:str) -> list[tuple]:
+    """Run a query and return all of its rows, ending the transaction so its locks do not
+    block the swap."""
+    cursor = conn.cursor()
+    cursor.execute(query)
+    rows = cursor.fetchall()
+    cursor.close()
+    conn.rollback()
+    return rows
+
+def test_parallel_load_streams_partitions(db_config, conn, applicants):
+    schema.create_schema(conn)
+    applicant_file = io.StringIO(json.dumps(applicants * 3))
+    # Re-used URLs would break the unique index, so give each copy its own
+    data = (dict(applicant, url_link=f"{applicant['url_link']}/{i}")
+            for i, applicant in enumerate(load_data.iter_json_array(applicant_file)))
+
+    n_rows = parallel_load.parallel_load_applicants(db_config, data, n_partitions=2,
+                                                    partition_size=2)
+
+    assert n_rows == 9
+    assert fetch_rows(conn, "SELECT p_id FROM applicants ORDER BY p_id;") == [
+        (p_id,) for p_id in range(9)]
+    # Primary key and indexes carry the applicants names after the swap
+    index_names = {row[0] for row in fetch_rows(
+        conn, "SELECT indexname FROM pg_indexes WHERE tablename = 'applicants';")}
+    assert "applicants_pkey" in index_names
+    assert "applicants_url_key" in index_names
+
+def test_parallel_load_recreates_dependent_views(db_config, conn, applicants):
+    schema.create_schema(conn)
+    load_data.bulk_load_applicants(conn, applicants[:1])
+    view = query_data.create_semester_view(conn, "Fall 2024")
+    cursor = conn.cursor()
+    cursor.execute("CREATE VIEW fall_2024_ids AS SELECT p_id FROM fall_2024;")
+    conn.commit()
+    cursor.close()
+    assert fetch_rows(conn, f"SELECT COUNT(*) FROM {view};") == [(0,)]
+
+    assert parallel_load.parallel_load_applicants(db_config, applicants, n_partitions=2) == 3
+
+    # The views survive the swap and select from the new table
+    assert fetch_rows(conn, f"SELECT COUNT(*) FROM {view};") == [(1,)]
+    assert fetch_rows(conn, "SELECT p_id FROM fall_2024_ids;") == [(2,)]
+
+def test_parallel_load_keeps_table_when_swap_is_blocked(db_config, conn, applicants):
+    schema.create_schema(conn)
+    load_data.bulk_load_applicants(conn, applicants[:1])
+    cursor = conn.cursor()
+    # Dropping the table would need CASCADE to remove the materialized view
+    cursor.execute("CREATE MATERIALIZED VIEW applicant_ids AS SELECT p_id FROM applicants;")
+    conn.commit()
+    cursor.close()
+
+    assert parallel_load.parallel_load_applicants(db_config, applicants, n_partitions=2) == 0
+    assert fetch_rows(conn, "SELECT COUNT(*) FROM applicants;") == [(1,)]
+    assert fetch_rows(conn, "SELECT COUNT(*) FROM applicant_ids;") == [(1,)]
+    assert fetch_rows(conn, "SELECT to_regclass('applicants_load');") == [(None,)]
+
+def test_parallel_load_rejects_malformed_input(db_config, conn, applicants):
+    schema.create_schema(conn)
+    load_data.bulk_load_applicants(conn, applicants)
+    applicant_file = io.StringIO(json.dumps(applicants) + "x")
+
+    data = load_data.iter_json_array(applicant_file)
+    assert parallel_load.parallel_load_applicants(db_config, data, n_partitions=2) == 0
+    assert fetch_rows(conn, "SELECT COUNT(*) FROM applicants;") == [(3,)]
@@ -0,0 +1,53 @@
+import psycopg2.extensions
+import pytest
+
+import load_data
+import query_data
+import schema
+
+@pytest.fixture
+def loaded(conn, applicants):
+    """Database with the applicants fixture loaded."""
+    schema.create_schema(conn)
+    load_data.bulk_load_applicants(conn, applicants)
+    return conn
+
+@pytest.mark.parametrize("university, program, expected", [
+    ("Johns Hopkins", "Computer Science", 1),
+    # Substrings anywhere, ignoring case, as with the combined program column
+    ("", "Computer Science", 2),
+    ("stanford", "computer science", 1),
+    ("University", "Mathematics", 1),
+    ("Johns Hopkins", "Physics", 0),
+    # LIKE wildcards in the input are matched literally
+    ("%", "%", 0),
+])
+def test_count_university_program(loaded, university, program, expected):
+    assert query_data.count_university_program(loaded, university, program) == expected
+
+def test_value_distribution(loaded):
+    assert query_data.value_distribution(loaded, "us_or_international") == [
+        ("International", 2, 66.67), ("American", 1, 33.33)]
+    # Percentages stay relative to every matching row when only the top values are returned
+    assert query_data.value_distribution(loaded, "us_or_international", top_k=1) == [
+        ("International", 2, 66.67)]
+    assert query_data.value_distribution(loaded, "us_or_international",
+                                         filters={"term": "Fall 2025"}) == [
+        ("American", 1, 50.0), ("International", 1, 50.0)]
+
+def test_value_distribution_counts_null(loaded):
+    assert query_data.value_distribution(loaded, "gre", filters={"gre": None}) == [
+        (None, 2, 100.0)]
+    assert query_data.compute_percentage_of_distinct_entries(loaded, "gpa") == {
+        3.5: 33.33, 3.9: 33.33, None: 33.33}
+
+def test_percentage_of_distinct_entries_reports_missing_null(loaded):
+    assert query_data.compute_percentage_of_distinct_entries(loaded, "us_or_international") == {
+        "International": 66.67, "American": 33.33, None: 0.0}
+
+def test_fetch_survey_urls_ends_transaction(loaded):
+    urls = query_data.fetch_survey_urls(loaded)
+
+    assert len(urls) == 3
+    # An open transaction would keep a lock on the table and block DDL such as parallel_load's swap
+    assert loaded.get_transaction_status() == psycopg2.extensions.TRANSACTION_STATUS_IDLE
@@ -0,0 +1,106 @@
+from psycopg2 import sql
+
+import schema
+
+def _index_names(conn, table:str="applicants") -> set[str]:
+    cursor = conn.cursor()
+    cursor.execute("SELECT indexname FROM pg_indexes WHERE tablename = %s;", (table,))
+    names = {row[0] for row in cursor.fetchall()}
+    cursor.close()
+    return names
+
+def _has_extension(conn, name:str) -> bool:
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = %s;", (name,))
+    available = cursor.fetchone() is not None
+    cursor.close()
+    return available
+
+def test_create_schema_creates_table_and_indexes(conn):
+    schema.create_schema(conn)
+
+    expected = set(schema.index_names("applicants")) | {"applicants_pkey"}
+    if not _has_extension(conn, "pg_trgm"):
+        # Trigram indexes are skipped rather than failing the schema
+        expected = {name for name in expected if "trgm" not in name}
+    assert _index_names(conn) == expected
+    assert schema._column_types(conn, "applicants") == {
+        "p_id": "INTEGER", "program": "TEXT", "comments": "TEXT", "date_added": "DATE",
+        "url": "TEXT", "status": "TEXT", "term": "TEXT", "us_or_international": "TEXT",
+        "gpa": "DOUBLE PRECISION", "gre": "INTEGER", "gre_v": "INTEGER",
+        "gre_aw": "DOUBLE PRECISION", "degree": "TEXT", "university": "TEXT",
+        "program_name": "TEXT", "decision_date": "DATE"
+    }
+
+def test_create_schema_is_repeatable(conn):
+    schema.create_schema(conn)
+    schema.create_schema(conn)
+    assert schema.migrate_schema(conn) == []
+
+LEGACY_TABLE = """
+    CREATE TABLE applicants (
+        p_id INTEGER PRIMARY KEY, program TEXT, comments TEXT, date_added TEXT, url TEXT,
+        status TEXT, term TEXT, us_or_international TEXT, gpa TEXT, gre TEXT, gre_v TEXT,
+        gre_aw TEXT, degree TEXT
+    );
+    INSERT INTO applicants VALUES
+        (0, 'Johns Hopkins University : Computer Science', '', '2025-03-02', 'u0',
+         'Accepted on 2025-03-01', 'Fall 2024', 'American', '3.9', '', '', '', 'Masters');
+"""
+
+def _create_legacy_table(conn, *views:str) -> None:
+    """Create an applicants table as older loaders did, all text and packed values."""
+    cursor = conn.cursor()
+    cursor.execute(LEGACY_TABLE)
+    for view in views:
+        cursor.execute(view)
+    conn.commit()
+    cursor.close()
+
+def test_migrate_schema_converts_and_backfills(conn):
+    _create_legacy_table(conn)
+
+    changes = schema.migrate_schema(conn)
+
+    assert "converted date_added from TEXT to DATE" in changes
+    assert "added decision_date DATE" in changes
+    # One update for the packed program and one for the packed status
+    assert "backfilled 2 normalized rows" in changes
+    assert schema._column_types(conn, "applicants")["gre"] == "INTEGER"
+    cursor = conn.cursor()
+    cursor.execute("SELECT university, program_name, status, decision_date::text, gre "
+                   "FROM applicants;")
+    assert cursor.fetchone() == ("Johns Hopkins University", "Computer Science", "Accepted",
+                                 "2025-03-01", None)
+    cursor.close()
+    assert schema.migrate_schema(conn) == []
+
+def test_migrate_schema_recreates_dependent_views(conn):
+    _create_legacy_table(conn,
+                         "CREATE VIEW fall_2024 AS SELECT * FROM applicants "
+                         "WHERE term = 'Fall 2024';",
+                         "CREATE VIEW fall_2024_gpa AS SELECT gpa FROM fall_2024;")
+
+    assert "converted gpa from TEXT to DOUBLE PRECISION" in schema.migrate_schema(conn)
+
+    cursor = conn.cursor()
+    cursor.execute("SELECT data_type FROM information_schema.columns "
+                   "WHERE table_name = 'fall_2024_gpa' AND column_name = 'gpa';")
+    assert cursor.fetchone() == ("double precision",)
+    cursor.execute("SELECT gpa FROM fall_2024_gpa;")
+    assert cursor.fetchone() == (3.9,)
+    cursor.close()
+
+def test_migrate_schema_rolls_back_when_a_view_breaks(conn, capsys):
+    # LIKE has no DATE version, so this view cannot be recreated after the conversion
+    _create_legacy_table(conn, "CREATE VIEW added_2025 AS SELECT * FROM applicants "
+                               "WHERE date_added LIKE '2025%';")
+
+    assert schema.migrate_schema(conn) == []
+
+    assert "These views must work with the new column types: added_2025" in capsys.readouterr().out
+    assert schema._column_types(conn, "applicants")["date_added"] == "TEXT"
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM added_2025;")
+    assert cursor.fetchone() == (1,)
+    cursor.close()